@@ -0,0 +1,168 @@
+"""Generador determinista de G-code sintético para los benchmarks.
+
+Cada tipo imita un caso que cuesta al importador:
+
+- vase: modo jarrón, una espiral continua con Z creciente en cada línea.
+- infill: capas con perímetro y relleno denso en zigzag, con retracciones
+  y desplazamientos.
+- mixing: extrusor mezclador con M163/M164 y cambios de herramienta
+  frecuentes, que cortan los lotes de movimientos.
+- relative: muchos G91/G90 y G92 (E y ejes), el caso de estado modal.
+
+Misma semilla y mismo número de líneas dan siempre el mismo archivo.
+
+    python -m benchmarks.generate infill 1000000 infill.gcode
+"""
+import argparse
+import math
+import os
+import random
+
+KINDS = ("vase", "infill", "mixing", "relative")
+
+# Subir cuando cambie la salida del generador (invalida los archivos ya generados)
+GENERATOR_VERSION = 1
+
+HEADER = (
+    "; G-code sintético para benchmarks",
+    "G21",
+    "G90",
+    "M82",
+    "G28",
+    "G92 E0",
+)
+
+LAYER_HEIGHT = 0.2
+BED = 200.0
+
+
+def vase(rng):
+    """Espiral continua: cada línea sube Z una fracción de la altura de capa."""
+    steps = 180
+    e = 0.0
+    radius = 40.0
+    x0 = y0 = BED / 2
+    yield f"G1 X{x0 + radius:.3f} Y{y0:.3f} Z{LAYER_HEIGHT:.3f} F3000"
+    i = 0
+    while True:
+        i += 1
+        angle = 2.0 * math.pi * i / steps
+        r = radius + 2.0 * math.sin(i / (steps * 7.0)) + rng.uniform(-0.01, 0.01)
+        z = LAYER_HEIGHT * (1.0 + i / steps)
+        e += 0.035
+        yield f"G1 X{x0 + r * math.cos(angle):.3f} Y{y0 + r * math.sin(angle):.3f} Z{z:.3f} E{e:.5f}"
+
+
+def infill(rng):
+    """Capas con perímetro rectangular y relleno en zigzag a 0.45 mm."""
+    e = 0.0
+    layer = 0
+    spacing = 0.45
+    while True:
+        layer += 1
+        z = layer * LAYER_HEIGHT
+        size = 60.0 + rng.uniform(-5.0, 5.0)
+        x0 = y0 = (BED - size) / 2
+        yield f";LAYER:{layer}"
+        yield f"G1 E{e - 0.8:.5f} F2400"
+        yield f"G0 Z{z:.3f} F1200"
+        yield f"G0 X{x0:.3f} Y{y0:.3f} F9000"
+        yield f"G1 E{e:.5f} F2400"
+        yield "G1 F1800"
+        for x, y in ((x0 + size, y0), (x0 + size, y0 + size), (x0, y0 + size), (x0, y0)):
+            e += size * 0.033
+            yield f"G1 X{x:.3f} Y{y:.3f} E{e:.5f}"
+        yield "G0 F9000"
+        yield f"G0 X{x0 + spacing:.3f} Y{y0 + spacing:.3f}"
+        yield "G1 F3000"
+        rows = int((size - 2 * spacing) / spacing)
+        for row in range(rows):
+            y = y0 + spacing * (row + 1)
+            xb = x0 + size - spacing if row % 2 == 0 else x0 + spacing
+            e += (size - 2 * spacing) * 0.033
+            yield f"G1 X{xb:.3f} Y{y:.3f} E{e:.5f}"
+            yield f"G1 Y{y + spacing:.3f}"
+
+
+def mixing(rng):
+    """Extrusor mezclador: proporciones M163/M164 y T0/T1 cada pocas líneas."""
+    e = 0.0
+    layer = 0
+    while True:
+        layer += 1
+        yield f"G0 Z{layer * LAYER_HEIGHT:.3f} F1200"
+        for block in range(40):
+            weight = rng.random()
+            yield f"M163 S0 P{weight:.3f}"
+            yield f"M163 S1 P{1.0 - weight:.3f}"
+            yield "M164 S0"
+            yield f"T{block % 2}"
+            for _ in range(rng.randint(3, 12)):
+                e += 0.05
+                yield f"G1 X{rng.uniform(50, 150):.3f} Y{rng.uniform(50, 150):.3f} E{e:.5f} F2400"
+
+
+def relative(rng):
+    """Bloques en G91 con G92 E0 frecuentes y vuelta a G90 con G92 de ejes."""
+    layer = 0
+    while True:
+        layer += 1
+        yield "G90"
+        yield f"G92 X{rng.uniform(0, 10):.3f} Y{rng.uniform(0, 10):.3f}"
+        yield f"G1 Z{layer * LAYER_HEIGHT:.3f} F1200"
+        for _ in range(20):
+            yield "G91"
+            yield "G92 E0"
+            for _ in range(rng.randint(2, 8)):
+                yield f"G1 X{rng.uniform(-2, 2):.3f} Y{rng.uniform(-2, 2):.3f} E{rng.uniform(0.01, 0.1):.4f} F1800"
+            yield "G90"
+            yield f"G1 X{rng.uniform(40, 160):.3f} Y{rng.uniform(40, 160):.3f} F6000"
+
+
+GENERATORS = {
+    "vase": vase,
+    "infill": infill,
+    "mixing": mixing,
+    "relative": relative,
+}
+
+
+def generate(kind, lines, path, seed=0):
+    """Escribe en `path` un G-code de tipo `kind` con exactamente `lines` líneas."""
+    rng = random.Random(seed)
+    body = GENERATORS[kind](rng)
+    with open(path, "w") as f:
+        chunk = list(HEADER[:lines])
+        for _ in range(lines - len(chunk)):
+            chunk.append(next(body))
+            if len(chunk) >= 1 << 16:
+                f.write("\n".join(chunk) + "\n")
+                chunk = []
+        if chunk:
+            f.write("\n".join(chunk) + "\n")
+    return path
+
+
+def cached(kind, lines, directory, seed=0):
+    """Ruta de un archivo generado en `directory`; solo se genera si no existe."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{kind}-{lines}-s{seed}-v{GENERATOR_VERSION}.gcode")
+    if not os.path.exists(path):
+        tmp = path + ".tmp"
+        generate(kind, lines, tmp, seed)
+        os.replace(tmp, path)
+    return path
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Genera G-code sintético determinista.")
+    ap.add_argument("kind", choices=KINDS)
+    ap.add_argument("lines", type=lambda s: int(float(s)))
+    ap.add_argument("output")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    generate(args.kind, args.lines, args.output, args.seed)
+
+
+if __name__ == "__main__":
+    main()
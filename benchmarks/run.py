@@ -0,0 +1,205 @@
+"""Benchmarks del parser sobre G-code sintético (ver `benchmarks.generate`).
+
+Cada caso (tipo × número de líneas) se ejecuta en un proceso nuevo, para
+que el pico de memoria (RSS) sea solo el suyo, y mide el tiempo de cada
+etapa del núcleo: parseo, subdivisión y clasificación. Los resultados se
+imprimen en una tabla y se guardan en JSON junto con el commit, para
+compararlos entre versiones:
+
+    python -m benchmarks.run --sizes 1e4 1e5 1e6
+    python -m benchmarks.run --compare results/antes.json results/despues.json
+
+Solo usa `GcodeParser`, `subdivide_segments` y `classifySegments`, sin
+crear nada en Blender, así que basta un Python con numpy.
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+from .generate import KINDS, cached
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA_DIR = os.path.join(HERE, "data")
+DEFAULT_RESULTS_DIR = os.path.join(HERE, "results")
+DEFAULT_SIZES = (10**4, 10**5, 10**6)
+
+# Columnas de la tabla: (clave, cabecera, ancho, formato)
+COLUMNS = (
+    ("kind", "tipo", 9, ""),
+    ("lines", "líneas", 9, "d"),
+    ("segments", "segmentos", 10, "d"),
+    ("parse_s", "parseo s", 9, ".3f"),
+    ("subdivide_s", "subdiv. s", 9, ".3f"),
+    ("classify_s", "clasif. s", 9, ".3f"),
+    ("lines_per_s", "líneas/s", 10, ".0f"),
+    ("peak_rss_mb", "RSS MB", 8, ".1f"),
+)
+
+
+def peak_rss_mb():
+    # ru_maxrss está en KiB en Linux y en bytes en macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(path, subd_threshold, mapped, workers):
+    """Ejecuta las etapas sobre `path` (en el proceso actual) y devuelve sus medidas."""
+    from gcode_importer.parser import GcodeParser
+
+    baseline = peak_rss_mb()
+    out = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        then = time.perf_counter()
+        model = GcodeParser().parseFile(path, mapped=mapped, workers=workers)
+        model.store.flush()
+        out["parse_s"] = time.perf_counter() - then
+
+        then = time.perf_counter()
+        if subd_threshold:
+            model.subdivide_segments(subd_threshold)
+        out["subdivide_s"] = time.perf_counter() - then
+
+        then = time.perf_counter()
+        model.classifySegments()
+        out["classify_s"] = time.perf_counter() - then
+    out["segments"] = len(model.store)
+    out["layers"] = len(model.layer_offsets)
+    out["peak_rss_mb"] = peak_rss_mb()
+    out["baseline_rss_mb"] = baseline
+    return out
+
+
+def run_isolated(path, subd_threshold, mapped, workers):
+    # Un proceso nuevo por caso: el pico de RSS no arrastra los casos anteriores
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(1, mp_context=context) as pool:
+        return pool.submit(run_case, path, subd_threshold, mapped, workers).result()
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=HERE, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata(args):
+    import numpy as np
+    return {
+        "commit": git_commit(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "subdivide": args.subdivide,
+        "mapped": args.mapped,
+        "workers": args.workers,
+        "repeat": args.repeat,
+        "seed": args.seed,
+    }
+
+
+def print_header():
+    print(" ".join(f"{header:>{width}}" if fmt else f"{header:<{width}}" for _, header, width, fmt in COLUMNS))
+
+
+def print_row(row):
+    print(" ".join(f"{row[key]:>{width}{fmt}}" if fmt else f"{row[key]:<{width}}" for key, _, width, fmt in COLUMNS))
+
+
+def run(args):
+    results = []
+    print_header()
+    for kind in args.kinds:
+        for lines in args.sizes:
+            path = cached(kind, lines, args.data_dir, args.seed)
+            # Se queda la repetición más rápida (la menos afectada por ruido)
+            best = None
+            for _ in range(args.repeat):
+                measured = run_isolated(path, args.subdivide, args.mapped, args.workers)
+                total = measured["parse_s"] + measured["subdivide_s"] + measured["classify_s"]
+                if best is None or total < best["total_s"]:
+                    best = dict(measured, total_s=total)
+            best.update(
+                kind=kind,
+                lines=lines,
+                bytes=os.path.getsize(path),
+                lines_per_s=lines / best["total_s"] if best["total_s"] else float("inf"),
+            )
+            results.append(best)
+            print_row(best)
+    return results
+
+
+def save(results, meta, directory):
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(directory, f"{stamp}-{meta['commit'] or 'nogit'}.json")
+    with open(path, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=1)
+    return path
+
+
+def compare(before_path, after_path):
+    """Imprime, por caso común a los dos archivos, la relación de tiempos y de memoria."""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    old = {(r["kind"], r["lines"]): r for r in before["results"]}
+    print(f"{before['meta'].get('commit')} → {after['meta'].get('commit')}  (>1: más rápido / menos memoria)")
+    print(f"{'tipo':<9} {'líneas':>9} {'total':>8} {'parseo':>8} {'subdiv.':>8} {'clasif.':>8} {'RSS':>8}")
+    for row in after["results"]:
+        ref = old.get((row["kind"], row["lines"]))
+        if ref is None:
+            continue
+        ratios = [
+            ref[key] / row[key] if row[key] else float("nan")
+            for key in ("total_s", "parse_s", "subdivide_s", "classify_s", "peak_rss_mb")
+        ]
+        print(f"{row['kind']:<9} {row['lines']:>9} " + " ".join(f"{r:>7.2f}x" for r in ratios))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmarks del parser de G-code sobre archivos sintéticos.")
+    ap.add_argument("--kinds", nargs="+", choices=KINDS, default=list(KINDS))
+    ap.add_argument("--sizes", nargs="+", type=lambda s: int(float(s)), default=list(DEFAULT_SIZES),
+                    help="número de líneas de cada archivo (admite 1e7)")
+    ap.add_argument("--subdivide", type=float, default=1.0,
+                    help="tamaño máximo de segmento; 0 para no subdividir")
+    ap.add_argument("--mapped", action="store_true", help="parsear con mmap (read_mapped)")
+    ap.add_argument("--workers", type=int, default=1, help="procesos de tokenización (0: uno por núcleo)")
+    ap.add_argument("--repeat", type=int, default=1, help="repeticiones por caso; se guarda la más rápida")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="dónde se guardan los G-code generados")
+    ap.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR)
+    ap.add_argument("--no-save", action="store_true", help="no guardar el JSON de resultados")
+    ap.add_argument("--compare", nargs=2, metavar=("ANTES", "DESPUÉS"),
+                    help="comparar dos JSON de resultados en vez de ejecutar")
+    args = ap.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    meta = metadata(args)
+    results = run(args)
+    if not args.no_save:
+        print("Resultados guardados en", save(results, meta, args.results_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1552 @@
+import bpy
+from bpy.props import (
+    StringProperty,
+    BoolProperty,
+    PointerProperty,
+    FloatProperty,
+    EnumProperty,
+    IntProperty,
+)
+from bpy.types import (
+    Panel,
+    Operator,
+    PropertyGroup,
+)
+from bpy.app.handlers import persistent
+from bpy_extras.io_utils import ImportHelper
+
+from . import parser, builders
+from .cache import ParseCache
+from .report import ImportReport
+from .toolpath import EXTENSION as TOOLPATH_EXTENSION, load_toolpath
+from .bgcode import EXTENSION as BGCODE_EXTENSION, read_metadata
+from .reader import compressed_opener
+from .kinematics import MAX_VELOCITY, ACCELERATION, JERK, MachineLimits, time_keys
+from .pipeline import layer_offsets, layer_fingerprints
+from .timeline import ToolpathIndex
+from .layerindex import LayerIndex, index_path, source_meta, first_z, layers_in_z
+from .follow import FileFollower
+import functools
+import math
+import threading
+import time
+import os
+import numpy as np
+
+# Valor de 'interpolation' de un keyframe para 'LINEAR' (para foreach_set)
+LINEAR_INTERPOLATION = 1
+
+# ToolpathIndex ya construidos: nombre del objeto -> (puntero de sus datos, índice)
+_toolpath_indexes = {}
+
+# Posición en el frame actual de la última curva importada, para el panel:
+# nombre de la escena -> (frame, ToolpathPosition). La pone el handler de cambio de frame
+_frame_positions = {}
+
+# Archivos que se están siguiendo en directo: ruta -> FollowSession
+_followers = {}
+
+# Importaciones no bloqueantes en curso (ImportJob), para el panel
+_import_jobs = []
+
+# Directorios de caché en los que no se pudo escribir (se avisa una sola vez)
+_cache_write_failures = set()
+
+# Segundos entre pasos de una importación no bloqueante, y tiempo máximo que
+# cada paso dedica a crear objetos en el hilo principal
+MODAL_INTERVAL = 0.1
+BUILD_SLICE = 0.05
+
+# Editores en los que Esc es de quien escribe en ellos, no de la importación
+TYPING_AREAS = {'TEXT_EDITOR', 'CONSOLE'}
+
+def set_viewport_lod(scene, level):
+    """Muestra en la vista 3D el nivel de detalle `level` de cada importación (o
+    el más detallado que haya por debajo) y deja el completo para el render."""
+    groups = {}
+    for obj in scene.objects:
+        if "gcode_lod" in obj:
+            groups.setdefault(obj["gcode_lod_group"], []).append(obj)
+    for objects in groups.values():
+        shown = min(level, max(obj["gcode_lod"] for obj in objects))
+        for obj in objects:
+            obj.hide_viewport = obj["gcode_lod"] != shown
+            obj.hide_render = obj["gcode_lod"] != 0
+
+
+def update_viewport_lod(self, context):
+    set_viewport_lod(context.scene, int(self.viewport_lod))
+
+
+# Definición de las propiedades del add-on
+class ImportGcodeSettings(PropertyGroup):
+    split_layers: BoolProperty(
+        name="Separar Capas",
+        description="Guardar cada capa como un objeto individual en una colección",
+        default=True
+    )
+
+    subdivide: BoolProperty(
+        name="Subdividir",
+        description="Subdividir segmentos de G-code que superen el tamaño de segmento especificado",
+        default=False
+    )
+
+    max_segment_size: FloatProperty(
+        name="Longitud Máxima de Segmento",
+        description="Solo se subdividen segmentos mayores a este valor",
+        default=1.0,
+        min=0.1,
+        max=999.0
+    )
+
+    simplify: BoolProperty(
+        name="Simplificar",
+        description="Quitar puntos alineados o casi alineados (Ramer–Douglas–Peucker) sin cruzar cambios de capa, de estilo, de herramienta ni de color. Deshace en la práctica la subdivisión",
+        default=False
+    )
+
+    simplify_tolerance: FloatProperty(
+        name="Tolerancia de Simplificación",
+        description="Distancia máxima (mm) entre la trayectoria original y la simplificada",
+        default=0.01,
+        min=0.0001,
+        max=10.0,
+        precision=4
+    )
+
+    lod_levels: IntProperty(
+        name="Niveles de Detalle",
+        description="Objetos a crear con distinto detalle a partir del mismo parseo (1 = solo el completo). Cada nivel simplifica el anterior con 4 veces más tolerancia. Solo para la curva continua y la malla única",
+        default=1,
+        min=1,
+        max=4
+    )
+
+    lod_tolerance: FloatProperty(
+        name="Tolerancia del Nivel 1",
+        description="Tolerancia (mm) de simplificación del primer nivel reducido; el nivel 2 usa el cuádruple, el 3 dieciséis veces más",
+        default=0.05,
+        min=0.0001,
+        max=10.0,
+        precision=4
+    )
+
+    viewport_lod: EnumProperty(
+        name="Detalle en la Vista 3D",
+        description="Nivel de detalle que se muestra en la vista 3D; el render usa siempre el completo",
+        items=[
+            ('0', "Completo", "Todos los puntos"),
+            ('1', "Nivel 1", "Simplificado con la tolerancia del nivel 1"),
+            ('2', "Nivel 2", "Simplificado con 4 veces la tolerancia del nivel 1"),
+            ('3', "Nivel 3", "Simplificado con 16 veces la tolerancia del nivel 1"),
+        ],
+        default='1',
+        update=update_viewport_lod
+    )
+
+    arc_tolerance: FloatProperty(
+        name="Tolerancia de Arcos",
+        description="Distancia máxima (mm) entre un arco G2/G3 y las cuerdas que lo aproximan; menor = más vértices",
+        default=0.01,
+        min=0.0001,
+        max=10.0,
+        precision=4
+    )
+
+    layer_window: EnumProperty(
+        name="Importar",
+        description="Qué parte del archivo importar",
+        items=[
+            ('ALL', "Todo", "Todas las capas"),
+            ('LAYERS', "Rango de Capas", "Solo las capas entre la inicial y la final, incluidas"),
+            ('Z', "Ventana de Z", "Solo las capas que empiezan entre la Z mínima y la máxima"),
+        ],
+        default='ALL'
+    )
+
+    layer_start: IntProperty(
+        name="Capa Inicial",
+        description="Primera capa que se importa (0 es la primera del archivo)",
+        default=0,
+        min=0
+    )
+
+    layer_end: IntProperty(
+        name="Capa Final",
+        description="Última capa que se importa (se limita a la última del archivo)",
+        default=0,
+        min=0
+    )
+
+    z_min: FloatProperty(
+        name="Z Mínima",
+        description="Z más baja de las capas que se importan",
+        default=0.0
+    )
+
+    z_max: FloatProperty(
+        name="Z Máxima",
+        description="Z más alta de las capas que se importan",
+        default=10.0
+    )
+
+    use_mmap: BoolProperty(
+        name="Lectura Mapeada (mmap)",
+        description="Leer el archivo mapeado en memoria y en bytes, sin decodificar cada línea. Recomendado para archivos de varios GB",
+        default=True
+    )
+
+    parse_workers: IntProperty(
+        name="Procesos de Parseo",
+        description="Procesos para tokenizar el archivo en paralelo (0 = uno por núcleo, 1 = sin paralelismo)",
+        default=1,
+        min=0,
+        max=256
+    )
+
+    low_memory: BoolProperty(
+        name="Bajo Consumo de Memoria",
+        description="Parsear, subdividir, clasificar y crear los objetos por lotes, sin mantener todos los segmentos en memoria",
+        default=False
+    )
+
+    use_cache: BoolProperty(
+        name="Caché de Parseo",
+        description="Guardar en disco el resultado del parseo y reutilizarlo al reimportar el mismo archivo con los mismos ajustes",
+        default=True
+    )
+
+    cache_dir: StringProperty(
+        name="Directorio de Caché",
+        description="Directorio de la caché de parseo (vacío = directorio temporal del sistema)",
+        default="",
+        subtype='DIR_PATH'
+    )
+
+    cache_size_mb: IntProperty(
+        name="Tamaño de Caché (MB)",
+        description="Tamaño máximo de la caché; se eliminan primero las entradas usadas hace más tiempo",
+        default=2048,
+        min=16,
+        max=1048576
+    )
+
+    create_continuous: BoolProperty(
+        name="Crear Curva Continua",
+        description="Crear una única curva continua en lugar de objetos separados por capas",
+        default=True
+    )
+
+    curve_thin_travel: BoolProperty(
+        name="Desplazamientos sin Grosor",
+        description="Radio 0 en los puntos de la curva continua que terminan un desplazamiento, para que el bevel no los muestre",
+        default=False
+    )
+
+    layer_output: EnumProperty(
+        name="Salida de Capas",
+        description="Cómo crear las capas cuando no se crea la curva continua",
+        items=[
+            ('OBJECTS', "Un Objeto por Capa", "Una malla y un objeto por capa en la colección Layers"),
+            ('SINGLE_MESH', "Malla Única", "Una sola malla con el atributo de punto 'layer_index' para aislar capas en Geometry Nodes"),
+        ],
+        default='OBJECTS'
+    )
+
+    layer_attributes: BoolProperty(
+        name="Atributos tool/style",
+        description="Añadir a la malla única los atributos de punto 'tool' (herramienta) y 'style' (0 desplazamiento, 1 extrusión)",
+        default=False
+    )
+
+    incremental: BoolProperty(
+        name="Reimportación Incremental",
+        description="Al volver a importar el mismo archivo con un objeto por capa, reconstruir solo los objetos de las capas "
+                    "que han cambiado. El archivo se vuelve a parsear entero; lo que se ahorra es crear los objetos",
+        default=False
+    )
+
+    max_velocity: FloatProperty(
+        name="Velocidad Máxima (mm/s)",
+        description="Velocidad máxima de la máquina; limita el avance F y se usa cuando no hay F",
+        default=MAX_VELOCITY,
+        min=1.0,
+        max=2000.0
+    )
+
+    acceleration: FloatProperty(
+        name="Aceleración (mm/s²)",
+        description="Aceleración para estimar el tiempo de impresión con un perfil trapezoidal",
+        default=ACCELERATION,
+        min=1.0,
+        max=100000.0
+    )
+
+    jerk: FloatProperty(
+        name="Jerk (mm/s)",
+        description="Cambio de velocidad instantáneo permitido en las esquinas",
+        default=JERK,
+        min=0.0,
+        max=100.0
+    )
+
+    time_scale: FloatProperty(
+        name="Escala de Tiempo",
+        description="Segundos de impresión por segundo de animación al animar al ritmo real",
+        default=60.0,
+        min=0.01,
+        max=100000.0
+    )
+
+    trace_memory: BoolProperty(
+        name="Medir Memoria",
+        description="Registrar con tracemalloc el pico de memoria de cada etapa (hace la importación más lenta)",
+        default=False
+    )
+
+    profile_import: BoolProperty(
+        name="Perfilar con cProfile",
+        description="Ejecutar la importación bajo cProfile y mostrar las funciones más costosas en la consola",
+        default=False
+    )
+
+    report_path: StringProperty(
+        name="Informe JSON",
+        description="Archivo donde guardar el informe de la importación (y el perfil .prof junto a él); vacío para no guardarlo",
+        default="",
+        subtype='FILE_PATH'
+    )
+
+    follow_interval: FloatProperty(
+        name="Intervalo de seguimiento",
+        description="Segundos entre cada lectura del archivo que se sigue en directo",
+        default=1.0,
+        min=0.1,
+        max=60.0
+    )
+
+    inspect_layer: IntProperty(
+        name="Capa",
+        description="Capa cuyo tiempo estimado se muestra en el panel",
+        default=0,
+        min=0
+    )
+
+    filament_radius: FloatProperty(
+        name="Radio del Filamento",
+        description="Radio del objeto que representará el filamento",
+        default=0.1,
+        min=0.01,
+        max=10.0
+    )
+
+    filament_speed: FloatProperty(
+        name="Velocidad del Filamento",
+        description="Velocidad de animación del filamento (unidades por frame)",
+        default=1.0,
+        min=0.1,
+        max=10.0
+    )
+
+    bevel_depth: FloatProperty(
+        name="Profundidad del Bevel",
+        description="Profundidad del bevel aplicado al objeto del filamento",
+        default=0.02,
+        min=0.0,
+        max=1.0
+    )
+
+    bevel_resolution: IntProperty(
+        name="Resolución del Bevel",
+        description="Número de segmentos en el bevel",
+        default=2,
+        min=0,
+        max=10
+    )
+
+    filament_object: EnumProperty(
+        name="Objeto de Filamento",
+        description="Objeto a utilizar para representar el filamento",
+        items=[
+            ('CYLINDER', "Cilindro", "Usar un cilindro como filamento"),
+            ('SPHERE', "Esfera", "Usar una esfera como filamento"),
+            ('CUSTOM', "Personalizado", "Usar un objeto personalizado")
+        ],
+        default='CYLINDER'
+    )
+
+    custom_object: StringProperty(
+        name="Nombre del Objeto Personalizado",
+        description="Nombre del objeto personalizado a utilizar como filamento",
+        default="",
+    )
+
+    extruder_object: StringProperty(
+        name="Objeto Extrusor",
+        description="Nombre del objeto en la colección de escena que actuará como extrusor",
+        default="Extrusor",
+    )
+
+# Panel de Importación de G-code
+class OBJECT_PT_CustomPanel(Panel):
+    bl_label = "Importador de G-code"
+    bl_idname = "OBJECT_PT_custom_panel"
+    bl_space_type = "VIEW_3D"   
+    bl_region_type = "UI"
+    bl_category = "Gcode-Import"
+    bl_context = "objectmode"   
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode in {'OBJECT', 'EDIT_MESH'}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        mytool = scene.gcode_importer_settings
+
+        layout.prop(mytool, "split_layers")
+        layout.prop(mytool, "subdivide")
+
+        row = layout.row()
+        row.prop(mytool, "max_segment_size")
+        row.enabled = mytool.subdivide
+
+        layout.prop(mytool, "simplify")
+
+        row = layout.row()
+        row.prop(mytool, "simplify_tolerance")
+        row.enabled = mytool.simplify
+
+        layout.prop(mytool, "arc_tolerance")
+
+        col = layout.column()
+        col.prop(mytool, "layer_window")
+        if mytool.layer_window == 'LAYERS':
+            row = col.row(align=True)
+            row.prop(mytool, "layer_start")
+            row.prop(mytool, "layer_end")
+        elif mytool.layer_window == 'Z':
+            row = col.row(align=True)
+            row.prop(mytool, "z_min")
+            row.prop(mytool, "z_max")
+
+        layout.prop(mytool, "use_mmap")
+        layout.prop(mytool, "parse_workers")
+        layout.prop(mytool, "low_memory")
+        layout.prop(mytool, "use_cache")
+
+        col = layout.column()
+        col.prop(mytool, "cache_dir")
+        col.prop(mytool, "cache_size_mb")
+        col.enabled = mytool.use_cache
+
+        col = layout.column()
+        col.prop(mytool, "trace_memory")
+        col.prop(mytool, "profile_import")
+        col.prop(mytool, "report_path")
+
+        layout.prop(mytool, "create_continuous")
+
+        row = layout.row()
+        row.prop(mytool, "curve_thin_travel")
+        row.enabled = mytool.create_continuous
+
+        col = layout.column()
+        col.prop(mytool, "layer_output")
+        sub = col.row()
+        sub.prop(mytool, "layer_attributes")
+        sub.enabled = mytool.layer_output == 'SINGLE_MESH'
+        sub = col.row()
+        sub.prop(mytool, "incremental")
+        sub.enabled = mytool.layer_output == 'OBJECTS'
+        col.enabled = not mytool.create_continuous
+
+        col = layout.column()
+        col.prop(mytool, "lod_levels")
+        sub = col.row()
+        sub.prop(mytool, "lod_tolerance")
+        sub.enabled = mytool.lod_levels > 1
+        col.prop(mytool, "viewport_lod")
+        col.enabled = mytool.create_continuous or mytool.layer_output == 'SINGLE_MESH'
+
+        col = layout.column()
+        col.prop(mytool, "max_velocity")
+        col.prop(mytool, "acceleration")
+        col.prop(mytool, "jerk")
+        col.prop(mytool, "time_scale")
+
+        if "gcode_print_time" in scene:
+            box = layout.box()
+            box.label(text=f"Tiempo estimado: {format_duration(scene['gcode_print_time'])}")
+            layer_times = scene["gcode_layer_times"]
+            if len(layer_times):
+                box.label(text=f"{len(layer_times)} capas, media {format_duration(sum(layer_times) / len(layer_times))}, "
+                               f"máx. {format_duration(max(layer_times))}")
+                box.prop(mytool, "inspect_layer")
+                k = min(mytool.inspect_layer, len(layer_times) - 1)
+                box.label(text=f"Capa {k}: {format_duration(layer_times[k])}")
+
+        # Solo se lee lo que dejó el handler: construir el índice aquí bloquearía el dibujo
+        frame, position = _frame_positions.get(scene.name, (None, None))
+        if frame == scene.frame_current:
+            layout.label(text=f"Frame {frame}: línea {position.lineNb}, capa {position.layer}")
+
+        layout.prop(mytool, "filament_object")
+
+        if mytool.filament_object == 'CUSTOM':
+            layout.prop(mytool, "custom_object")
+
+        layout.prop(mytool, "filament_radius")
+        layout.prop(mytool, "filament_speed")
+        layout.prop(mytool, "bevel_depth")
+        layout.prop(mytool, "bevel_resolution")
+
+        layout.separator()
+
+        layout.prop(mytool, "extruder_object")
+
+        layout.separator()
+
+        layout.operator("wm.gcode_import", text="Importar G-code")
+        for job in _import_jobs:
+            row = layout.row()
+            row.progress(factor=job.fraction, type='BAR', text=job.status())
+            row.operator("wm.gcode_import_cancel", text="", icon='CANCEL')
+        layout.operator("wm.generate_geometry_nodes", text="Generar Geometry Nodes")
+        layout.operator("wm.animate_filament", text="Animar Filamento")
+
+        layout.separator()
+
+        layout.prop(mytool, "follow_interval")
+        row = layout.row()
+        row.operator("wm.gcode_follow", text="Seguir G-code")
+        sub = row.row()
+        sub.operator("wm.gcode_follow_stop", text="Dejar de seguir")
+        sub.enabled = bool(_followers)
+        for session in _followers.values():
+            layout.label(text=f"{os.path.basename(session.follower.path)}: {session.follower.lineNb} líneas")
+
+# Operador de Importación de G-code
+class WM_OT_gcode_import(Operator, ImportHelper):
+    """Importar G-code y crear animaciones de filamento"""
+    bl_idname = "wm.gcode_import"
+    bl_label = "Importar G-code"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    # ImportHelper mixin class uses this
+    filename_ext = ".gcode;*.gcode.gz;*.gcode.xz;*.gcode.bz2;*.bgcode;*.txt;*.gctp"
+    
+    filter_glob: StringProperty(
+        default="*.gcode;*.gcode.gz;*.gcode.xz;*.gcode.bz2;*.bgcode;*.txt;*.gctp",
+        options={'HIDDEN'},
+        maxlen=255,
+    )
+
+    modal_import: BoolProperty(
+        name="Sin Bloquear",
+        description="Importar en segundo plano con barra de progreso; Esc o el botón del panel "
+                    "cancelan. Sin ventana, con el perfil o en el modo de bajo consumo de memoria "
+                    "se importa de una vez",
+        default=True,
+        options={'SKIP_SAVE'},
+    )
+
+    def execute(self, context):
+        mytool = context.scene.gcode_importer_settings
+        report = new_report(mytool, self.filepath)
+        blocking = bpy.app.background or context.window is None or mytool.low_memory or mytool.profile_import
+        if blocking or not self.modal_import:
+            result = import_gcode(context, self.filepath, report)
+            for line in report.lines():
+                self.report({'INFO'}, line)
+            return result
+
+        # El parseo va en un hilo; los objetos, a trozos desde el timer
+        self._job = ImportJob(context, self.filepath, report)
+        self._cancel = threading.Event()
+        self._error = None
+        self._steps = None
+        self._worker = threading.Thread(target=self.compute, daemon=True)
+        self._worker.start()
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(MODAL_INTERVAL, window=context.window)
+        wm.progress_begin(0, 100)
+        _import_jobs.append(self._job)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def compute(self):
+        # Hilo de trabajo: la fase sin bpy, que se para entre bloques al cancelar
+        steps = self._job.iter_compute()
+        try:
+            for _ in steps:
+                if self._cancel.is_set():
+                    break
+        except Exception as exc:
+            self._error = exc
+        finally:
+            steps.close()
+
+    def modal(self, context, event):
+        job = self._job
+        if job.cancel_requested or self.escape_pressed(context, event):
+            # El hilo no toca bpy ni guarda en la caché tras cancelar: basta con
+            # soltarlo y borrar los objetos que ya se hayan creado
+            self._cancel.set()
+            job.discard()
+            self.end(context)
+            self.report({'WARNING'}, "Importación cancelada")
+            return {'CANCELLED'}
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        if self._worker.is_alive():
+            self.show_progress(context)
+            return {'PASS_THROUGH'}
+        if self._error is not None:
+            self.end(context)
+            self.report({'ERROR'}, f"Error al importar {self.filepath}: {self._error}")
+            return {'CANCELLED'}
+
+        if self._steps is None:
+            self._steps = job.iter_build(context)
+        deadline = time.perf_counter() + BUILD_SLICE
+        try:
+            for _ in self._steps:
+                if time.perf_counter() >= deadline:
+                    self.show_progress(context)
+                    return {'PASS_THROUGH'}
+        except Exception as exc:
+            job.discard()
+            self.end(context)
+            self.report({'ERROR'}, f"Error al importar {self.filepath}: {exc}")
+            return {'CANCELLED'}
+
+        self.end(context)
+        job.finish()
+        for line in job.report.lines():
+            self.report({'INFO'}, line)
+        return {'FINISHED'}
+
+    def escape_pressed(self, context, event):
+        """Si el evento es un Esc para cancelar la importación.
+
+        Este operador deja pasar todo lo demás, así que un Esc que es de otro
+        no cancela: con modificadores, sobre un editor de texto o con otro
+        operador modal en marcha (un transformar, otra herramienta), que se
+        cancela con ese mismo Esc. Para esos casos está el botón del panel.
+        """
+        if event.type != 'ESC' or event.value != 'PRESS' or event.is_repeat:
+            return False
+        if event.shift or event.ctrl or event.alt or event.oskey:
+            return False
+        window = context.window
+        for area in window.screen.areas:
+            if (area.x <= event.mouse_x < area.x + area.width
+                    and area.y <= event.mouse_y < area.y + area.height):
+                if area.type in TYPING_AREAS:
+                    return False
+                break
+        imports = {self.bl_idname, WM_OT_gcode_import.__name__}
+        return all(op.bl_idname in imports for op in window.modal_operators)
+
+    def show_progress(self, context):
+        job = self._job
+        context.window_manager.progress_update(int(job.fraction * 100))
+        context.workspace.status_text_set(f"{job.status()}. Esc para cancelar")
+        for area in context.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+    def end(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+        _import_jobs.remove(self._job)
+        for area in context.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+class WM_OT_gcode_import_cancel(Operator):
+    """Cancelar las importaciones no bloqueantes en curso"""
+    bl_idname = "wm.gcode_import_cancel"
+    bl_label = "Cancelar importación de G-code"
+
+    def execute(self, context):
+        # Cada importación lo ve en su siguiente paso del timer
+        for job in _import_jobs:
+            job.cancel_requested = True
+        return {'FINISHED'}
+
+# Operadores para seguir un G-code que se está escribiendo
+class WM_OT_gcode_follow(Operator, ImportHelper):
+    """Importar un G-code y seguir añadiendo lo que se escriba en él"""
+    bl_idname = "wm.gcode_follow"
+    bl_label = "Seguir G-code"
+
+    filename_ext = ".gcode;*.txt"
+
+    filter_glob: StringProperty(
+        default="*.gcode;*.txt",
+        options={'HIDDEN'},
+        maxlen=255,
+    )
+
+    def execute(self, context):
+        path = os.path.abspath(self.filepath)
+        if path in _followers:
+            self.report({'WARNING'}, f"Ya se está siguiendo {path}")
+            return {'CANCELLED'}
+        session = FollowSession(path, context.scene.gcode_importer_settings)
+        _followers[path] = session
+        follow_timer(path)
+        bpy.app.timers.register(session.timer, first_interval=session.interval)
+        self.report({'INFO'}, f"Siguiendo {path}: {session.points} puntos")
+        return {'FINISHED'}
+
+class WM_OT_gcode_follow_stop(Operator):
+    """Dejar de seguir los G-code que se están importando en directo"""
+    bl_idname = "wm.gcode_follow_stop"
+    bl_label = "Dejar de seguir G-code"
+
+    def execute(self, context):
+        stop_following()
+        return {'FINISHED'}
+
+# Operador para Generar Geometry Nodes
+class WM_OT_generate_geometry_nodes(Operator):
+    """Generar Geometry Nodes para convertir curva a malla y configurar animación"""
+    bl_idname = "wm.generate_geometry_nodes"
+    bl_label = "Generar Geometry Nodes"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        settings = context.scene.gcode_importer_settings
+        extruder_name = settings.extruder_object
+
+        # Obtener el objeto extrusor
+        if extruder_name in bpy.data.objects:
+            extruder = bpy.data.objects[extruder_name]
+        else:
+            self.report({'ERROR'}, f"Objeto extrusor '{extruder_name}' no encontrado.")
+            return {'CANCELLED'}
+
+        # Obtener la curva creada
+        curve_objs = [
+            obj for obj in bpy.context.scene.objects
+            if obj.type == 'CURVE' and obj.name.startswith("GCode") and obj.get("gcode_lod", 0) == 0
+        ]
+        if not curve_objs:
+            self.report({'ERROR'}, "No se encontró ninguna curva. Importa un archivo G-code primero.")
+            return {'CANCELLED'}
+        curve_obj = curve_objs[-1]  # Seleccionar la última curva importada
+
+        # Obtener el objeto del filamento
+        filament = bpy.data.objects.get("Filamento")
+        if not filament:
+            self.report({'ERROR'}, "Objeto 'Filamento' no encontrado. Genera Geometry Nodes primero.")
+            return {'CANCELLED'}
+
+        # Añadir el modificador de Geometry Nodes
+        if "GeometryNodes" in filament.modifiers:
+            filament.modifiers.remove(filament.modifiers["GeometryNodes"])
+
+        gn_modifier = filament.modifiers.new(name="GeometryNodes", type='NODES')
+        node_group = bpy.data.node_groups.new(type="GeometryNodeTree", name="FilamentGeometry")
+        gn_modifier.node_group = node_group
+
+        nodes = node_group.nodes
+        links = node_group.links
+
+        # Limpiar nodos por defecto
+        for node in nodes:
+            nodes.remove(node)
+
+        # Crear nodos de entrada y salida
+        group_input = nodes.new(type='NodeGroupInput')
+        group_input.location = (-800, 0)
+        node_group.inputs.new('NodeSocketGeometry', "Geometry")
+
+        group_output = nodes.new(type='NodeGroupOutput')
+        group_output.location = (800, 0)
+        node_group.outputs.new('NodeSocketGeometry', "Geometry")
+
+        # Geometry Nodes:
+
+        # 1. Object Info Node for the curve
+        object_info = nodes.new(type='GeometryNodeObjectInfo')
+        object_info.location = (-600, 200)
+        object_info.inputs['Object'].default_value = curve_obj
+
+        # 2. Resample Curve Node
+        resample_curve = nodes.new(type='GeometryNodeResampleCurve')
+        resample_curve.location = (-600, 100)
+        resample_curve.inputs['Count'].default_value = 1000
+
+        # 3. Trim Curve Node
+        trim_curve = nodes.new(type='GeometryNodeTrimCurve')
+        trim_curve.location = (-400, 200)
+
+        # 4. Value Node for animation factor
+        value_node = nodes.new(type='ShaderNodeValue')  # ShaderNodeValue es genérico para valores
+        value_node.location = (-800, 200)
+        # Insertar keyframes para animación (al ritmo de impresión si la curva lo tiene)
+        insert_time_keys(value_node.outputs['Value'], "default_value", curve_obj, context.scene, settings.time_scale)
+
+        # 5. Fillet Curve Node
+        fillet_curve = nodes.new(type='GeometryNodeFilletCurve')
+        fillet_curve.location = (-200, 200)
+        fillet_curve.inputs['Mode'].default_value = 'POLY'
+        fillet_curve.inputs['Radius'].default_value = 0.1
+        fillet_curve.inputs['Count'].default_value = 5
+
+        # 6. Curve to Mesh Node
+        curve_to_mesh = nodes.new(type='GeometryNodeCurveToMesh')
+        curve_to_mesh.location = (0, 200)
+
+        # 7. Curve Circle Node (for profile)
+        curve_circle = nodes.new(type='GeometryNodeCurvePrimitiveCircle')
+        curve_circle.location = (-600, 0)
+        curve_circle.inputs['Radius'].default_value = 0.05
+        curve_circle.inputs['Resolution'].default_value = 12
+
+        # 8. Set Material Node
+        set_material = nodes.new(type='GeometryNodeSetMaterial')
+        set_material.location = (200, 200)
+        # Crear o obtener el material "Plástico"
+        plastic_mat = bpy.data.materials.get("Plástico")
+        if not plastic_mat:
+            plastic_mat = bpy.data.materials.new(name="Plástico")
+            plastic_mat.diffuse_color = (0.8, 0.1, 0.1, 1)  # Rojo plástico por defecto
+        set_material.inputs['Material'].default_value = plastic_mat
+
+        # 9. Instance on Points Node
+        instance_on_points = nodes.new(type='GeometryNodeInstanceOnPoints')
+        instance_on_points.location = (400, 100)
+
+        # 10. Object Info Node for the nozzle (boquilla)
+        object_info_nozzle = nodes.new(type='GeometryNodeObjectInfo')
+        object_info_nozzle.location = (600, 100)
+        nozzle_obj = bpy.data.objects.get("Boquilla")
+        if not nozzle_obj:
+            self.report({'ERROR'}, "Objeto 'Boquilla' no encontrado. Crea y nombra un objeto como 'Boquilla'.")
+            return {'CANCELLED'}
+        object_info_nozzle.inputs['Object'].default_value = nozzle_obj
+
+        # 11. Translate Instances Node
+        translate_instances = nodes.new(type='GeometryNodeTranslateInstances')
+        translate_instances.location = (800, 100)
+        translate_instances.inputs['Translation'].default_value = (0, 0, 0.1)  # Ajusta según sea necesario
+
+        # 12. Join Geometry Node
+        join_geometry = nodes.new(type='GeometryNodeJoinGeometry')
+        join_geometry.location = (600, 200)
+
+        # Conectar nodos
+        links.new(object_info.outputs['Geometry'], resample_curve.inputs['Curve'])
+        links.new(resample_curve.outputs['Curve'], trim_curve.inputs['Curve'])
+        links.new(value_node.outputs['Value'], trim_curve.inputs['End'])
+        links.new(trim_curve.outputs['Curve'], fillet_curve.inputs['Curve'])
+        links.new(fillet_curve.outputs['Curve'], curve_to_mesh.inputs['Curve'])
+        links.new(curve_circle.outputs['Curve'], curve_to_mesh.inputs['Profile Curve'])
+        links.new(curve_to_mesh.outputs['Mesh'], set_material.inputs['Geometry'])
+        links.new(set_material.outputs['Geometry'], join_geometry.inputs['Geometry'])
+
+        # Instance on Points
+        links.new(trim_curve.outputs['Curve'], instance_on_points.inputs['Points'])
+        links.new(object_info_nozzle.outputs['Geometry'], instance_on_points.inputs['Instance'])
+        links.new(instance_on_points.outputs['Instances'], translate_instances.inputs['Instances'])
+        links.new(translate_instances.outputs['Instances'], join_geometry.inputs['Geometry'])
+
+        # Conectar Join Geometry al Output
+        links.new(join_geometry.outputs['Geometry'], group_output.inputs['Geometry'])
+
+        self.report({'INFO'}, "Geometry Nodes generados correctamente.")
+        return {'FINISHED'}
+
+# Operador para Animar el Filamento
+class WM_OT_animate_filament(Operator):
+    """Animar el filamento siguiendo la curva del G-code"""
+    bl_idname = "wm.animate_filament"
+    bl_label = "Animar Filamento"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        settings = context.scene.gcode_importer_settings
+
+        # Obtener la curva creada
+        curve_objs = [
+            obj for obj in bpy.context.scene.objects
+            if obj.type == 'CURVE' and obj.name.startswith("GCode") and obj.get("gcode_lod", 0) == 0
+        ]
+        if not curve_objs:
+            self.report({'ERROR'}, "No se encontró ninguna curva. Importa un archivo G-code primero.")
+            return {'CANCELLED'}
+        curve_obj = curve_objs[-1]  # Seleccionar la última curva importada
+
+        # Obtener el objeto del filamento
+        filament = bpy.data.objects.get("Filamento")
+        if not filament:
+            self.report({'ERROR'}, "Objeto 'Filamento' no encontrado. Genera Geometry Nodes primero.")
+            return {'CANCELLED'}
+
+        # Añadir el constraint Follow Path
+        follow_path = filament.constraints.new(type='FOLLOW_PATH')
+        follow_path.target = curve_obj
+        follow_path.use_curve_follow = True
+
+        # Animar el factor de evaluación del constraint
+        bpy.context.scene.frame_start = 1
+        last_frame = insert_time_keys(follow_path, "offset_factor", curve_obj, context.scene, settings.time_scale)
+
+        # Configurar la línea de tiempo
+        bpy.context.scene.frame_end = last_frame
+
+        self.report({'INFO'}, "Animación del filamento configurada correctamente.")
+        return {'FINISHED'}
+
+# Función para importar G-code y crear la animación
+def import_gcode(context, filepath, report=None):
+    job = ImportJob(context, filepath, report)
+    for _ in job.iter_compute():
+        pass
+    for _ in job.iter_build(context):
+        pass
+    job.finish()
+    return {'FINISHED'}
+
+class ImportJob:
+    """Una importación en dos fases, para poder repartirla en el tiempo.
+
+    `iter_compute` hace todo lo que no toca bpy (lectura, parseo, subdivisión,
+    clasificación, caché, tiempo estimado y simplificación), así que puede
+    ir en un hilo; `iter_build` crea los datablocks en el hilo principal. Las
+    dos generan un paso tras cada bloque leído u objeto creado, y el avance
+    queda en `phase`, `done` y `total`. `import_gcode` las recorre de una
+    vez; `WM_OT_gcode_import` las reparte entre un hilo y un timer.
+    """
+
+    def __init__(self, context, filepath, report=None):
+        mytool = context.scene.gcode_importer_settings
+        self.filepath = filepath
+        self.mytool = mytool
+        self.report = new_report(mytool, filepath) if report is None else report
+        # Ajustes que usa `iter_compute`, leídos aquí: desde otro hilo no se toca bpy
+        self.subd_threshold = mytool.max_segment_size if mytool.subdivide else None
+        self.simplify_tolerance = mytool.simplify_tolerance if mytool.simplify else None
+        self.arc_tolerance = mytool.arc_tolerance
+        self.use_mmap = mytool.use_mmap
+        self.parse_workers = mytool.parse_workers
+        self.low_memory = mytool.low_memory
+        self.cache_dir = bpy.path.abspath(mytool.cache_dir) if mytool.use_cache else None
+        self.window = None
+        if mytool.layer_window != 'ALL':
+            self.window = (mytool.layer_window, mytool.layer_start, mytool.layer_end, mytool.z_min, mytool.z_max)
+        # En G-code de texto solo se parsea la ventana, con el índice de capas;
+        # en lo demás se carga todo y se recorta
+        lower = filepath.lower()
+        self.seek_window = self.window is not None and not (
+            lower.endswith((TOOLPATH_EXTENSION, BGCODE_EXTENSION)) or compressed_opener(filepath) is not None
+        )
+        if self.seek_window:
+            self.cache_dir = None
+        self.cache_size = mytool.cache_size_mb << 20
+        self.limits = MachineLimits(mytool.max_velocity, mytool.acceleration, mytool.jerk)
+        self.parse = parser.GcodeParser()
+        self.parse.model.arc_tolerance = self.arc_tolerance
+        self.model = None
+        self.store = None
+        self.created = []   # nombres de los objetos creados, para deshacerlos al cancelar
+        self.layer_update = None  # cambios pendientes de una reimportación incremental
+        self.cancel_requested = False  # desde el botón del panel
+        self.phase = "parse"
+        self.done = 0
+        self.total = 0
+        self.phase_started = time.perf_counter()
+
+    @property
+    def fraction(self):
+        return min(self.done / self.total, 1.0) if self.total else 0.0
+
+    def status(self):
+        """Avance de la fase en curso, con el tiempo que falta estimado a
+        partir de lo que se lleva hecho."""
+        if self.phase == "parse":
+            text = f"Parseando G-code: {self.fraction:.0%}, {self.parse.lineNb} líneas"
+        elif self.total:
+            text = f"Creando objetos: {self.done} de {self.total} capas"
+        else:
+            text = "Creando objetos"
+        if 0 < self.done < self.total:
+            elapsed = time.perf_counter() - self.phase_started
+            text += f", quedan {format_duration(elapsed * (self.total - self.done) / self.done)}"
+        return text
+
+    @property
+    def streamed(self):
+        """Modo de bajo consumo: parseo y objetos van juntos en `iter_build`."""
+        return self.store is None and self.low_memory and not self.seek_window
+
+    def iter_compute(self):
+        print("Ejecutando importación de G-code...")
+        report = self.report
+        filepath = self.filepath
+        report.start()
+        parse = self.parse
+        parse.model.instrument(report)
+
+        cache = None
+        store = None
+        if filepath.lower().endswith(TOOLPATH_EXTENSION):
+            # Ya parseado con `python -m gcode_importer`: solo se mapean los arrays
+            with report.stage("toolpath_load", unit="segmentos") as stage:
+                store, meta = load_toolpath(filepath)
+                stage.count = len(store)
+            print(f"Trayectoria convertida desde {meta.get('source')}.")
+        elif self.cache_dir is not None:
+            with report.stage("cache_load", unit="segmentos") as stage:
+                cache = ParseCache(self.cache_dir or None, self.cache_size)
+                cache_key = cache.key(filepath, self.subd_threshold, self.arc_tolerance)
+                store = cache.load(cache_key)
+                stage.count = 0 if store is None else len(store)
+        self.store = store
+
+        if store is not None:
+            if cache is not None:
+                print("Usando la caché de parseo.")
+            model = parse.model
+            model.load_store(store)
+        elif self.seek_window:
+            model = yield from self.iter_parse_window()
+        elif self.low_memory:
+            return
+        else:
+            self.total = os.path.getsize(filepath)
+            with report.stage("parse", unit="líneas") as stage:
+                # En paralelo el avance llega por trozos, a medida que se reconstruyen
+                model = parse.model
+                for _ in model.iter_parse(filepath, mapped=self.use_mmap, workers=self.parse_workers):
+                    self.done = model.tokenizer.read_bytes
+                    yield
+                model.store.flush()
+            stage.count = parse.lineNb
+            read = model.tokenizer.read_seconds
+            dispatch = report.accumulated("dispatch")
+            stage.add("read", read)
+            stage.add("tokenize", max(stage.seconds - read - dispatch, 0.0))
+            stage.add("dispatch", dispatch, len(model.store), "segmentos")
+            yield
+
+            if self.subd_threshold is not None:
+                with report.stage("subdivide", unit="segmentos") as stage:
+                    model.subdivide_segments(self.subd_threshold)
+                stage.count = len(model.store)
+                yield
+            with report.stage("classify", unit="capas") as stage:
+                model.classifySegments()
+            stage.count = len(model.layer_offsets)
+            yield
+
+            if cache is not None:
+                with report.stage("cache_save"):
+                    try:
+                        cache.save(cache_key, model.store, source=filepath)
+                    except OSError as exc:
+                        # La caché es opcional: el parseo ya está hecho y sirve igual
+                        if cache.directory not in _cache_write_failures:
+                            _cache_write_failures.add(cache.directory)
+                            print(f"[WARN] No se pudo guardar en la caché de parseo {cache.directory}: {exc}")
+                yield
+
+        if self.window is not None and not self.seek_window:
+            first, last = self.window_layers(len(model.layer_offsets), first_z(model.store["Z"], model.layer_offsets))
+            model.keep_layers(first, last)
+            print(f"Capas {first}-{last}.")
+
+        # Antes de simplificar, para estimar sobre la trayectoria completa
+        with report.stage("print_time"):
+            model.estimate_print_time(self.limits)
+        print(f"Tiempo de impresión estimado: {format_duration(model.print_time)}.")
+        yield
+
+        if self.simplify_tolerance is not None:
+            # Después de la caché: se guarda el resultado sin simplificar
+            with report.stage("simplify", unit="segmentos") as stage:
+                model.simplify_segments(self.simplify_tolerance)
+            stage.count = len(model.store)
+        self.model = model
+
+    def iter_parse_window(self):
+        """Parsea solo la ventana de capas pedida con el índice de capas del
+        archivo (ver `layerindex`). La primera vez el índice se crea con un
+        parseo completo y se guarda junto al archivo. Devuelve el modelo.
+        """
+        report = self.report
+        filepath = self.filepath
+        meta = source_meta(filepath, self.arc_tolerance)
+        path = index_path(filepath)
+        with report.stage("layer_index", unit="capas") as stage:
+            index = LayerIndex.load(path, meta)
+            if index is None:
+                print("Creando el índice de capas (solo la primera vez)...")
+                index = self.parse.model.index_layers(filepath, meta)
+                try:
+                    index.save(path)
+                except OSError as exc:
+                    print(f"[WARN] No se pudo guardar el índice de capas en {path}: {exc}")
+            stage.count = index.layer_count
+        yield
+
+        first, last = self.window_layers(index.layer_count, index.layer_z)
+        self.parse = parser.GcodeParser()
+        model = self.parse.model
+        model.arc_tolerance = self.arc_tolerance
+        model.instrument(report)
+        with report.stage("parse", unit="segmentos") as stage:
+            model.parse_layers(filepath, index, first, last)
+            stage.count = len(model.store)
+        print(f"Capas {first}-{last} de {index.layer_count}.")
+        yield
+
+        if self.subd_threshold is not None:
+            # Las filas nuevas se quedan con la capa de la suya: no se reclasifica
+            with report.stage("subdivide", unit="segmentos") as stage:
+                model.subdivide_segments(self.subd_threshold)
+                model.build_layers()
+            stage.count = len(model.store)
+            yield
+        return model
+
+    def window_layers(self, count, layer_z):
+        """(primera, última) capa de la ventana pedida, entre las `count` del
+        archivo con la Z inicial `layer_z`."""
+        mode, start, end, z_min, z_max = self.window
+        if mode == 'Z':
+            window = layers_in_z(layer_z, z_min, z_max)
+            if window is None:
+                raise ValueError(f"Ninguna capa empieza entre Z {z_min} y Z {z_max}")
+            return window
+        if not count:
+            raise ValueError(f"{self.filepath} no tiene capas")
+        start, end = min(start, count - 1), min(end, count - 1)
+        return min(start, end), max(start, end)
+
+    def iter_build(self, context):
+        scene = context.scene
+        mytool = self.mytool
+        report = self.report
+        filepath = self.filepath
+        parse = self.parse
+        self.phase = "build"
+        self.done = 0
+        self.total = 0
+        self.phase_started = time.perf_counter()
+
+        if self.streamed:
+            # Lotes de tamaño fijo de principio a fin: parseo → subdivisión → clasificación → objetos
+            with report.stage("stream", unit="líneas") as stage:
+                batches = parse.model.iter_pipeline(
+                    filepath, self.subd_threshold, mapped=self.use_mmap, simplify_tolerance=self.simplify_tolerance
+                )
+                if mytool.create_continuous:
+                    builders.create_continuous_curve_streamed(batches, mytool)
+                elif mytool.layer_output == 'SINGLE_MESH':
+                    builders.create_layered_mesh_streamed(batches, mytool.layer_attributes)
+                else:
+                    builders.create_split_layers_streamed(batches)
+            stage.count = parse.lineNb
+            stage.add("read", parse.model.tokenizer.read_seconds)
+            stage.add("dispatch", report.accumulated("dispatch"))
+            model = parse.model
+            print("El tiempo de impresión no se estima en el modo de bajo consumo de memoria.")
+            if mytool.lod_levels > 1:
+                print("Los niveles de detalle no se crean en el modo de bajo consumo de memoria.")
+            if not mytool.create_continuous and mytool.layer_output == 'OBJECTS' and mytool.incremental:
+                print("La reimportación incremental no se usa en el modo de bajo consumo de memoria.")
+            if self.window is not None:
+                print("El rango de capas no se aplica en el modo de bajo consumo de memoria.")
+        else:
+            model = self.model
+            scene["gcode_print_time"] = model.print_time
+            scene["gcode_layer_times"] = model.layer_times.tolist()
+
+            output = None
+            with report.stage("datablocks", len(model.store), "puntos"):
+                if mytool.create_continuous:
+                    output = builders.create_continuous_curve(model.store, mytool)
+                elif mytool.layer_output == 'SINGLE_MESH':
+                    output = builders.create_layered_mesh(model.store, mytool.layer_attributes)
+                elif mytool.incremental:
+                    fingerprints = layer_fingerprints(model.store, model.layer_offsets)
+                    self.total = len(fingerprints)
+                    rebuilt = 0
+                    self.layer_update = builders.LayerUpdate()
+                    layers = builders.iter_update_split_layers(
+                        model.store, model.layer_offsets, fingerprints, os.path.abspath(filepath), self.layer_update
+                    )
+                    for obj, changed in layers:
+                        self.track(obj)
+                        rebuilt += changed
+                        self.done += 1
+                        yield
+                    # De una vez y sin ceder el paso: cancelar no puede dejarlo a medias
+                    self.layer_update.apply()
+                    self.layer_update = None
+                    print(f"Capas reconstruidas: {rebuilt} de {len(fingerprints)}.")
+                else:
+                    self.total = len(model.layer_offsets)
+                    for obj in builders.iter_split_layers(model.store, model.layer_offsets):
+                        self.track(obj)
+                        self.done += 1
+                        yield
+                if output is not None:
+                    self.track(output)
+                    store_timeline(output, model.store)
+                    # El índice se construye ya, no en el primer cambio de frame
+                    toolpath_index(output)
+                    update_frame_position(scene)
+
+            if output is not None and mytool.lod_levels > 1:
+                with report.stage("lod", unit="objetos") as stage:
+                    lods = create_lods(model, mytool, output)[1:]
+                    for lod in lods:
+                        self.track(lod)
+                    stage.count = len(lods)
+                    set_viewport_lod(scene, int(mytool.viewport_lod))
+            yield
+
+        if filepath.lower().endswith(BGCODE_EXTENSION):
+            # Desde la caché no se decodifica nada: los metadatos se leen aparte
+            metadata = model.metadata or read_metadata(filepath)
+            scene["gcode_metadata"] = metadata
+            printer = metadata.get("printer", {})
+            if printer:
+                print("Impresora:", ", ".join(f"{key}={value}" for key, value in printer.items()))
+
+        if model.simplify_state is not None:
+            state = model.simplify_state
+            print(f"Simplificación: {state.before} → {state.after} puntos ({state.ratio:.1f}x menos).")
+
+        if mytool.create_continuous:
+            # Crear el objeto del filamento
+            with report.stage("filament"):
+                self.track(builders.create_filament_object(mytool))
+
+            # Opcional: Configurar Geometry Nodes aquí si deseas integrarlo en la importación
+            # builders.setup_geometry_nodes(filament, curve_obj, mytool)
+
+    def track(self, obj):
+        if obj is not None:
+            self.created.append(obj.name)
+
+    def discard(self):
+        """Borra los objetos creados hasta ahora (al cancelar). En una
+        reimportación incremental las mallas nuevas aún no están puestas en
+        sus objetos, así que estos quedan como antes de importar."""
+        if self.layer_update is not None:
+            self.layer_update.revert()
+            self.layer_update = None
+        for name in self.created:
+            obj = bpy.data.objects.get(name)
+            if obj is not None:
+                builders.remove_object(obj)
+        self.created = []
+
+    def finish(self):
+        report = self.report
+        report.finish()
+        for line in report.lines():
+            print(line)
+        if report.profile_text:
+            print(report.profile_text)
+        if self.mytool.report_path:
+            path = bpy.path.abspath(self.mytool.report_path)
+            report.save(path)
+            report.dump_profile(os.path.splitext(path)[0] + ".prof")
+            print("Informe guardado en", path)
+
+def new_report(mytool, filepath):
+    """`ImportReport` con las opciones de medida de los ajustes."""
+    return ImportReport(filepath, trace_memory=mytool.trace_memory, profile=mytool.profile_import)
+
+def create_lods(model, mytool, output):
+    """Crea los niveles de detalle reducidos de `output` (curva o malla única) y
+    los marca con las propiedades 'gcode_lod' y 'gcode_lod_group'."""
+    lods = [output]
+    for level, (store, state) in enumerate(model.iter_lod_stores(mytool.lod_levels, mytool.lod_tolerance), 1):
+        print(f"Nivel de detalle {level}: {state.before} → {state.after} puntos.")
+        if mytool.create_continuous:
+            lod = builders.create_continuous_curve(store, mytool)
+        else:
+            lod = builders.create_layered_mesh(store, mytool.layer_attributes)
+        store_timeline(lod, store)
+        lod.name = lod.data.name = f"{output.name}_LOD{level}"
+        lods.append(lod)
+    for level, obj in enumerate(lods):
+        obj["gcode_lod"] = level
+        obj["gcode_lod_group"] = output.name
+    return lods
+
+def store_timeline(obj, store):
+    """Guarda en `obj` (curva o malla única) lo necesario para animarlo al
+    ritmo real y para consultar su `ToolpathIndex` sin el G-code.
+
+    Los tiempos y fracciones de recorrido del final de cada capa (ver
+    `kinematics.time_keys`) van como listas; las columnas del índice, como
+    arrays de propiedades a partir del buffer numpy, sin pasar por listas.
+    XYZ no se guarda: se lee de los puntos del propio objeto.
+    """
+    offsets = layer_offsets(store["layer"])
+    obj["gcode_index_lineNb"] = store["lineNb"].astype(np.int32)
+    obj["gcode_index_layer_starts"] = offsets[:, 0].astype(np.int32)
+    time = store["time"]
+    if not len(time) or np.isnan(time).any():
+        return
+    times, factors = time_keys(store, offsets)
+    obj["gcode_key_times"] = times.tolist()
+    obj["gcode_key_factors"] = factors.tolist()
+    obj["gcode_index_time"] = time - time[0]
+    rows = np.flatnonzero(store["dwell"])
+    if len(rows):
+        obj["gcode_index_dwell_rows"] = rows.astype(np.int32)
+        obj["gcode_index_dwells"] = store["dwell"][rows]
+
+
+def toolpath_index(obj):
+    """`ToolpathIndex` de un objeto importado, o None si no lo tiene.
+
+    Se construye la primera vez (lee los puntos del objeto) y se reutiliza
+    mientras el objeto conserve sus datos, así que desde un handler de cambio
+    de frame cada consulta es solo una búsqueda binaria.
+    """
+    if obj is None or "gcode_index_lineNb" not in obj:
+        return None
+    pointer = obj.data.as_pointer()
+    cached = _toolpath_indexes.get(obj.name_full)
+    if cached is not None and cached[0] == pointer:
+        return cached[1]
+    if obj.type == 'CURVE':
+        points = obj.data.splines[0].points
+        co = np.empty(len(points) * 4, dtype=np.float32)
+        points.foreach_get('co', co)
+        xyz = co.reshape(-1, 4)[:, :3]
+    else:
+        co = np.empty(len(obj.data.vertices) * 3, dtype=np.float32)
+        obj.data.vertices.foreach_get('co', co)
+        xyz = co.reshape(-1, 3)
+    time = obj.get("gcode_index_time")
+    index = ToolpathIndex(
+        xyz,
+        np.asarray(obj["gcode_index_lineNb"]),
+        np.asarray(obj["gcode_index_layer_starts"]),
+        None if time is None else np.asarray(time),
+        np.asarray(obj.get("gcode_index_dwell_rows", [])),
+        np.asarray(obj.get("gcode_index_dwells", [])),
+    )
+    _toolpath_indexes[obj.name_full] = (pointer, index)
+    return index
+
+
+def frame_position(scene, obj, frame=None):
+    """Posición (`ToolpathPosition`) de `obj` en `frame` (por defecto el actual).
+
+    Usa la misma correspondencia frame → recorrido que `insert_time_keys`:
+    al ritmo de impresión con la escala de tiempo de los ajustes o, sin
+    tiempos, de 0 a 1 entre los frames 1 y 250.
+    """
+    index = toolpath_index(obj)
+    if index is None or not len(index):
+        return None
+    frame = scene.frame_current if frame is None else frame
+    if index.time is None:
+        return index.at_factor((frame - 1) / 249)
+    fps = scene.render.fps / scene.render.fps_base
+    return index.at_frame(frame, scene.frame_start, fps, scene.gcode_importer_settings.time_scale)
+
+
+def update_frame_position(scene):
+    """Guarda para el panel la posición de la última curva importada en el
+    frame actual de `scene` (ver `frame_position`)."""
+    curve_objs = [
+        obj for obj in scene.objects
+        if obj.type == 'CURVE' and obj.name.startswith("GCode") and obj.get("gcode_lod", 0) == 0
+    ]
+    position = frame_position(scene, curve_objs[-1]) if curve_objs else None
+    if position is None:
+        _frame_positions.pop(scene.name, None)
+    else:
+        _frame_positions[scene.name] = (scene.frame_current, position)
+
+
+@persistent
+def frame_change_handler(scene, depsgraph=None):
+    # Con el índice ya construido (al importar) cada frame es una búsqueda binaria;
+    # en un .blend recién abierto se construye aquí una sola vez
+    update_frame_position(scene)
+
+
+def insert_time_keys(owner, data_path, curve_obj, scene, time_scale):
+    """Anima `owner.data_path` de 0 a 1 con los tiempos guardados en `curve_obj`.
+
+    Cada segundo de animación son `time_scale` segundos de impresión, con una
+    clave lineal por capa desde `scene.frame_start`; todas se añaden de una vez
+    con `foreach_set`. Sin tiempos guardados (curvas de versiones anteriores)
+    se anima de 0 a 1 entre los frames 1 y 250. Devuelve el último frame.
+    """
+    times = curve_obj.get("gcode_key_times")
+    if times is None or len(times) < 2:
+        for frame, value in ((1, 0.0), (250, 1.0)):
+            setattr(owner, data_path, value)
+            owner.keyframe_insert(data_path=data_path, frame=frame)
+        return 250
+    fps = scene.render.fps / scene.render.fps_base
+    frames = scene.frame_start + np.asarray(times) * fps / time_scale
+    keys = np.column_stack((frames, np.asarray(curve_obj["gcode_key_factors"]))).astype(np.float32)
+
+    owner.keyframe_insert(data_path=data_path, frame=scene.frame_start)
+    fcurve = find_fcurve(owner.id_data, owner.path_from_id(data_path))
+    fcurve.keyframe_points.clear()
+    fcurve.keyframe_points.add(len(keys))
+    fcurve.keyframe_points.foreach_set("co", keys.ravel())
+    fcurve.keyframe_points.foreach_set("interpolation", np.full(len(keys), LINEAR_INTERPOLATION, dtype=np.int32))
+    fcurve.update()
+    return math.ceil(frames[-1])
+
+
+def find_fcurve(id_data, data_path):
+    """F-curve de `data_path` en la acción de `id_data` (acciones por slots desde Blender 4.4)."""
+    animation_data = id_data.animation_data
+    action = animation_data.action
+    if hasattr(action, "fcurves"):
+        return action.fcurves.find(data_path)
+    from bpy_extras import anim_utils
+    return anim_utils.action_get_channelbag_for_slot(action, animation_data.action_slot).fcurves.find(data_path)
+
+
+class FollowSession:
+    """Importación en directo de un archivo: el `FileFollower` que lo lee y
+    los objetos a los que se van añadiendo sus lotes.
+
+    Los ajustes se copian al empezar, así que cambiarlos en el panel no
+    afecta a lo que ya se está siguiendo. No se estima el tiempo, ni se
+    simplifica, ni se crean niveles de detalle, ni se usa la caché.
+    """
+
+    def __init__(self, path, mytool):
+        subd_threshold = mytool.max_segment_size if mytool.subdivide else None
+        self.follower = FileFollower(path, subd_threshold, mytool.arc_tolerance)
+        self.create_continuous = mytool.create_continuous
+        self.curve_thin_travel = mytool.curve_thin_travel
+        self.single_mesh = mytool.layer_output == 'SINGLE_MESH'
+        self.layer_attributes = mytool.layer_attributes
+        self.interval = mytool.follow_interval
+        self.timer = functools.partial(follow_timer, path)
+        self.points = 0
+        self.output = None          # nombre de la curva o de la malla única
+        self.layer_objects = {}     # capa -> nombre del objeto, con objetos por capa
+
+    def poll(self):
+        store, restarted = self.follower.poll()
+        if restarted:
+            # Archivo truncado o sustituido: se empieza en objetos nuevos
+            print(f"{self.follower.path} ha vuelto a empezar; se importa de nuevo.")
+            self.points = 0
+            self.output = None
+            self.layer_objects = {}
+        return self.add(store)
+
+    def add(self, store):
+        """Añade un lote clasificado a los objetos de la sesión (creándolos con
+        el primero) y devuelve cuántos puntos tenía."""
+        n = len(store)
+        if not n:
+            return 0
+        if self.create_continuous or self.single_mesh:
+            obj = bpy.data.objects.get(self.output or "")
+            if self.create_continuous:
+                if obj is None:
+                    obj = builders.create_continuous_curve(store, self)
+                else:
+                    radius = builders.travel_radius(store["style"]) if self.curve_thin_travel else None
+                    builders.append_to_curve(obj, np.column_stack((store["X"], store["Y"], store["Z"])), radius)
+            elif obj is None:
+                obj = builders.create_layered_mesh(store, self.layer_attributes)
+            else:
+                attributes = {"layer_index": store["layer"]}
+                if self.layer_attributes:
+                    attributes["tool"] = store["tool"]
+                    attributes["style"] = store["style"]
+                builders.append_to_mesh(obj, np.column_stack((store["X"], store["Y"], store["Z"])), attributes)
+            self.output = obj.name
+        else:
+            builders.append_split_layers(store, self.layer_objects)
+        self.points += n
+        return n
+
+
+def follow_timer(path):
+    """Timer de `bpy.app.timers` de un archivo seguido: lee lo nuevo y pide
+    redibujar la vista 3D si ha llegado algo."""
+    session = _followers.get(path)
+    if session is None:
+        return None
+    try:
+        added = session.poll()
+    except (OSError, ValueError) as exc:
+        print(f"[WARN] Se deja de seguir {path}: {exc}")
+        del _followers[path]
+        return None
+    if added:
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type in {'VIEW_3D', 'PROPERTIES'}:
+                    area.tag_redraw()
+    return session.interval
+
+
+def stop_following():
+    """Termina todos los seguimientos, añadiendo la última fila retenida."""
+    for path, session in list(_followers.items()):
+        if bpy.app.timers.is_registered(session.timer):
+            bpy.app.timers.unregister(session.timer)
+        session.add(session.follower.flush())
+        print(f"Seguimiento de {path} terminado: {session.points} puntos.")
+    _followers.clear()
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+# Registro de clases
+classes = (
+    ImportGcodeSettings,
+    OBJECT_PT_CustomPanel,
+    WM_OT_gcode_import,
+    WM_OT_gcode_import_cancel,
+    WM_OT_gcode_follow,
+    WM_OT_gcode_follow_stop,
+    WM_OT_generate_geometry_nodes,
+    WM_OT_animate_filament,
+)
+
+def register():
+    from bpy.utils import register_class
+    for cls in classes:
+        register_class(cls)
+    bpy.types.Scene.gcode_importer_settings = PointerProperty(type=ImportGcodeSettings)
+    bpy.app.handlers.frame_change_post.append(frame_change_handler)
+
+def unregister():
+    from bpy.utils import unregister_class
+    stop_following()
+    if frame_change_handler in bpy.app.handlers.frame_change_post:
+        bpy.app.handlers.frame_change_post.remove(frame_change_handler)
+    _frame_positions.clear()
+    for cls in reversed(classes):
+        unregister_class(cls)
+    del bpy.types.Scene.gcode_importer_settings
@@ -0,0 +1,83 @@
+import numpy as np
+
+# Desviación máxima (mm) entre el arco y sus cuerdas por defecto
+ARC_TOLERANCE = 0.01
+
+# Ejes (p, q, l) de cada plano de G17/G18/G19: p y q definen el plano del arco
+# y l es el eje lineal (hélice). Como en Marlin, G18 usa (Z, X) e Y como lineal.
+PLANES = {
+    "XY": (0, 1, 2),
+    "ZX": (2, 0, 1),
+    "YZ": (1, 2, 0),
+}
+
+TWO_PI = 2.0 * np.pi
+
+
+def arc_counts(angle, radius, tolerance):
+    """Número de cuerdas para cada arco de ángulo `angle` y radio `radius`.
+
+    La flecha de una cuerda de ángulo t es r * (1 - cos(t / 2)); se usa el
+    mayor paso que la mantiene por debajo de `tolerance`. Siempre al menos 1.
+    """
+    ratio = np.divide(tolerance, radius, out=np.full_like(radius, np.inf), where=radius > 0)
+    max_step = 2.0 * np.arccos(np.clip(1.0 - ratio, -1.0, 1.0))
+    counts = np.ceil(np.abs(angle) / max_step)
+    return np.maximum(counts, 1).astype(np.int64)
+
+
+def tessellate_arcs(start, end, ijk, radius, clockwise, plane="XY", tolerance=ARC_TOLERANCE):
+    """Convierte arcos G2/G3 en cuerdas, todos a la vez.
+
+    `start` y `end` son (n, 3) con los puntos inicial y final de cada arco,
+    `ijk` (n, 3) los desplazamientos I, J, K del centro respecto al inicio y
+    `radius` (n,) la palabra R (NaN en ambos si no aparecen). R tiene
+    prioridad sobre I/J/K, y un R negativo pide el arco largo. `clockwise`
+    (n,) es True para G2.
+
+    El eje lineal del plano se interpola a lo largo del arco (hélice) y, si
+    inicio y fin coinciden, el arco es una vuelta completa. Devuelve los
+    puntos de cada arco sin el inicial y con el último exactamente igual a
+    `end`, concatenados en un array (m, 3), y el número de puntos de cada uno.
+    """
+    p, q, l = PLANES[plane]
+    offsets = np.nan_to_num(ijk[:, [p, q]], nan=0.0)
+    p1, q1 = start[:, p], start[:, q]
+    p2, q2 = end[:, p], end[:, q]
+
+    # Forma R: centro sobre la mediatriz de la cuerda, como hace Marlin
+    r_form = ~np.isnan(radius) & (radius != 0) & ((p1 != p2) | (q1 != q2))
+    if r_form.any():
+        r = radius[r_form]
+        sign = np.where(clockwise[r_form] ^ (r < 0), -1.0, 1.0)
+        dp = p2[r_form] - p1[r_form]
+        dq = q2[r_form] - q1[r_form]
+        d = np.hypot(dp, dq)
+        h = np.sqrt(np.maximum((r - 0.5 * d) * (r + 0.5 * d), 0.0))
+        offsets[r_form, 0] = 0.5 * dp - sign * h * dq / d
+        offsets[r_form, 1] = 0.5 * dq + sign * h * dp / d
+
+    center_p = p1 + offsets[:, 0]
+    center_q = q1 + offsets[:, 1]
+    rp, rq = -offsets[:, 0], -offsets[:, 1]
+    tp, tq = p2 - center_p, q2 - center_q
+    angle = np.arctan2(rp * tq - rq * tp, rp * tp + rq * tq)
+    angle[angle < 0] += TWO_PI
+    angle[clockwise] -= TWO_PI
+    angle[(angle == 0) & (p1 == p2) & (q1 == q2)] = TWO_PI
+    r0 = np.hypot(rp, rq)
+
+    counts = arc_counts(angle, r0, tolerance)
+    ends = np.cumsum(counts)
+    k = np.arange(1, ends[-1] + 1 if len(ends) else 1, dtype=np.float64)
+    k -= np.repeat(ends - counts, counts)
+    frac = k / np.repeat(counts, counts)
+    theta = np.repeat(np.arctan2(rq, rp), counts) + np.repeat(angle, counts) * frac
+    radii = np.repeat(r0, counts)
+
+    points = np.empty((len(k), 3), dtype=np.float64)
+    points[:, p] = np.repeat(center_p, counts) + radii * np.cos(theta)
+    points[:, q] = np.repeat(center_q, counts) + radii * np.sin(theta)
+    points[:, l] = np.repeat(start[:, l], counts) + np.repeat(end[:, l] - start[:, l], counts) * frac
+    points[ends - 1] = end
+    return points, counts
@@ -0,0 +1,463 @@
+import os
+import re
+import struct
+import time
+import zlib
+
+import numpy as np
+
+try:
+    import heatshrink2
+except ImportError:
+    # Sin el módulo compilado se usa `heatshrink_decompress`, en Python
+    heatshrink2 = None
+
+# G-code binario de Prusa (.bgcode, libbgcode): cabecera de archivo y una
+# serie de bloques (metadatos, miniaturas, G-code), cada uno con cabecera,
+# parámetros, datos (quizá comprimidos) y, si el archivo lo indica, CRC32 de
+# todo lo anterior. Todos los enteros son little endian.
+MAGIC = b"GCDE"
+VERSION = 1
+EXTENSION = ".bgcode"
+
+CHECKSUM_NONE = 0
+CHECKSUM_CRC32 = 1
+
+BLOCK_FILE_METADATA = 0
+BLOCK_GCODE = 1
+BLOCK_SLICER_METADATA = 2
+BLOCK_PRINTER_METADATA = 3
+BLOCK_PRINT_METADATA = 4
+BLOCK_THUMBNAIL = 5
+METADATA_BLOCKS = {
+    BLOCK_FILE_METADATA: "file",
+    BLOCK_PRINTER_METADATA: "printer",
+    BLOCK_PRINT_METADATA: "print",
+    BLOCK_SLICER_METADATA: "slicer",
+}
+
+COMPRESSION_NONE = 0
+COMPRESSION_DEFLATE = 1
+COMPRESSION_HEATSHRINK_11_4 = 2
+COMPRESSION_HEATSHRINK_12_4 = 3
+HEATSHRINK_PARAMS = {
+    COMPRESSION_HEATSHRINK_11_4: (11, 4),
+    COMPRESSION_HEATSHRINK_12_4: (12, 4),
+}
+
+ENCODING_NONE = 0
+ENCODING_MEATPACK = 1
+ENCODING_MEATPACK_COMMENTS = 2
+
+_FILE_HEADER = struct.Struct("<4sIH")
+_BLOCK_HEADER = struct.Struct("<HHI")
+_COMPRESSED_SIZE = struct.Struct("<I")
+_CRC = struct.Struct("<I")
+_ENCODING = struct.Struct("<H")
+_THUMBNAIL_PARAMS = struct.Struct("<HHH")
+
+
+class Block:
+    """Un bloque leído: tipo, parámetros ya desempaquetados y datos sin comprimir
+    (None en los bloques que se saltan)."""
+    __slots__ = ("type", "compression", "params", "data")
+
+    def __init__(self, type, compression, params, data):
+        self.type = type
+        self.compression = compression
+        self.params = params
+        self.data = data
+
+
+def read_file_header(f):
+    """Lee la cabecera de archivo y devuelve el tipo de checksum de los bloques."""
+    raw = f.read(_FILE_HEADER.size)
+    if len(raw) < _FILE_HEADER.size or raw[:4] != MAGIC:
+        raise ValueError(f"{getattr(f, 'name', 'file')} is not a binary G-code file")
+    _, version, checksum = _FILE_HEADER.unpack(raw)
+    if version != VERSION:
+        raise ValueError(f"unsupported binary G-code version {version}")
+    if checksum not in (CHECKSUM_NONE, CHECKSUM_CRC32):
+        raise ValueError(f"unsupported binary G-code checksum type {checksum}")
+    return checksum
+
+
+def iter_blocks(f, skip=(BLOCK_THUMBNAIL,)):
+    """Genera los `Block` de un archivo abierto en binario.
+
+    Los bloques de tipo `skip` se saltan con un seek, sin leer ni comprobar
+    sus datos (`data` es None). En el resto se comprueba el CRC32, si el
+    archivo lo lleva, y se descomprimen los datos. Un archivo truncado o un
+    CRC que no coincide es un ValueError.
+    """
+    checksum = read_file_header(f)
+    crc_size = _CRC.size if checksum == CHECKSUM_CRC32 else 0
+    while True:
+        header = f.read(_BLOCK_HEADER.size)
+        if not header:
+            return
+        if len(header) < _BLOCK_HEADER.size:
+            raise ValueError("truncated binary G-code block header")
+        type, compression, size = _BLOCK_HEADER.unpack(header)
+        stored = size
+        if compression != COMPRESSION_NONE:
+            raw = f.read(_COMPRESSED_SIZE.size)
+            if len(raw) < _COMPRESSED_SIZE.size:
+                raise ValueError("truncated binary G-code block header")
+            (stored,) = _COMPRESSED_SIZE.unpack(raw)
+            header += raw
+        params_struct = _THUMBNAIL_PARAMS if type == BLOCK_THUMBNAIL else _ENCODING
+
+        if type in skip:
+            f.seek(params_struct.size + stored + crc_size, os.SEEK_CUR)
+            yield Block(type, compression, None, None)
+            continue
+
+        params = f.read(params_struct.size)
+        payload = f.read(stored)
+        if len(params) < params_struct.size or len(payload) < stored:
+            raise ValueError("truncated binary G-code block")
+        if crc_size:
+            raw = f.read(crc_size)
+            if len(raw) < crc_size:
+                raise ValueError("truncated binary G-code block checksum")
+            expected = zlib.crc32(payload, zlib.crc32(params, zlib.crc32(header)))
+            if _CRC.unpack(raw)[0] != expected:
+                raise ValueError(f"binary G-code block checksum mismatch (block type {type})")
+        data = decompress(compression, payload, size)
+        yield Block(type, compression, params_struct.unpack(params), data)
+
+
+def decompress(compression, payload, size):
+    if compression == COMPRESSION_NONE:
+        data = payload
+    elif compression == COMPRESSION_DEFLATE:
+        data = zlib.decompress(payload)
+    elif compression in HEATSHRINK_PARAMS:
+        window_bits, lookahead_bits = HEATSHRINK_PARAMS[compression]
+        if heatshrink2 is not None:
+            data = heatshrink2.decompress(payload, window_sz2=window_bits, lookahead_sz2=lookahead_bits)
+        else:
+            data = heatshrink_decompress(payload, window_bits, lookahead_bits)
+    else:
+        raise ValueError(f"unsupported binary G-code compression {compression}")
+    if len(data) != size:
+        raise ValueError(f"binary G-code block decompressed to {len(data)} bytes, expected {size}")
+    return bytes(data)
+
+
+def heatshrink_decompress(data, window_bits, lookahead_bits):
+    """Descompresor heatshrink (LZSS) en Python puro.
+
+    El flujo de bits va del más significativo al menos: un bit 1 y 8 bits de
+    literal, o un bit 0, `window_bits` de distancia - 1 y `lookahead_bits` de
+    longitud - 1 de una copia hacia atrás. Los bits sobrantes del final son
+    relleno.
+    """
+    out = bytearray()
+    backref_bits = window_bits + lookahead_bits
+    backref_mask = (1 << backref_bits) - 1
+    count_mask = (1 << lookahead_bits) - 1
+    need = 1 + max(8, backref_bits)
+    n = len(data)
+    pos = 0
+    acc = 0
+    nbits = 0
+    while True:
+        if nbits < need and pos < n:
+            # Recarga de 8 bytes; se descartan los bits ya consumidos
+            chunk = data[pos:pos + 8]
+            pos += len(chunk)
+            acc = ((acc & ((1 << nbits) - 1)) << (len(chunk) * 8)) | int.from_bytes(chunk, "big")
+            nbits += len(chunk) * 8
+        nbits -= 1
+        if nbits < 0:
+            break
+        if acc >> nbits & 1:
+            if nbits < 8:
+                break
+            nbits -= 8
+            out.append(acc >> nbits & 0xFF)
+        else:
+            if nbits < backref_bits:
+                break
+            nbits -= backref_bits
+            value = acc >> nbits & backref_mask
+            offset = (value >> lookahead_bits) + 1
+            count = (value & count_mask) + 1
+            start = len(out) - offset
+            if start < 0:
+                raise ValueError("corrupt heatshrink stream")
+            if count <= offset:
+                out += out[start:start + count]
+            else:
+                # La copia se solapa con lo que escribe: se repite el patrón
+                pattern = out[start:]
+                out += (pattern * (count // offset + 1))[:count]
+    return out
+
+
+# MeatPack: cada byte empaqueta dos caracteres de 4 bits (el primero en los
+# bits bajos). El código 0b1111 marca un carácter que no se puede empaquetar
+# y va entero en el byte siguiente. 0xFF 0xFF y un byte de orden cambian el
+# modo; con "sin espacios" el código del espacio pasa a ser 'E'.
+MEATPACK_SIGNAL = b"\xff\xff"
+MEATPACK_ENABLE = 0xFB
+MEATPACK_DISABLE = 0xFA
+MEATPACK_RESET = 0xF9
+MEATPACK_QUERY = 0xF8
+MEATPACK_NO_SPACES = 0xF7
+MEATPACK_SPACES = 0xF6
+_MEATPACK_CHARS = b"0123456789. \nGX"
+_MEATPACK_CHARS_NO_SPACES = b"0123456789.E\nGX"
+
+_SIGNAL_RE = re.compile(rb"\xff\xff(.)", re.DOTALL)
+# Sin espacios, "G1X10Y2" → "G1 X10 Y2": el tokenizador separa las palabras
+# por espacios. Como libbgcode, solo en las líneas G y antes de su ';': va uno
+# delante de cada mayúscula que no sigue ya a un espacio (K y S incluidas, que
+# también llevan los arcos G18/G19 y G4).
+_WORD_LETTER = np.zeros(256, dtype=bool)
+_WORD_LETTER[np.frombuffer(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ", dtype=np.uint8)] = True
+_BLANK_LINES_RE = re.compile(rb"\n\n+")
+
+_LO = np.arange(256, dtype=np.uint8) & 15
+_HI = np.arange(256, dtype=np.uint8) >> 4
+_LO_FULL = _LO == 15
+_HI_FULL = _HI == 15
+# Caracteres enteros que siguen a cada byte empaquetado; tras un '\n' en los
+# bits bajos los altos son relleno
+_LITERALS = np.where(_LO == 12, 0, _LO_FULL.astype(np.uint8) + _HI_FULL).astype(np.uint8)
+
+# Cuántos caracteres enteros quedan por leer (0, 1 o 2) es un autómata: un
+# byte es empaquetado si llega con 0 pendientes. Cada byte es una función
+# estado → estado, que se codifica como f(0) + 3 f(1) + 9 f(2); componerlas
+# por duplicación da el estado en cada byte sin recorrerlos uno a uno.
+_FUNCS = np.array([(c % 3, c // 3 % 3, c // 9) for c in range(27)], dtype=np.uint8)
+_COMPOSE = np.array(
+    [[_FUNCS[g][_FUNCS[f]] @ np.array([1, 3, 9]) for f in range(27)] for g in range(27)],
+    dtype=np.uint8,
+)  # _COMPOSE[g, f] = g ∘ f (primero f)
+_CONSTANT = (_FUNCS[:, 0] == _FUNCS[:, 1]) & (_FUNCS[:, 1] == _FUNCS[:, 2])
+_BYTE_FUNC = (_LITERALS + 9).astype(np.uint8)  # (literales, 0, 1)
+
+
+class MeatPackDecoder:
+    """Decodificador de MeatPack con estado entre bloques: modo activo, sin
+    espacios, los bytes de un carácter que quedó a medias al final del
+    bloque anterior y su última línea, que aún no ha terminado.
+
+    `decode` solo devuelve líneas completas; `finish` da la que quede.
+    """
+
+    def __init__(self):
+        self.packing = False
+        self.no_spaces = False
+        self.held = b""
+        self.partial = b""
+        self.started = False
+
+    def decode(self, data):
+        data = self.held + data
+        self.held = b""
+        out = []
+        start = 0
+        for signal in _SIGNAL_RE.finditer(data):
+            out.append(self._decode_run(data[start:signal.start()])[0])
+            self._command(signal.group(1)[0])
+            start = signal.end()
+        tail = data[start:]
+        held = b""
+        if tail.endswith(b"\xff"):
+            # Quizá la mitad de una señal: se decide con el bloque siguiente
+            cut = len(tail) - (2 if tail.endswith(MEATPACK_SIGNAL) else 1)
+            tail, held = tail[:cut], tail[cut:]
+        text, self.held = self._decode_run(tail)
+        self.held += held
+        out.append(text)
+
+        text = self.partial + b"".join(out)
+        end = text.rfind(b"\n") + 1
+        self.partial = text[end:]
+        return self._lines(text[:end])
+
+    def finish(self):
+        text = self.partial
+        self.partial = b""
+        return self._lines(text + b"\n") if text else b""
+
+    def _lines(self, text):
+        # Como libbgcode: sin líneas en blanco y, sin espacios, separando las palabras
+        if self.no_spaces and text:
+            chars = np.frombuffer(text, dtype=np.uint8)
+            at = _separators(chars)
+            if len(at):
+                text = np.insert(chars, at, ord(" ")).tobytes()
+        text = _BLANK_LINES_RE.sub(b"\n", text)
+        if self.started:
+            text = text.lstrip(b"\n")
+        self.started = self.started or bool(text)
+        return text
+
+    def _command(self, command):
+        if command == MEATPACK_ENABLE:
+            self.packing = True
+        elif command in (MEATPACK_DISABLE, MEATPACK_RESET):
+            self.packing = False
+        elif command == MEATPACK_NO_SPACES:
+            self.no_spaces = True
+        elif command == MEATPACK_SPACES:
+            self.no_spaces = False
+
+    def _decode_run(self, run):
+        """Decodifica bytes sin señales con el modo actual. Devuelve el texto y
+        los bytes del final que esperan un carácter entero del bloque siguiente."""
+        if not self.packing or not run:
+            return run, b""
+        b = np.frombuffer(run, dtype=np.uint8)
+        n = len(b)
+
+        # Estado tras cada byte: funciones compuestas sobre ventanas que se
+        # duplican hasta que todas son constantes o llegan al principio
+        funcs = _BYTE_FUNC[b]
+        d = 1
+        while d < n and not _CONSTANT[funcs[d:]].all():
+            funcs[d:] = _COMPOSE[funcs[d:], funcs[:-d]]
+            d *= 2
+        after = _FUNCS[funcs, 0]
+        packed = np.empty(n, dtype=bool)
+        packed[0] = True
+        packed[1:] = after[:-1] == 0
+
+        held = b""
+        if after[-1]:
+            # El último carácter entero llega en el bloque siguiente
+            cut = int(np.flatnonzero(packed)[-1])
+            held = run[cut:]
+            b, packed, n = b[:cut], packed[:cut], cut
+            if not n:
+                return b"", held
+
+        chars = np.frombuffer(_MEATPACK_CHARS_NO_SPACES if self.no_spaces else _MEATPACK_CHARS, dtype=np.uint8)
+        chars = np.append(chars, np.uint8(0))
+        lo, hi = _LO[b], _HI[b]
+        prev = np.empty(n, dtype=np.uint8)
+        prev[0] = 0
+        prev[1:] = b[:-1]
+        prev_packed = np.empty(n, dtype=bool)
+        prev_packed[0] = False
+        prev_packed[1:] = packed[:-1]
+
+        # Cada byte da hasta dos caracteres. Empaquetado: el bajo y el alto (si
+        # no son enteros). Entero: él mismo y, si el byte anterior solo tenía
+        # entero el bajo, el alto de ese byte, que va detrás.
+        pairs = np.empty((n, 2), dtype=np.uint8)
+        mask = np.empty((n, 2), dtype=bool)
+        pairs[:, 0] = np.where(packed, chars[lo], b)
+        pairs[:, 1] = np.where(packed, chars[hi], chars[_HI[prev]])
+        mask[:, 0] = ~packed | ~_LO_FULL[b]
+        mask[:, 1] = np.where(
+            packed,
+            ~_LO_FULL[b] & ~_HI_FULL[b] & (lo != 12),
+            prev_packed & _LO_FULL[prev] & ~_HI_FULL[prev],
+        )
+        return pairs[mask].tobytes(), held
+
+
+def _separators(chars):
+    """Posiciones de `chars` (líneas completas sin espacios de MeatPack) en las
+    que va un espacio: palabras de la parte de comando de una línea G. Los
+    comentarios y las demás líneas (M117, T...) se dejan como llegan."""
+    newline = chars == ord("\n")
+    line = np.zeros(len(chars), dtype=np.int64)
+    np.cumsum(newline[:-1], out=line[1:])
+    starts = np.flatnonzero(np.concatenate(([True], newline[:-1])))
+    g_line = chars[starts] == ord("G")
+    semicolon = chars == ord(";")
+    seen = np.cumsum(semicolon)
+    comment = seen > (seen - semicolon)[starts][line]
+    candidate = _WORD_LETTER[chars[1:]] & (chars[:-1] != ord(" ")) & ~newline[:-1]
+    candidate &= g_line[line[1:]] & ~comment[1:]
+    return np.flatnonzero(candidate) + 1
+
+
+def parse_ini(data):
+    """Metadatos de un bloque en formato INI ("clave=valor" por línea)."""
+    metadata = {}
+    for line in data.decode("utf-8", "replace").splitlines():
+        key, sep, value = line.partition("=")
+        if sep:
+            metadata[key.strip()] = value.strip()
+    return metadata
+
+
+def read_metadata(path):
+    """Metadatos de archivo, impresora, impresión y laminador de un .bgcode,
+    sin leer los bloques de G-code ni las miniaturas."""
+    metadata = {}
+    with open(path, "rb") as f:
+        for block in iter_blocks(f, skip=(BLOCK_THUMBNAIL, BLOCK_GCODE)):
+            if block.type in METADATA_BLOCKS:
+                metadata[METADATA_BLOCKS[block.type]] = parse_ini(block.data)
+    return metadata
+
+
+def iter_gcode(path, metadata=None, tokenizer=None):
+    """Genera el texto G-code (bytes, en líneas completas) de cada bloque de
+    G-code de `path`. Los metadatos que aparecen se guardan en `metadata` y,
+    con `tokenizer`, la posición en el archivo en `tokenizer.read_bytes`."""
+    decoder = MeatPackDecoder()
+    rest = b""
+    with open(path, "rb") as f:
+        for block in iter_blocks(f):
+            if tokenizer is not None:
+                tokenizer.read_bytes = f.tell()
+            if block.type in METADATA_BLOCKS:
+                if metadata is not None:
+                    metadata[METADATA_BLOCKS[block.type]] = parse_ini(block.data)
+                continue
+            if block.type != BLOCK_GCODE:
+                continue
+            (encoding,) = block.params
+            if encoding == ENCODING_NONE:
+                text = block.data
+            elif encoding in (ENCODING_MEATPACK, ENCODING_MEATPACK_COMMENTS):
+                text = decoder.decode(block.data)
+            else:
+                raise ValueError(f"unsupported binary G-code encoding {encoding}")
+            text = rest + text
+            end = text.rfind(b"\n") + 1
+            rest = text[end:]
+            if end:
+                yield text[:end]
+    text = decoder.finish()
+    if rest:
+        text += rest + b"\n"
+    if text:
+        yield text
+
+
+def iter_bgcode(path, tokenizer, metadata=None):
+    """Como `reader.iter_mapped` para un .bgcode: decodifica bloque a bloque y
+    pasa el texto al tokenizador sin escribir ningún archivo intermedio.
+
+    Genera el número de líneas tras cada bloque. Leer, descomprimir y
+    decodificar se suma en `tokenizer.read_seconds`.
+    """
+    lineNb = 0
+    blocks = iter_gcode(path, metadata, tokenizer)
+    while True:
+        then = time.perf_counter()
+        text = next(blocks, None)
+        tokenizer.read_seconds += time.perf_counter() - then
+        if text is None:
+            return
+        lineNb = tokenizer.feed_bytes(text, lineNb)
+        yield lineNb
+
+
+def read_bgcode(path, tokenizer, metadata=None):
+    """Como `iter_bgcode`, de una vez. Devuelve el número de líneas leídas."""
+    lineNb = 0
+    for lineNb in iter_bgcode(path, tokenizer, metadata):
+        pass
+    return lineNb
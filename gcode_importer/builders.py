@@ -0,0 +1,423 @@
+import bpy
+import numpy as np
+
+from .pipeline import layer_offsets
+from .segments import STYLE_TRAVEL
+from .toolpath import polyline_edges
+
+# Creación de los datablocks de Blender a partir de un SegmentStore (o de los
+# lotes de `GcodeModel.iter_pipeline`). El parseo y la geometría están en
+# `parser` y los módulos que usa, que no importan bpy.
+
+# Al añadir a una geometría existente (`write_tail`), proporción entre lo que
+# ya hay y lo nuevo por debajo de la cual se reescribe todo con foreach_set.
+# Un elemento suelto cuesta del orden de 1 µs y en foreach_set de 10 a 200 ns.
+REWRITE_RATIO = 8
+
+
+def create_continuous_curve(store, settings):
+    xyz = np.column_stack((store["X"], store["Y"], store["Z"]))
+    radius = None
+    if settings.curve_thin_travel:
+        radius = travel_radius(store["style"])
+    return build_continuous_curve(xyz, radius)
+
+
+def create_continuous_curve_streamed(batches, settings):
+    """Como `create_continuous_curve`, consumiendo lotes de `iter_pipeline`.
+
+    De cada lote solo se guarda XYZ en float32 (la precisión de Blender) y,
+    si hace falta para el radio, la columna 'style'.
+    """
+    chunks = []
+    styles = []
+    for batch in batches:
+        chunks.append(np.column_stack((batch["X"], batch["Y"], batch["Z"])).astype(np.float32))
+        if settings.curve_thin_travel:
+            styles.append(batch["style"].copy())
+    xyz = np.concatenate(chunks) if chunks else np.empty((0, 3), dtype=np.float32)
+    radius = travel_radius(np.concatenate(styles)) if styles else None
+    return build_continuous_curve(xyz, radius)
+
+
+def travel_radius(style):
+    # Radio 0 en el punto final de cada desplazamiento, 1 en el resto
+    return np.where(style == STYLE_TRAVEL, 0.0, 1.0).astype(np.float32)
+
+
+def build_continuous_curve(xyz, radius=None, tilt=None):
+    """Crea una curva POLY con un punto por fila de `xyz` (N, 3).
+
+    Las coordenadas se copian de una vez con `foreach_set` desde un buffer
+    float32 (N, 4) con W = 1. `radius` y `tilt` son arrays opcionales de N
+    valores (o un escalar) por punto, que se asignan igual.
+    """
+    n = len(xyz)
+    co = np.ones((n, 4), dtype=np.float32)
+    co[:, :3] = xyz
+
+    curve_data = bpy.data.curves.new('GCodeContinuousPath', type='CURVE')
+    curve_data.dimensions = '3D'
+    polyline = curve_data.splines.new('POLY')
+    if n:
+        polyline.points.add(n - 1)
+        polyline.points.foreach_set('co', co.ravel())
+        for name, values in (('radius', radius), ('tilt', tilt)):
+            if values is not None:
+                values = np.ascontiguousarray(np.broadcast_to(np.asarray(values, dtype=np.float32), (n,)))
+                polyline.points.foreach_set(name, values)
+
+    curve_obj = bpy.data.objects.new('GCodeContinuousCurve', curve_data)
+    bpy.context.collection.objects.link(curve_obj)
+    return curve_obj
+
+
+def layers_collection():
+    collection_name = "Layers"
+    if collection_name not in bpy.data.collections:
+        collection = bpy.data.collections.new(collection_name)
+        bpy.context.scene.collection.children.link(collection)
+    else:
+        collection = bpy.data.collections[collection_name]
+    return collection
+
+
+def create_split_layers(store, offsets):
+    """Un objeto por capa; `offsets` son los [start, stop) de `layer_offsets`."""
+    for _ in iter_split_layers(store, offsets):
+        pass
+
+
+def iter_split_layers(store, offsets):
+    """Como `create_split_layers`, generando el objeto de cada capa (None si
+    está vacía) según se crea, para repartir el trabajo en el tiempo."""
+    collection = layers_collection()
+    xyz = np.column_stack((store["X"], store["Y"], store["Z"]))
+
+    for i, (start, stop) in enumerate(offsets.tolist()):
+        yield add_layer_object(collection, i, *xyz_to_meshdata(xyz[start:stop]))
+
+
+def iter_update_split_layers(store, offsets, fingerprints, source, update):
+    """Como `iter_split_layers`, reutilizando los objetos de capa de una
+    importación anterior de `source`.
+
+    Cada objeto guarda la huella de su capa (`pipeline.layer_fingerprints`):
+    las capas con la misma huella no se tocan, las que han cambiado tienen
+    una malla nueva preparada y las que ya no existen se marcan para borrar.
+    Lo preparado queda en `update` (`LayerUpdate`) y no se ve en la escena
+    hasta `update.apply()`; con `update.revert()` todo queda como estaba.
+    Genera, por capa, el objeto si se ha creado nuevo (si no, None) y si se
+    ha reconstruido.
+    """
+    collection = layers_collection()
+    existing = {
+        obj["gcode_layer"]: obj for obj in collection.objects
+        if obj.get("gcode_source") == source and "gcode_layer" in obj
+    }
+    xyz = np.column_stack((store["X"], store["Y"], store["Z"]))
+
+    for i, ((start, stop), fingerprint) in enumerate(zip(offsets.tolist(), fingerprints)):
+        obj = existing.pop(i, None)
+        if start == stop:
+            if obj is not None:
+                update.removals.append(obj.name)
+            yield None, False
+            continue
+        if obj is not None and obj.get("gcode_fingerprint") == fingerprint:
+            yield None, False
+            continue
+        verts, edges = xyz_to_meshdata(xyz[start:stop])
+        if obj is None:
+            obj = add_layer_object(collection, i, verts, edges)
+            obj["gcode_source"] = source
+            obj["gcode_layer"] = i
+            obj["gcode_fingerprint"] = fingerprint
+            yield obj, True
+        else:
+            mesh = bpy.data.meshes.new(f"Layer_{i}")
+            mesh.from_pydata(verts, edges, [])
+            mesh.update()
+            update.swaps.append((obj.name, mesh.name, fingerprint))
+            yield None, True
+
+    update.removals.extend(obj.name for obj in existing.values())
+
+
+class LayerUpdate:
+    """Cambios de una reimportación incremental pendientes de aplicar (ver
+    `iter_update_split_layers`): mallas nuevas de objetos que ya existían y
+    objetos que sobran, por nombre.
+    """
+
+    def __init__(self):
+        self.swaps = []      # (objeto, malla nueva, huella)
+        self.removals = []   # objetos de capas que ya no existen
+
+    def apply(self):
+        """Pone las mallas nuevas en sus objetos (con los materiales de la
+        anterior, que se borra) y borra los objetos que sobran."""
+        for obj_name, mesh_name, fingerprint in self.swaps:
+            obj = bpy.data.objects.get(obj_name)
+            mesh = bpy.data.meshes.get(mesh_name)
+            if obj is None or mesh is None:
+                continue
+            old = obj.data
+            for material in old.materials:
+                mesh.materials.append(material)
+            obj.data = mesh
+            obj["gcode_fingerprint"] = fingerprint
+            if old.users == 0:
+                name = old.name
+                bpy.data.batch_remove([old])
+                mesh.name = name
+        for name in self.removals:
+            obj = bpy.data.objects.get(name)
+            if obj is not None:
+                remove_object(obj)
+        self.swaps = []
+        self.removals = []
+
+    def revert(self):
+        """Descarta las mallas preparadas; los objetos siguen como estaban."""
+        meshes = [bpy.data.meshes.get(mesh_name) for _, mesh_name, _ in self.swaps]
+        bpy.data.batch_remove([mesh for mesh in meshes if mesh is not None])
+        self.swaps = []
+        self.removals = []
+
+
+def remove_object(obj):
+    """Borra `obj` y sus datos (malla, curva...) si nadie más los usa."""
+    data = obj.data
+    bpy.data.objects.remove(obj)
+    if data is not None and data.users == 0:
+        bpy.data.batch_remove([data])
+
+
+def create_split_layers_streamed(batches):
+    """Como `create_split_layers`, consumiendo lotes de `iter_pipeline`.
+
+    Cada capa se crea en cuanto termina, así que solo se retiene la capa en curso.
+    """
+    collection = layers_collection()
+    current = None
+    parts = []
+    for batch in batches:
+        layer = batch["layer"]
+        xyz = np.column_stack((batch["X"], batch["Y"], batch["Z"]))
+        cuts = (np.flatnonzero(np.diff(layer)) + 1).tolist()
+        for start, stop in zip([0] + cuts, cuts + [len(layer)]):
+            idx = int(layer[start])
+            if current is not None and idx != current:
+                add_layer_object(collection, current, *xyz_to_meshdata(np.concatenate(parts)))
+                parts = []
+            current = idx
+            parts.append(xyz[start:stop])
+    if parts:
+        add_layer_object(collection, current, *xyz_to_meshdata(np.concatenate(parts)))
+
+
+def create_layered_mesh(store, extra_attributes=False):
+    """Crea una sola malla con todas las capas y el atributo de punto 'layer_index'.
+
+    Con `extra_attributes` se añaden también 'tool' y 'style'. Las aristas
+    solo unen puntos consecutivos de la misma capa, como en los objetos
+    por capa, así que una capa se aísla en Geometry Nodes filtrando por
+    'layer_index'.
+    """
+    xyz = np.column_stack((store["X"], store["Y"], store["Z"]))
+    attributes = {"layer_index": store["layer"]}
+    if extra_attributes:
+        attributes["tool"] = store["tool"]
+        attributes["style"] = store["style"]
+    return build_layered_mesh(xyz, attributes)
+
+
+def create_layered_mesh_streamed(batches, extra_attributes=False):
+    """Como `create_layered_mesh`, consumiendo lotes de `iter_pipeline`."""
+    names = ("layer", "tool", "style") if extra_attributes else ("layer",)
+    chunks = []
+    columns = {name: [] for name in names}
+    for batch in batches:
+        chunks.append(np.column_stack((batch["X"], batch["Y"], batch["Z"])).astype(np.float32))
+        for name in names:
+            columns[name].append(batch[name].astype(np.int32))
+    xyz = np.concatenate(chunks) if chunks else np.empty((0, 3), dtype=np.float32)
+    attributes = {
+        "layer_index" if name == "layer" else name:
+            np.concatenate(parts) if parts else np.empty(0, dtype=np.int32)
+        for name, parts in columns.items()
+    }
+    return build_layered_mesh(xyz, attributes)
+
+
+def build_layered_mesh(xyz, attributes):
+    """Malla de puntos `xyz` (N, 3) con un atributo INT de punto por entrada de
+    `attributes`; 'layer_index' decide qué puntos se unen con aristas.
+
+    Vértices, aristas y atributos se copian con `foreach_set` desde arrays.
+    """
+    n = len(xyz)
+    edges = polyline_edges(attributes["layer_index"]).astype(np.int32)
+
+    mesh = bpy.data.meshes.new("GCodeLayers")
+    mesh.vertices.add(n)
+    mesh.vertices.foreach_set("co", np.ascontiguousarray(xyz, dtype=np.float32).ravel())
+    mesh.edges.add(len(edges))
+    mesh.edges.foreach_set("vertices", edges.ravel())
+    for name, values in attributes.items():
+        attribute = mesh.attributes.new(name, 'INT', 'POINT')
+        attribute.data.foreach_set("value", np.ascontiguousarray(values, dtype=np.int32))
+    mesh.update()
+
+    obj = bpy.data.objects.new("GCodeLayers", mesh)
+    bpy.context.collection.objects.link(obj)
+    return obj
+
+
+def add_layer_object(collection, i, verts, edges):
+    if len(verts) > 0:
+        mesh = bpy.data.meshes.new(f"Layer_{i}")
+        mesh.from_pydata(verts, edges, [])
+        mesh.update()
+        obj = bpy.data.objects.new(f"Layer_{i}", mesh)
+        collection.objects.link(obj)
+        return obj
+
+
+def xyz_to_meshdata(xyz):
+    verts = xyz.tolist()
+    edges = [(i, i + 1) for i in range(len(verts) - 1)]
+    return verts, edges
+
+
+def segments_to_meshdata(segments):
+    return xyz_to_meshdata(
+        np.column_stack((segments.column('X'), segments.column('Y'), segments.column('Z')))
+    )
+
+
+def create_filament_object(settings):
+    if settings.filament_object == 'SPHERE':
+        bpy.ops.mesh.primitive_uv_sphere_add(
+            radius=settings.filament_radius,
+            location=(0, 0, 0)
+        )
+        filament = bpy.context.active_object
+    elif settings.filament_object == 'CUSTOM' and settings.custom_object in bpy.data.objects:
+        filament = bpy.data.objects[settings.custom_object]
+    else:
+        if settings.filament_object == 'CUSTOM':
+            print(f"[WARN] Objeto personalizado '{settings.custom_object}' no encontrado. Se usará un cilindro por defecto.")
+        bpy.ops.mesh.primitive_cylinder_add(
+            radius=settings.filament_radius,
+            depth=2.0,
+            location=(0, 0, 0)
+        )
+        filament = bpy.context.active_object
+    filament.name = "Filamento"
+
+    # Aplicar bevel
+    bpy.context.view_layer.objects.active = filament
+    bpy.ops.object.modifier_add(type='BEVEL')
+    bevel = filament.modifiers["Bevel"]
+    bevel.width = settings.bevel_depth
+    bevel.segments = settings.bevel_resolution
+    bevel.profile = 0.5
+    bpy.ops.object.modifier_apply(modifier="Bevel")
+
+    return filament
+
+
+def append_to_curve(curve_obj, xyz, radius=None):
+    """Añade los puntos `xyz` (N, 3) al final de la polilínea de `curve_obj`,
+    en su sitio, sin recrear la curva. `radius` como en `build_continuous_curve`.
+    """
+    n = len(xyz)
+    if not n:
+        return
+    points = curve_obj.data.splines[0].points
+    old = len(points)
+    points.add(n)
+    co = np.ones((n, 4), dtype=np.float32)
+    co[:, :3] = xyz
+    write_tail(points, 'co', co, old)
+    if radius is not None:
+        write_tail(points, 'radius', np.broadcast_to(np.asarray(radius, dtype=np.float32), (n,)), old)
+    curve_obj.data.update_tag()
+
+
+def append_to_mesh(obj, xyz, attributes=None):
+    """Añade los puntos `xyz` (N, 3) a la malla de `obj` en su sitio.
+
+    Con `attributes` (como en `build_layered_mesh`) se rellenan esos atributos
+    de punto y 'layer_index' decide las aristas nuevas, también la que une con
+    el último punto que ya había; sin ellos los puntos nuevos siguen la
+    polilínea (una malla por capa).
+    """
+    n = len(xyz)
+    if not n:
+        return
+    mesh = obj.data
+    old = len(mesh.vertices)
+    if attributes is None:
+        layer = np.zeros(n + 1, dtype=np.int32)
+    else:
+        layer = np.empty(n + 1, dtype=np.int32)
+        layer[1:] = attributes["layer_index"]
+        # Sin punto anterior, uno de otra capa para que no haya arista
+        layer[0] = mesh.attributes["layer_index"].data[old - 1].value if old else layer[1] - 1
+    edges = polyline_edges(layer).astype(np.int32) + (old - 1)
+    if not old:
+        edges = edges[edges[:, 0] >= 0]
+
+    mesh.vertices.add(n)
+    write_tail(mesh.vertices, "co", np.asarray(xyz, dtype=np.float32), old)
+    old_edges = len(mesh.edges)
+    mesh.edges.add(len(edges))
+    write_tail(mesh.edges, "vertices", edges, old_edges)
+    for name, values in (attributes or {}).items():
+        write_tail(mesh.attributes[name].data, "value", np.asarray(values, dtype=np.int32), old)
+    mesh.update()
+
+
+def write_tail(items, name, values, old):
+    """Escribe `values` (un elemento por fila) en la propiedad `name` de los
+    elementos old.. de la colección `items`, recién añadidos con `add`.
+
+    `foreach_set` solo escribe la colección entera: si lo que ya había es
+    poco comparado con lo nuevo (REWRITE_RATIO) se reescribe todo de una
+    vez; si no, solo los elementos nuevos, uno a uno. Así cada lote de un
+    archivo seguido en directo cuesta lo que trae y no lo que ya hay.
+    """
+    if not len(values):
+        return
+    if old <= REWRITE_RATIO * len(values):
+        buffer = np.empty((old + len(values),) + values.shape[1:], dtype=values.dtype)
+        items.foreach_get(name, buffer.ravel())
+        buffer[old:] = values
+        items.foreach_set(name, buffer.ravel())
+    else:
+        for item, value in zip(items[old:], values.tolist()):
+            setattr(item, name, value)
+
+
+def append_split_layers(store, layer_objects):
+    """Como `create_split_layers` para un lote que continúa una importación.
+
+    `layer_objects` (capa -> nombre del objeto) son los objetos de capa de
+    esa importación; los puntos de una capa que ya tiene objeto se añaden a
+    su malla y las capas nuevas se crean y se apuntan ahí.
+    """
+    collection = layers_collection()
+    layer = store["layer"]
+    xyz = np.column_stack((store["X"], store["Y"], store["Z"]))
+    for i, (start, stop) in enumerate(layer_offsets(layer).tolist()):
+        if start == stop:
+            continue
+        obj = bpy.data.objects.get(layer_objects.get(i, ""))
+        if obj is None:
+            obj = add_layer_object(collection, i, *xyz_to_meshdata(xyz[start:stop]))
+            layer_objects[i] = obj.name
+        else:
+            append_to_mesh(obj, xyz[start:stop])
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from .segments import SegmentStore
+
+# Subir cuando cambie el resultado del parseo/subdivisión/clasificación
+PARSER_VERSION = 4
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "gcode_importer_cache")
+DEFAULT_MAX_BYTES = 2 << 30
+
+
+class ParseCache:
+    """Caché en disco de almacenes ya parseados y clasificados.
+
+    Cada entrada es un directorio con un `.npy` por columna (más la tabla de
+    colores), de modo que un acierto se carga con `np.load(mmap_mode='r')` sin
+    copiar nada. La clave combina el hash del contenido del archivo, su mtime,
+    PARSER_VERSION y los ajustes de subdivisión y de arcos. El tamaño total se
+    limita a `max_bytes` expulsando las entradas usadas hace más tiempo (LRU
+    por mtime del directorio, que se actualiza en cada acierto).
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+
+    def key(self, path, subd_threshold=None, arc_tolerance=None):
+        with open(path, "rb") as f:
+            content = hashlib.file_digest(f, "blake2b").hexdigest()
+        parts = (content, os.stat(path).st_mtime_ns, PARSER_VERSION, repr(subd_threshold), repr(arc_tolerance))
+        return hashlib.blake2b(repr(parts).encode(), digest_size=20).hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key)
+
+    def load(self, key):
+        """Devuelve el SegmentStore de `key` (columnas mapeadas en memoria) o None."""
+        entry = self._entry(key)
+        try:
+            with open(os.path.join(entry, "meta.json")) as f:
+                meta = json.load(f)
+            if meta["version"] != PARSER_VERSION:
+                return None
+            arrays = {
+                name: np.load(os.path.join(entry, f"{name}.npy"), mmap_mode="r")
+                for name in meta["arrays"]
+            }
+        except (OSError, ValueError, KeyError):
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            pass  # caché de solo lectura: la entrada vale igual, solo no sube en el LRU
+        color_starts = arrays.pop("color_starts")
+        color_values = arrays.pop("color_values")
+        return SegmentStore.from_arrays(arrays, color_starts, color_values)
+
+    def save(self, key, store, source=None):
+        """Guarda `store` bajo `key` y aplica el límite de tamaño.
+
+        Si no se puede escribir (directorio de solo lectura, disco lleno) lanza
+        OSError sin dejar la entrada a medias; quien llama decide si seguir.
+        """
+        store.flush()
+        arrays = dict(store.columns)
+        arrays["color_starts"] = store.color_starts
+        arrays["color_values"] = store.color_values
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=self.directory, prefix=".tmp-")
+        try:
+            for name, values in arrays.items():
+                np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(values))
+            with open(os.path.join(tmp, "meta.json"), "w") as f:
+                json.dump({"version": PARSER_VERSION, "arrays": list(arrays), "source": source}, f)
+            entry = self._entry(key)
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp, entry)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        self.evict()
+
+    def entries(self):
+        """Lista (mtime, bytes, ruta) de las entradas, de la más antigua a la más reciente."""
+        if not os.path.isdir(self.directory):
+            return []
+        out = []
+        for name in os.listdir(self.directory):
+            entry = os.path.join(self.directory, name)
+            if name.startswith(".") or not os.path.isdir(entry):
+                continue
+            with os.scandir(entry) as files:
+                size = sum(f.stat().st_size for f in files)
+            out.append((os.stat(entry).st_mtime, size, entry))
+        return sorted(out)
+
+    def evict(self):
+        """Borra las entradas menos usadas hasta quedar por debajo de `max_bytes`."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
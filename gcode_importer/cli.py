@@ -0,0 +1,132 @@
+"""Conversión de G-code por lotes sin Blender.
+
+    python -m gcode_importer pieza.gcode otra.gcode -o salida/ --subdivide 1.0 --ply
+
+Cada archivo se parsea, se subdivide (opcional), se clasifica y se le
+estima el tiempo de impresión; el resultado se guarda en un .gctp (ver
+`toolpath`), que el importador de Blender carga directamente sin volver a
+parsear. Con varios archivos se reparten entre un grupo de procesos.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .arcs import ARC_TOLERANCE
+from .kinematics import MAX_VELOCITY, ACCELERATION, JERK, MachineLimits
+from .parser import GcodeParser
+from .reader import compressed_opener
+from .toolpath import EXTENSION, save_toolpath, write_ply, write_obj
+
+
+def output_path(path, output_dir, extension):
+    base = os.path.basename(path)
+    if compressed_opener(base) is not None:
+        base = os.path.splitext(base)[0]  # pieza.gcode.gz → pieza
+    base = os.path.splitext(base)[0]
+    return os.path.join(output_dir or os.path.dirname(os.path.abspath(path)), base + extension)
+
+
+def convert(path, options):
+    """Convierte un archivo y devuelve un resumen (dict) de lo que ha hecho."""
+    then = time.perf_counter()
+    warnings = io.StringIO()
+    with contextlib.redirect_stdout(warnings):
+        parser = GcodeParser()
+        parser.model.arc_tolerance = options.arc_tolerance
+        model = parser.parseFile(path, mapped=options.mmap)
+        if options.subdivide:
+            model.subdivide_segments(options.subdivide)
+        model.classifySegments()
+        model.estimate_print_time(MachineLimits(options.max_velocity, options.acceleration, options.jerk))
+    meta = {
+        "source": os.path.abspath(path),
+        "lines": parser.lineNb,
+        "subdivide": options.subdivide or None,
+        "arc_tolerance": options.arc_tolerance,
+        "print_time": model.print_time,
+        "metadata": model.metadata,
+    }
+    outputs = [save_toolpath(output_path(path, options.output_dir, EXTENSION), model.store, meta)]
+    if options.ply:
+        outputs.append(write_ply(output_path(path, options.output_dir, ".ply"), model.store))
+    if options.obj:
+        outputs.append(write_obj(output_path(path, options.output_dir, ".obj"), model.store))
+    return {
+        "source": path,
+        "outputs": outputs,
+        "lines": parser.lineNb,
+        "segments": len(model.store),
+        "layers": len(model.layer_offsets),
+        "print_time": model.print_time,
+        "seconds": time.perf_counter() - then,
+        # Se capturan aquí para que los de varios procesos no se mezclen al escribirlos
+        "warnings": [line for line in warnings.getvalue().splitlines() if "[WARN]" in line],
+    }
+
+
+def build_argparser():
+    ap = argparse.ArgumentParser(
+        prog="python -m gcode_importer",
+        description="Convierte G-code en archivos de trayectoria (.gctp) que Blender carga sin parsear.",
+    )
+    ap.add_argument("inputs", nargs="+", help="archivos G-code (.gcode, .gcode.gz/.xz/.bz2 o .bgcode)")
+    ap.add_argument("-o", "--output-dir", help="directorio de salida (por defecto, el de cada archivo)")
+    ap.add_argument("-j", "--jobs", type=int, default=0, help="procesos en paralelo (0: uno por núcleo)")
+    ap.add_argument("--subdivide", type=float, default=0.0, metavar="MM",
+                    help="tamaño máximo de segmento; 0 para no subdividir")
+    ap.add_argument("--arc-tolerance", type=float, default=ARC_TOLERANCE, metavar="MM",
+                    help="desviación máxima al convertir G2/G3 en cuerdas")
+    ap.add_argument("--no-mmap", dest="mmap", action="store_false", help="leer como texto en vez de con mmap")
+    ap.add_argument("--ply", action="store_true", help="escribir también una polilínea PLY binaria")
+    ap.add_argument("--obj", action="store_true", help="escribir también una polilínea OBJ")
+    ap.add_argument("--max-velocity", type=float, default=MAX_VELOCITY, metavar="MM/S")
+    ap.add_argument("--acceleration", type=float, default=ACCELERATION, metavar="MM/S2")
+    ap.add_argument("--jerk", type=float, default=JERK, metavar="MM/S")
+    ap.add_argument("-v", "--verbose", action="store_true",
+                    help="escribir en stderr los avisos del parseo de cada archivo")
+    return ap
+
+
+def main(argv=None):
+    options = build_argparser().parse_args(argv)
+    if options.output_dir:
+        os.makedirs(options.output_dir, exist_ok=True)
+    jobs = min(options.jobs or os.cpu_count() or 1, len(options.inputs))
+    failed = 0
+
+    def show(summary):
+        warnings = summary["warnings"]
+        note = ""
+        if warnings:
+            note = f" ({len(warnings)} avisos)" if options.verbose else f" ({len(warnings)} avisos, -v para verlos)"
+        print(
+            f"{summary['source']}: {summary['lines']} líneas, {summary['segments']} segmentos, "
+            f"{summary['layers']} capas, {summary['print_time'] / 3600:.2f} h de impresión, "
+            f"{summary['seconds']:.2f} s → {', '.join(summary['outputs'])}" + note
+        )
+        if options.verbose:
+            for line in warnings:
+                print(f"{summary['source']}: {line}", file=sys.stderr)
+
+    if jobs == 1:
+        for path in options.inputs:
+            try:
+                show(convert(path, options))
+            except (OSError, ValueError) as exc:
+                failed += 1
+                print(f"{path}: error: {exc}", file=sys.stderr)
+        return 1 if failed else 0
+
+    with ProcessPoolExecutor(jobs) as pool:
+        futures = {pool.submit(convert, path, options): path for path in options.inputs}
+        for future in as_completed(futures):
+            try:
+                show(future.result())
+            except (OSError, ValueError) as exc:
+                failed += 1
+                print(f"{futures[future]}: error: {exc}", file=sys.stderr)
+    return 1 if failed else 0
@@ -0,0 +1,91 @@
+import mmap
+import os
+
+from .arcs import ARC_TOLERANCE
+from .parser import GcodeParser
+from .pipeline import ClassifyState, classify_batch, subdivide_batch
+from .reader import read_mapped
+
+
+class FileFollower:
+    """Sigue un G-code que va creciendo (p. ej. el archivo de cola de un host
+    de impresión) y parsea solo lo que se le ha añadido.
+
+    Entre llamadas a `poll` se conservan el desplazamiento en bytes, el
+    número de línea y el `GcodeModel`, que guarda el estado modal (relative,
+    offset, isRelative, plane, herramienta y color), además de los estados
+    de subdivisión y de clasificación. Solo se leen líneas completas: una
+    línea a medio escribir se queda para la siguiente vez.
+
+    La última fila parseada se retiene en `model.store` hasta la siguiente
+    llamada (o hasta `flush`), porque su cambio de capa depende del E del
+    segmento que la sigue; así cada lote sale clasificado igual que si el
+    archivo se hubiera importado de una vez.
+    """
+
+    def __init__(self, path, subd_threshold=None, arc_tolerance=ARC_TOLERANCE):
+        self.path = path
+        self.subd_threshold = subd_threshold
+        self.arc_tolerance = arc_tolerance
+        self.reset()
+
+    def reset(self):
+        """Vuelve al principio del archivo con un estado modal nuevo."""
+        self.parser = GcodeParser()
+        self.parser.model.arc_tolerance = self.arc_tolerance
+        self.offset = 0
+        self.lineNb = 0
+        self.identity = None
+        self.classify_state = ClassifyState()
+        self.subdivide_prev = [0.0, 0.0, 0.0, 0.0, 0.0]
+
+    @property
+    def model(self):
+        return self.parser.model
+
+    def poll(self):
+        """Parsea las líneas completas añadidas desde la última llamada.
+
+        Devuelve (lote, reiniciado): un SegmentStore clasificado (quizá
+        vacío) con los segmentos nuevos, y True si el archivo se ha truncado
+        o sustituido por otro, en cuyo caso se ha vuelto a empezar desde el
+        principio (`reset`) y el lote es el del archivo nuevo.
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            # Aún no existe (o se está sustituyendo): ya aparecerá
+            return self._emit(keep_last=True), False
+        restarted = False
+        identity = (st.st_dev, st.st_ino)
+        if self.identity is not None and (identity != self.identity or st.st_size < self.offset):
+            self.reset()
+            restarted = True
+        self.identity = identity
+
+        if st.st_size > self.offset:
+            with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                end = mm.rfind(b"\n", self.offset, st.st_size) + 1
+            if end > self.offset:
+                self.lineNb = read_mapped(self.path, self.model.tokenizer, start=self.offset, stop=end,
+                                          lineNb=self.lineNb)
+                self.model.tokenizer.flush()
+                self.offset = end
+        return self._emit(keep_last=True), restarted
+
+    def flush(self):
+        """Devuelve la fila retenida por `poll` (al dejar de seguir el archivo)."""
+        return self._emit(keep_last=False)
+
+    def _emit(self, keep_last):
+        store = self.model.store
+        store.flush()
+        n = len(store) - 1 if keep_last else len(store)
+        batch = store.pop(max(n, 0))
+        next_E = store["E"][0].item() if len(store) else None
+        if self.subd_threshold is not None and len(batch):
+            batch, self.subdivide_prev = subdivide_batch(batch, self.subd_threshold, self.subdivide_prev)
+        if len(batch):
+            classify_batch(batch, self.classify_state, next_E)
+        return batch
+
@@ -0,0 +1,138 @@
+import numpy as np
+
+# Límites por defecto de la máquina (valores típicos de firmware de impresora)
+MAX_VELOCITY = 300.0  # mm/s
+ACCELERATION = 1500.0  # mm/s²
+JERK = 10.0  # mm/s, cambio de velocidad instantáneo admitido en una esquina
+
+
+class MachineLimits:
+    """Límites cinemáticos con los que se estima el tiempo de impresión."""
+    __slots__ = ("max_velocity", "acceleration", "jerk")
+
+    def __init__(self, max_velocity=MAX_VELOCITY, acceleration=ACCELERATION, jerk=JERK):
+        self.max_velocity = max_velocity
+        self.acceleration = acceleration
+        self.jerk = jerk
+
+
+def junction_speeds2(directions, v2, dwell, jerk):
+    """Cuadrado de la velocidad máxima en cada unión de segmentos.
+
+    La unión k es la entrada del segmento k (la 0 es el arranque y la n el
+    final, ambas en reposo). Como el "jerk" clásico de Marlin/Grbl, en una
+    esquina el salto de velocidad |v·d2 - v·d1| no puede superar `jerk`, y
+    tampoco se pasa de la velocidad de crucero de ninguno de los dos
+    segmentos. Tras una pausa (G4) la máquina está parada.
+    """
+    n = len(v2)
+    out = np.zeros(n + 1, dtype=np.float64)
+    if n < 2:
+        return out
+    turn = directions[1:] - directions[:-1]
+    turn = np.sqrt(np.einsum("ij,ij->i", turn, turn))
+    limit = np.divide(jerk, turn, out=np.full(n - 1, np.inf), where=turn > 0)
+    out[1:-1] = np.minimum(np.minimum(v2[:-1], v2[1:]), limit * limit)
+    out[1:-1][dwell[:-1] > 0] = 0.0
+    return out
+
+
+def plan_speeds2(junction2, length, acceleration):
+    """Velocidades² alcanzables en cada unión con aceleración `acceleration`.
+
+    Es el planificador de dos pasadas de los firmwares: hacia atrás, cada
+    unión no puede superar la velocidad con la que aún se frena a tiempo
+    para la siguiente, w[k] <= w[k + 1] + 2·a·L[k]; hacia delante, no supera
+    la que da tiempo a alcanzar acelerando, w[k] <= w[k - 1] + 2·a·L[k - 1].
+    Con S la suma acumulada de 2·a·L cada pasada es un mínimo acumulado:
+    w[k] = min(j >= k) (J[j] + S[j]) - S[k] y w[k] = min(j <= k) (w[j] - S[j]) + S[k].
+    """
+    S = np.zeros(len(junction2), dtype=np.float64)
+    np.cumsum(2.0 * acceleration * length, out=S[1:])
+    backward = np.minimum.accumulate((junction2 + S)[::-1])[::-1] - S
+    forward = np.minimum.accumulate(backward - S) + S
+    return np.maximum(forward, 0.0)
+
+
+def segment_times(xyz, F, dwell, start=(0.0, 0.0, 0.0), limits=None):
+    """Tiempo (s) de cada segmento con un perfil de velocidad trapezoidal.
+
+    `xyz` es (n, 3) con el final de cada segmento (el primero empieza en
+    `start`), `F` el avance en mm/min y `dwell` la pausa tras cada segmento.
+    Sin avance (F <= 0) se usa la velocidad máxima. Cada segmento acelera
+    desde la velocidad de su unión de entrada hasta la de crucero, la
+    mantiene y frena hasta la de salida; si es demasiado corto para llegar
+    a crucero el perfil es triangular. Las pausas no se incluyen.
+    """
+    limits = limits or MachineLimits()
+    a = limits.acceleration
+    n = len(xyz)
+    if not n:
+        return np.zeros(0, dtype=np.float64)
+    delta = np.empty((n, 3), dtype=np.float64)
+    delta[0] = xyz[0] - np.asarray(start, dtype=np.float64)
+    np.subtract(xyz[1:], xyz[:-1], out=delta[1:])
+    length = np.sqrt(np.einsum("ij,ij->i", delta, delta))
+    directions = np.divide(delta, length[:, None], out=np.zeros_like(delta), where=length[:, None] > 0)
+
+    v = np.asarray(F, dtype=np.float64) / 60.0
+    v = np.where(v > 0, np.minimum(v, limits.max_velocity), limits.max_velocity)
+    v2 = v * v
+    w = plan_speeds2(junction_speeds2(directions, v2, dwell, limits.jerk), length, a)
+    w0, w1 = w[:-1], w[1:]
+
+    # Tramo de crucero: lo que queda tras acelerar y frenar
+    cruise = length - (2.0 * v2 - w0 - w1) / (2.0 * a)
+    trapezoid = cruise >= 0
+    peak = np.where(trapezoid, v, np.sqrt((2.0 * a * length + w0 + w1) / 2.0))
+    t = (2.0 * peak - np.sqrt(w0) - np.sqrt(w1)) / a
+    t[trapezoid] += cruise[trapezoid] / v[trapezoid]
+    return t
+
+
+def cumulative_time(store, limits=None, start=(0.0, 0.0, 0.0)):
+    """Rellena la columna 'time' de `store` (instante en que termina cada
+    segmento, con las pausas anteriores incluidas) y devuelve el tiempo
+    total, que suma también la pausa tras el último segmento. `start` es el
+    punto del que sale el primer segmento (ver `segment_times`)."""
+    n = len(store)
+    if not n:
+        return 0.0
+    xyz = np.column_stack((store["X"], store["Y"], store["Z"]))
+    dwell = store["dwell"]
+    elapsed = np.cumsum(segment_times(xyz, store["F"], dwell, start, limits))
+    elapsed[1:] += np.cumsum(dwell[:-1])
+    store["time"] = elapsed
+    return float(elapsed[-1] + dwell[-1])
+
+
+def layer_times(store, offsets):
+    """Duración (s) de cada capa [start, stop) de `offsets`, pausas incluidas.
+
+    Una capa dura desde que termina la anterior hasta que termina su último
+    segmento (más su pausa); las capas vacías duran 0.
+    """
+    done = np.concatenate(([0.0], store["time"] + store["dwell"]))
+    return done[offsets[:, 1]] - done[offsets[:, 0]]
+
+
+def time_keys(store, offsets):
+    """Pares (tiempo, fracción de recorrido) al final de cada capa.
+
+    La fracción es la longitud acumulada de la polilínea de `store` hasta
+    ese punto entre su longitud total, que es el parámetro que usan Follow
+    Path y Trim Curve; el tiempo cuenta desde el primer punto. Sirve para
+    animar el recorrido al ritmo real de impresión con una clave por capa.
+    """
+    n = len(store)
+    if not n:
+        return np.zeros(0), np.zeros(0)
+    xyz = np.column_stack((store["X"], store["Y"], store["Z"]))
+    travelled = np.zeros(n, dtype=np.float64)
+    np.cumsum(np.linalg.norm(np.diff(xyz, axis=0), axis=1), out=travelled[1:])
+    ends = offsets[offsets[:, 1] > offsets[:, 0], 1] - 1
+    ends = np.unique(np.concatenate(([0], ends, [n - 1])))
+    time = store["time"]
+    times = time[ends] - time[0]
+    factors = travelled[ends] / travelled[-1] if travelled[-1] > 0 else np.zeros(len(ends))
+    return times, factors
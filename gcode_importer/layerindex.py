@@ -0,0 +1,149 @@
+import json
+import os
+
+import numpy as np
+
+from .cache import PARSER_VERSION
+from .pipeline import layer_offsets
+
+# Índice de capas de un G-code de texto, guardado junto a él (`<archivo>.layers`).
+# Guarda puntos de control cada CHECKPOINT_BYTES: límites de línea donde se
+# anota el estado modal del parseo y el de la clasificación, para poder
+# empezar a parsear ahí. De cada capa guarda su Z, su primer segmento y el
+# punto de control desde el que se lee (`GcodeModel.parse_layers`).
+SUFFIX = ".layers"
+FORMAT_VERSION = 1
+# Lo que como mucho se parsea de más antes y después del rango pedido
+CHECKPOINT_BYTES = 1 << 18
+
+
+def index_path(path):
+    return path + SUFFIX
+
+
+def source_meta(path, arc_tolerance):
+    """Lo que tiene que coincidir para que un índice siga valiendo: el archivo
+    (tamaño y fecha), la versión del parser y la tolerancia de los arcos, que
+    cambia el número de segmentos."""
+    st = os.stat(path)
+    return {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "parser_version": PARSER_VERSION,
+        "arc_tolerance": arc_tolerance,
+    }
+
+
+def first_z(Z, offsets):
+    """Z del primer segmento de cada capa de `offsets` (NaN si está vacía)."""
+    first = Z[np.minimum(offsets[:, 0], len(Z) - 1)]
+    return np.where(offsets[:, 1] > offsets[:, 0], first, np.nan)
+
+
+def layers_in_z(layer_z, z_min, z_max):
+    """(primera, última) de las capas cuya Z está en [z_min, z_max], o None."""
+    inside = np.flatnonzero((layer_z >= z_min) & (layer_z <= z_max))
+    if not len(inside):
+        return None
+    return int(inside[0]), int(inside[-1])
+
+
+class LayerIndex:
+    """Puntos de control y capas de un G-code (ver el comentario del módulo).
+
+    Punto de control k: `offsets[k]` (byte, inicio de línea), `lines[k]` y
+    `rows[k]` (líneas y segmentos anteriores), `states[k]` (ver
+    `GcodeModel.modal_state`) y `classify[k]` (px, py, pz, layer_idx y
+    layer_z de `ClassifyState`). Capa i: `layer_rows[i]` ([start, stop) en
+    segmentos del archivo entero, sin subdividir) y `layer_z[i]` (Z de su
+    primer segmento; NaN si está vacía).
+    """
+
+    def __init__(self, offsets, lines, rows, classify, states, layer_rows, layer_z, meta):
+        self.offsets = offsets
+        self.lines = lines
+        self.rows = rows
+        self.classify = classify
+        self.states = states
+        self.layer_rows = layer_rows
+        self.layer_z = layer_z
+        self.meta = meta
+
+    @classmethod
+    def from_scan(cls, checkpoints, store, meta):
+        """Índice a partir de los puntos de control (byte, líneas, segmentos,
+        estado modal) de un parseo completo y de su almacén ya clasificado."""
+        offsets, lines, rows, states = (list(column) for column in zip(*checkpoints))
+        rows = np.array(rows, dtype=np.int64)
+        X, Y, Z, E, layer = (store[name] for name in ("X", "Y", "Z", "E", "layer"))
+
+        # Estado de la clasificación tras los segmentos anteriores a cada punto
+        classify = np.zeros((len(rows), 5), dtype=np.float64)
+        before = rows > 0
+        last = rows[before] - 1
+        classify[before, 0] = X[last]
+        classify[before, 1] = Y[last]
+        classify[before, 2] = Z[last]
+        classify[before, 3] = layer[last]
+        # layer_z: Z de la última candidata (fila seguida de una que extruye)
+        candidates = np.flatnonzero(E[1:] > 0)
+        k = np.searchsorted(candidates, rows) - 1
+        classify[k >= 0, 4] = Z[candidates[k[k >= 0]]]
+
+        layer_rows = layer_offsets(layer)
+        return cls(np.array(offsets, dtype=np.int64), np.array(lines, dtype=np.int64), rows,
+                   classify, states, layer_rows, first_z(Z, layer_rows), meta)
+
+    @property
+    def layer_count(self):
+        return len(self.layer_rows)
+
+    def read_window(self, first, last):
+        """Qué leer para las capas first..last: (punto de control desde el que
+        empezar, byte en el que parar o None para leer hasta el final).
+
+        Se lee hasta pasado el segundo segmento de la capa siguiente: el
+        cambio de capa del primero depende del E del que le sigue.
+        """
+        if not 0 <= first <= last < self.layer_count:
+            raise ValueError(f"layer range {first}-{last} outside 0-{self.layer_count - 1}")
+        start = int(self.layer_rows[first, 0])
+        checkpoint = int(np.searchsorted(self.rows, start, side="right")) - 1
+        if last + 1 >= self.layer_count:
+            return checkpoint, None
+        needed = int(self.layer_rows[last + 1, 0]) + 2
+        k = int(np.searchsorted(self.rows, needed, side="left"))
+        return checkpoint, (int(self.offsets[k]) if k < len(self.offsets) else None)
+
+    def save(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                offsets=self.offsets,
+                lines=self.lines,
+                rows=self.rows,
+                classify=self.classify,
+                layer_rows=self.layer_rows,
+                layer_z=self.layer_z,
+                header=np.array(json.dumps({
+                    "format": FORMAT_VERSION,
+                    "meta": self.meta,
+                    "states": self.states,
+                })),
+            )
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path, meta):
+        """Índice guardado en `path`, o None si no existe o ya no vale para `meta`."""
+        try:
+            with np.load(path) as data:
+                header = json.loads(data["header"].item())
+                if header["format"] != FORMAT_VERSION or header["meta"] != meta:
+                    return None
+                return cls(data["offsets"], data["lines"], data["rows"], data["classify"],
+                           header["states"], data["layer_rows"], data["layer_z"], header["meta"])
+        except (OSError, ValueError, KeyError):
+            return None
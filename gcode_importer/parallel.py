@@ -0,0 +1,138 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .reader import iter_mapped, read_mapped, split_lines
+from .tokenizer import GcodeTokenizer, WORDS
+
+# Por debajo de este tamaño no compensa arrancar procesos
+MIN_PARALLEL_SIZE = 1 << 23
+# Trozos por proceso: más trozos reparten mejor la carga
+CHUNKS_PER_WORKER = 4
+
+
+class ChunkRecorder(GcodeTokenizer):
+    """Tokenizador que graba un trozo de archivo en vez de aplicarlo a un modelo.
+
+    Hace también de parser y de modelo: los movimientos G0-G3 limpios se
+    guardan como arrays (argumentos sin resolver, con NaN en los ejes
+    ausentes) y el resto de líneas como eventos, en orden, junto con el
+    comentario vigente en ese punto. Todo lo que depende del estado modal
+    (G90/G91, G92, plano G17-G19, posición, herramienta, color M163) queda para la pasada
+    secuencial de `ChunkResult.replay`.
+    """
+
+    def __init__(self):
+        self.parser = self
+        self.comment = None  # None: el comentario vigente viene del trozo anterior
+        self.lineNb = 0
+        self.line = ""
+        self.moves = []
+        self.events = []  # (nº de movimientos anteriores, lineNb, línea, comentario)
+        self._count = 0
+        super().__init__(self)
+
+    def apply_moves(self, vals, types, lineNbs):
+        self.moves.append((vals, types, lineNbs))
+        self._count += len(vals)
+
+    def feed_generic(self, line):
+        self.events.append((self._count, self.lineNb, line, self.comment))
+        # El comentario de la propia línea pasa a ser el vigente para lo que sigue
+        _, sep, comment = line.partition(';')
+        if sep:
+            self.comment = comment
+
+    def result(self):
+        if self.moves:
+            vals, types, lines = (np.concatenate(cols) for cols in zip(*self.moves))
+        else:
+            vals = np.empty((0, len(WORDS)), dtype=np.float64)
+            types = np.empty(0, dtype=np.int8)
+            lines = np.empty(0, dtype=np.int64)
+        return ChunkResult(vals, types, lines, self.events, self.comment, self.lineNb)
+
+
+class ChunkResult:
+    """Resultado de un trozo: arrays de movimientos y eventos con números de
+    línea relativos al inicio del trozo."""
+
+    def __init__(self, vals, types, lines, events, comment, line_count):
+        self.vals = vals
+        self.types = types
+        self.lines = lines
+        self.events = events
+        self.comment = comment
+        self.line_count = line_count
+
+    def replay(self, model, first_line):
+        """Aplica el trozo a `model` en orden, desplazando los números de línea.
+
+        Es el paso secuencial (prefix scan) que arrastra el estado modal entre
+        trozos: da exactamente el mismo resultado que el parseo secuencial.
+        """
+        parser = model.parser
+        tokenizer = model.tokenizer
+        tokenizer.flush()
+        done = 0
+        for k, lineNb, line, comment in self.events:
+            if k > done:
+                model.apply_moves(self.vals[done:k], self.types[done:k], self.lines[done:k] + first_line)
+                done = k
+            if comment is not None:
+                parser.comment = comment
+            parser.lineNb = lineNb + first_line
+            parser.line = line
+            tokenizer.feed_generic(line)
+        if done < len(self.vals):
+            model.apply_moves(self.vals[done:], self.types[done:], self.lines[done:] + first_line)
+        if self.comment is not None:
+            parser.comment = self.comment
+        parser.lineNb = first_line + self.line_count
+        return parser.lineNb
+
+
+def parse_chunk(path, start, stop):
+    """Tokeniza el rango de bytes [start, stop) de `path` (en un proceso de trabajo)."""
+    recorder = ChunkRecorder()
+    read_mapped(path, recorder, start=start, stop=stop)
+    return recorder.result()
+
+
+def _parse_chunk(args):
+    return parse_chunk(*args)
+
+
+def iter_parallel(model, path, workers=None):
+    """Parsea `path` en `model` repartiendo la tokenización entre procesos.
+
+    El archivo se divide en rangos de bytes cortados en fin de línea; cada
+    proceso devuelve sus movimientos como arrays numpy y la reconstrucción del
+    estado modal se hace aquí, en orden, a medida que llegan los trozos.
+    Genera el número de líneas reconstruidas tras cada trozo, con su final en
+    `model.tokenizer.read_bytes`; si se cierra antes de acabar, los trozos que
+    faltan se cancelan sin esperarlos.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or os.path.getsize(path) < MIN_PARALLEL_SIZE:
+        yield from iter_mapped(path, model.tokenizer)
+        return
+    chunks = split_lines(path, workers * CHUNKS_PER_WORKER)
+    lineNb = 0
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        results = pool.map(_parse_chunk, [(path, start, stop) for start, stop in chunks])
+        for (_, stop), result in zip(chunks, results):
+            lineNb = result.replay(model, lineNb)
+            model.tokenizer.read_bytes = stop
+            yield lineNb
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_parallel(model, path, workers=None):
+    """Como `iter_parallel`, de una vez. Devuelve `model`."""
+    for _ in iter_parallel(model, path, workers):
+        pass
+    return model
@@ -1,25 +1,29 @@
-import bpy, bmesh
-import math
-import re
 import numpy as np
-from mathutils import Vector
 
-np.set_printoptions(suppress=True)  # Suprime notación científica en funciones de subdivisión linspace
+from .segments import (
+    SegmentStore,
+    SegmentList,
+    MOVE_CODES,
+)
+from .tokenizer import GcodeTokenizer, parse_words, AXES, WORDS
+from .arcs import ARC_TOLERANCE, tessellate_arcs
+from .simplify import SimplifyState, simplify_batch, iter_simplified
+from .kinematics import cumulative_time, layer_times
+from .reader import iter_mapped, iter_text_lines, compressed_opener, iter_compressed
+from .bgcode import EXTENSION as BGCODE_EXTENSION, iter_bgcode
+from .parallel import iter_parallel
+from .layerindex import LayerIndex, CHECKPOINT_BYTES
+from .pipeline import (
+    STREAM_BATCH_SIZE,
+    ClassifyState,
+    classify_batch,
+    subdivide_batch,
+    iter_subdivided,
+    iter_classified,
+    layer_offsets,
+)
 
-class Segment:
-    def __init__(self, type, coords, color, toolnumber, lineNb, line):
-        self.type = type
-        self.coords = coords
-        self.color = color
-        self.toolnumber = toolnumber
-        self.lineNb = lineNb
-        self.line = line
-        self.style = None
-        self.layerIdx = None
-        self.distance = None
-
-    def __str__(self):
-        return f" <coords={self.coords}, lineNb={self.lineNb}, style={self.style}, layerIdx={self.layerIdx}, color={self.color}>"
+np.set_printoptions(suppress=True)  # Suprime notación científica en funciones de subdivisión linspace
 
 class GcodeModel:
     def __init__(self, parser):
@@ -36,53 +40,162 @@ class GcodeModel:
             "Z":0.0,
             "E":0.0}
         self.isRelative = False
+        self.plane = "XY"  # G17 (XY), G18 (ZX), G19 (YZ)
+        self.arc_tolerance = ARC_TOLERANCE
         self.color = [0,0,0,0,0,0,0,0]  # RGBCMYKW
         self.toolnumber = 0
-        self.segments = []
-        self.layers = []
+        self.store = SegmentStore()
+        self.store.set_color(self.color)
+        self.layer_offsets = np.zeros((0, 2), dtype=np.int64)  # [start, stop) de cada capa
+        self.simplify_state = None
+        self.print_time = None  # tiempo total estimado (s)
+        self.layer_times = None  # duración estimada (s) de cada capa
+        self.metadata = {}  # bloques de metadatos de un .bgcode ("printer", "print", ...)
+        self.start_point = [0.0, 0.0, 0.0, 0.0, 0.0]  # [X, Y, Z, F, E] antes del primer segmento
+        self.tokenizer = GcodeTokenizer(self)
+
+    def warn(self, msg):
+        self.parser.warn(msg)
+
+    def instrument(self, report):
+        """Suma en `report.accumulated("dispatch")` el tiempo de aplicar los
+        comandos al modelo: los lotes de `apply_moves` y los do_* del camino
+        genérico. Sustituye esas funciones por versiones cronometradas, así
+        que sin llamar a esto el parseo no paga nada por medirse.
+        """
+        self.apply_moves = report.timed("dispatch", self.apply_moves)
+        dispatch = self.tokenizer.dispatch
+        for code, handler in dispatch.items():
+            dispatch[code] = report.timed("dispatch", handler)
+
+    @property
+    def segments(self):
+        # Vista de compatibilidad: model.segments[i].coords['X']
+        return SegmentList(self.store)
 
     def do_G1(self, args, type):
         coords = dict(self.relative)
         for axis in args.keys():
             if axis in coords:
-                if self.isRelative: 
+                # El avance no es una coordenada: también en G91 es absoluto
+                if self.isRelative and axis != "F":
                     coords[axis] += args[axis]
                 else:
                     coords[axis] = args[axis]
             else:
                 self.warn(f"Unknown axis '{axis}'")
         
-        absolute = {
-            "X": self.offset["X"] + coords["X"],
-            "Y": self.offset["Y"] + coords["Y"],
-            "Z": self.offset["Z"] + coords["Z"],
-            "F": coords["F"]
-        }
+        x = self.offset["X"] + coords["X"]
+        y = self.offset["Y"] + coords["Y"]
+        z = self.offset["Z"] + coords["Z"]
+
+        if x != self.relative['X'] + self.offset["X"] or \
+           y != self.relative['Y'] + self.offset["Y"] or \
+           z != self.relative['Z'] + self.offset["Z"]:
+            self.store.append(
+                x, y, z,
+                coords["F"],
+                args.get("E", 0.0),
+                MOVE_CODES[type],
+                self.toolnumber,
+                self.parser.lineNb
+            )
+        
+        self.relative = coords
 
-        if "E" not in args:
-            absolute["E"] = 0
+    def apply_moves(self, vals, types, lineNbs):
+        """Versión vectorizada de do_G1 para un lote de movimientos consecutivos.
+
+        `vals` es (n, 9) con los argumentos X, Y, Z, F, E, I, J, K, R de cada
+        línea y NaN en las palabras ausentes. Para G0/G1 da exactamente los
+        mismos resultados que llamar a do_G1 línea a línea con el mismo estado
+        modal. Los arcos (tipo G2/G3) resuelven su punto final igual y se
+        convierten en cuerdas todos a la vez (`tessellate_arcs`).
+        """
+        n = len(vals)
+        axes = vals[:, :len(AXES)]
+        present = ~np.isnan(axes)
+        coords = np.empty((n + 1, len(AXES)), dtype=np.float64)
+        coords[0] = [self.relative[axis] for axis in AXES]
+        if self.isRelative:
+            # -0.0 es neutro para la suma (x + -0.0 == x, incluso para -0.0)
+            coords[1:] = np.where(present, axes, -0.0)
+            np.add.accumulate(coords, axis=0, out=coords)
+            # F sigue siendo absoluto: el último presente o el anterior al lote
+            rows = np.where(present[:, 3], np.arange(1, n + 1), 0)
+            np.maximum.accumulate(rows, out=rows)
+            coords[1:, 3] = np.where(rows > 0, axes[rows - 1, 3], coords[0, 3])
         else:
-            absolute["E"] = args["E"]
-
-        seg = Segment(
-            type,
-            absolute,
-            self.color.copy(),
+            coords[1:] = axes
+            rows = np.where(present, np.arange(1, n + 1)[:, None], 0)
+            np.maximum.accumulate(rows, axis=0, out=rows)
+            coords[1:] = np.take_along_axis(coords, rows, axis=0)
+
+        E = np.where(present[:, 4], vals[:, 4], 0.0)
+        F = coords[1:, 3]
+        end = coords[1:, :3]
+        start = coords[:-1, :3]
+        arcs = types >= MOVE_CODES["G2"]
+        if arcs.any():
+            points, counts = tessellate_arcs(
+                start[arcs],
+                end[arcs],
+                vals[arcs, 5:8],
+                vals[arcs, 8],
+                types[arcs] == MOVE_CODES["G2"],
+                self.plane,
+                self.arc_tolerance,
+            )
+            # Cada arco pasa a `counts` filas; su E se reparte entre las cuerdas
+            pieces = np.ones(n, dtype=np.int64)
+            pieces[arcs] = counts
+            E[arcs] = np.where(counts > 1, np.where(E[arcs] > 0, E[arcs] / counts, 0.0), E[arcs])
+            end = np.repeat(end, pieces, axis=0)
+            end[np.repeat(arcs, pieces)] = points
+            start = np.concatenate((coords[:1, :3], end[:-1]))
+            F, E, types, lineNbs = (np.repeat(column, pieces) for column in (F, E, types, lineNbs))
+
+        offset = np.array([self.offset["X"], self.offset["Y"], self.offset["Z"]])
+        xyz = offset + end
+        moved = (xyz != start + offset).any(axis=1)
+        self.store.extend(
+            xyz[moved],
+            F[moved],
+            E[moved],
+            types[moved],
             self.toolnumber,
-            self.parser.lineNb,
-            self.parser.line
+            lineNbs[moved],
         )
-        
-        if seg.coords['X'] != self.relative['X'] + self.offset["X"] or \
-           seg.coords['Y'] != self.relative['Y'] + self.offset["Y"] or \
-           seg.coords['Z'] != self.relative['Z'] + self.offset["Z"]:
-            self.addSegment(seg)
-        
-        self.relative = coords
+        self.relative = dict(zip(AXES, coords[-1].tolist()))
 
     def do_G0(self, args, type):
         self.do_G1(args, type=type)
 
+    def do_G2(self, args, type):
+        for word in args.keys():
+            if word not in WORDS:
+                self.warn(f"Unknown axis '{word}'")
+        self.apply_moves(
+            np.array([[args.get(word, np.nan) for word in WORDS]]),
+            np.array([MOVE_CODES[type]], dtype=np.int8),
+            np.array([self.parser.lineNb], dtype=np.int64),
+        )
+
+    do_G3 = do_G2
+
+    def do_G4(self, args):
+        # Pausa: P en milisegundos, S en segundos
+        self.store.add_dwell(args.get('S', 0.0) + args.get('P', 0.0) / 1000.0)
+
+    def do_G17(self, args):
+        self.plane = "XY"
+
+    def do_G18(self, args):
+        self.plane = "ZX"
+
+    def do_G19(self, args):
+        self.plane = "YZ"
+
     def do_G90(self, args):
         self.isRelative = False
 
@@ -114,232 +227,222 @@ class GcodeModel:
                     self.color[:3] = RGB
             except:
                 pass
+        self.store.set_color(self.color)
+
+    def modal_state(self):
+        """Estado que arrastra el parseo de una línea a la siguiente: posición,
+        G92, G90/G91, plano, color, herramienta y comentario vigente."""
+        return {
+            "relative": dict(self.relative),
+            "offset": dict(self.offset),
+            "isRelative": self.isRelative,
+            "plane": self.plane,
+            "color": list(self.color),
+            "toolnumber": self.toolnumber,
+            "comment": self.parser.comment,
+        }
+
+    def restore_modal_state(self, state):
+        """Vuelve al estado de `modal_state` para seguir parseando desde ahí."""
+        self.relative = dict(state["relative"])
+        self.offset = dict(state["offset"])
+        self.isRelative = state["isRelative"]
+        self.plane = state["plane"]
+        self.color = list(state["color"])
+        self.toolnumber = state["toolnumber"]
+        self.parser.comment = state["comment"]
+        self.store.set_color(self.color)
 
     def parseArgs(self, args):
-        dic = {}
-        if args:
-            bits = args.split()
-            for bit in bits:
-                letter = bit[0]
-                try:
-                    coord = float(bit[1:])
-                except ValueError:
-                    coord = 1.0
-                dic[letter] = coord
-        return dic
+        return parse_words(args)
 
     def parseLine(self):
-        bits = self.parser.line.split(';',1)
-        if len(bits) > 1:
-            self.parser.comment = bits[1]
-        
-        command = bits[0].strip()
-        comm = command.split(None, 1)
-        code = comm[0] if len(comm) > 0 else None
-        args = comm[1] if len(comm) > 1 else None
-        
-        if code:
-            method_name = f"do_{code}"
-            if hasattr(self, method_name):
-                if code in ['G0', 'G1']:
-                    getattr(self, method_name)(self.parseArgs(args), type=code)
-                else:
-                    getattr(self, method_name)(self.parseArgs(args))
-            else:
-                if code.startswith("T"):
-                    try:
-                        self.toolnumber = int(code[1:])
-                    except ValueError:
-                        self.warn(f"Invalid tool number in code '{code}'.")
-                else:
-                    pass  # Código desconocido
-
-    def parseFile(self, path):
-        with open(path, 'r') as f:
-            for line in f:
-                self.parser.lineNb += 1
-                self.parser.line = line.rstrip()
-                self.parseLine()
+        self.tokenizer.feed(self.parser.line)
+        self.tokenizer.flush()
+
+    def parseFile(self, path, mapped=False, workers=1):
+        for _ in self.iter_parse(path, mapped, workers):
+            pass
         return self
 
-    def addSegment(self, segment):
-        self.segments.append(segment)
+    def iter_parse(self, path, mapped=False, workers=1):
+        """Como `parseFile`, generando el número de líneas leídas tras cada
+        bloque (o trozo, en paralelo); lo que se lleva leído del archivo está
+        en `self.tokenizer.read_bytes`. Los segmentos se acumulan en `self.store`.
+        """
+        if workers != 1 and not path.lower().endswith(BGCODE_EXTENSION) and compressed_opener(path) is None:
+            # Tokenización en varios procesos (0/None: un proceso por núcleo)
+            steps = iter_parallel(self, path, workers)
+        elif path.lower().endswith(BGCODE_EXTENSION):
+            # G-code binario: se decodifica bloque a bloque
+            steps = iter_bgcode(path, self.tokenizer, self.metadata)
+        elif compressed_opener(path) is not None:
+            # Comprimido: un hilo descomprime mientras este tokeniza
+            steps = iter_compressed(path, self.tokenizer)
+        elif mapped:
+            # Lectura en bytes sobre mmap: no crea un str por línea
+            steps = iter_mapped(path, self.tokenizer)
+        else:
+            steps = self._iter_lines(path, STREAM_BATCH_SIZE)
+        yield from steps
+        self.tokenizer.flush()
+
+    def index_layers(self, path, meta=None):
+        """Parsea `path` entero (texto, con mmap) y devuelve su `LayerIndex`.
+
+        Tras cada bloque de CHECKPOINT_BYTES se anota un punto de control con
+        el estado modal. El almacén queda clasificado, sin subdividir, y
+        `meta` se guarda en el índice para saber si sigue valiendo.
+        """
+        checkpoints = [(0, 0, 0, self.modal_state())]
+        for lineNb in iter_mapped(path, self.tokenizer, CHECKPOINT_BYTES):
+            checkpoints.append((self.tokenizer.read_bytes, lineNb, len(self.store), self.modal_state()))
+        self.tokenizer.flush()
+        self.store.flush()
+        self.classifySegments()
+        return LayerIndex.from_scan(checkpoints, self.store, meta or {})
+
+    def parse_layers(self, path, index, first, last):
+        """Parsea solo las capas first..last (incluidas) de `path` con su `index`.
+
+        Empieza a leer en el punto de control anterior a la capa `first`, con
+        el estado modal y de clasificación guardados ahí, y para poco después
+        de la capa `last`, así que cuesta lo que esas capas y no el archivo
+        entero. `self.store` queda clasificado con los números de capa del
+        archivo completo, y `start_point` es el punto anterior a su primer
+        segmento (para `subdivide_segments`).
+        """
+        checkpoint, stop = index.read_window(first, last)
+        self.restore_modal_state(index.states[checkpoint])
+        for _ in iter_mapped(path, self.tokenizer, start=int(index.offsets[checkpoint]), stop=stop,
+                             lineNb=int(index.lines[checkpoint])):
+            pass
+        self.tokenizer.flush()
+        self.store.flush()
+
+        state = ClassifyState()
+        px, py, pz, layer_idx, layer_z = index.classify[checkpoint].tolist()
+        state.px, state.py, state.pz = px, py, pz
+        state.layer_idx = int(layer_idx)
+        state.layer_z = layer_z
+        classify_batch(self.store, state)
+
+        self.start_point = [px, py, pz, 0.0, 0.0]
+        self.keep_layers(first, last)
+        return self
 
-    def classifySegments(self):
-        coords = {
-            "X":0.0,
-            "Y":0.0,
-            "Z":0.0,
-            "F":0.0,
-            "E":0.0}
-        currentLayerIdx = 0
-        currentLayerZ = 0
-        layer = []
-        
-        for i, seg in enumerate(self.segments):
-            style = "travel"
-            if ((seg.coords["X"] != coords["X"]) or 
-                (seg.coords["Y"] != coords["Y"]) or 
-                (seg.coords["Z"] != coords["Z"])) and \
-                (seg.coords["E"] > 0 ):
-                style = "extrude"
-            
-            # Detectar cambio de capa
-            if i < len(self.segments)-1:
-                next_seg = self.segments[i+1]
-                if seg.coords["Z"] != currentLayerZ and next_seg.coords["E"] > 0:
-                    self.layers.append(layer)
-                    layer = []
-                    currentLayerZ = seg.coords["Z"]
-                    currentLayerIdx += 1
-            
-            seg.style = style
-            seg.layerIdx = currentLayerIdx
-            layer.append(seg)
-            coords = seg.coords
-        
-        if layer:
-            self.layers.append(layer)
+    def keep_layers(self, first, last):
+        """Se queda solo con las capas first..last (incluidas) del almacén ya
+        clasificado; `start_point` pasa a ser el punto anterior a la primera."""
+        start, stop = np.searchsorted(self.store["layer"], [first, last + 1]).tolist()
+        if start:
+            self.start_point = [self.store[axis][start - 1].item() for axis in ("X", "Y", "Z", "F", "E")]
+        self.store = self.store.take(np.arange(start, stop))
+        self.build_layers()
+
+    def iter_segments(self, path, batch_size=STREAM_BATCH_SIZE, mapped=True):
+        """Parsea `path` generando lotes (SegmentStore) de como mucho `batch_size`
+        segmentos, sin acumular el archivo entero en `self.store`."""
+        if path.lower().endswith(BGCODE_EXTENSION):
+            steps = iter_bgcode(path, self.tokenizer, self.metadata)
+        elif compressed_opener(path) is not None:
+            steps = iter_compressed(path, self.tokenizer)
+        elif mapped:
+            steps = iter_mapped(path, self.tokenizer)
+        else:
+            steps = self._iter_lines(path, batch_size)
+        for _ in steps:
+            while len(self.store) >= batch_size:
+                yield self.store.pop(batch_size)
+        self.tokenizer.flush()
+        while len(self.store):
+            yield self.store.pop(batch_size)
+
+    def _iter_lines(self, path, every):
+        feed = self.tokenizer.feed
+        for line in iter_text_lines(path, self.tokenizer):
+            self.parser.lineNb += 1
+            self.parser.line = line.rstrip()
+            feed(self.parser.line)
+            if self.parser.lineNb % every == 0:
+                self.tokenizer.flush()
+                yield self.parser.lineNb
+
+    def iter_pipeline(self, path, subd_threshold=None, batch_size=STREAM_BATCH_SIZE, mapped=True,
+                      simplify_tolerance=None):
+        """Parseo → subdivisión (opcional) → clasificación → simplificación
+        (opcional), lote a lote.
+
+        Cada lote sale con 'style' y 'layer' rellenos; la memoria queda acotada
+        por el tamaño de lote. `self.layer_offsets` no se rellena en este modo;
+        el recuento de la simplificación queda en `self.simplify_state`.
+        """
+        batches = self.iter_segments(path, batch_size, mapped)
+        if subd_threshold is not None:
+            batches = iter_subdivided(batches, subd_threshold)
+        batches = iter_classified(batches)
+        if simplify_tolerance is not None:
+            self.simplify_state = SimplifyState()
+            batches = iter_simplified(batches, simplify_tolerance, self.simplify_state)
+        return batches
 
-    def subdivide_segments(self, subd_threshold):
-        subdivided_segs = []
-        coords = {
-            "X":0.0,
-            "Y":0.0,
-            "Z":0.0,
-            "F":0.0,
-            "E":0.0}
+    def classifySegments(self):
+        classify_batch(self.store, ClassifyState())
+        self.build_layers()
 
-        for seg in self.segments:
-            d = math.sqrt(
-                (seg.coords["X"] - coords["X"])**2 +
-                (seg.coords["Y"] - coords["Y"])**2 +
-                (seg.coords["Z"] - coords["Z"])**2
-            )
-            seg.distance = d
-
-            if d > subd_threshold:
-                subdivs = math.ceil(d / subd_threshold)
-                P1 = coords
-                P2 = seg.coords
-                interp_coords = np.linspace(list(P1.values()), list(P2.values()), num=subdivs, endpoint=True)
-
-                for i in range(len(interp_coords)):
-                    new_coords = {
-                        "X": interp_coords[i][0],
-                        "Y": interp_coords[i][1],
-                        "Z": interp_coords[i][2],
-                        "F": seg.coords["F"]
-                    }
-                    if seg.coords["E"] > 0:
-                        new_coords["E"] = round(seg.coords["E"] / (subdivs-1), 5)
-                    else:
-                        new_coords["E"] = 0
-                    
-                    if new_coords['X'] != coords['X'] or \
-                       new_coords['Y'] != coords['Y'] or \
-                       new_coords['Z'] != coords['Z']:
-                        new_seg = Segment(seg.type, new_coords, seg.color.copy(), seg.toolnumber, seg.lineNb, seg.line)
-                        new_seg.layerIdx = seg.layerIdx
-                        new_seg.style = seg.style
-                        subdivided_segs.append(new_seg)
-            else:
-                subdivided_segs.append(seg)
-            
-            coords = seg.coords
+    def load_store(self, store):
+        """Usa un almacén ya clasificado (p. ej. de la caché de parseo)."""
+        self.store = store
+        self.build_layers()
 
-        self.segments = subdivided_segs
+    def build_layers(self):
+        self.layer_offsets = layer_offsets(self.store["layer"])
 
-    def create_continuous_curve(self, settings):
-        verts = []
-        for seg in self.segments:
-            verts.append((seg.coords['X'], seg.coords['Y'], seg.coords['Z']))
-        
-        curve_data = bpy.data.curves.new('GCodeContinuousPath', type='CURVE')
-        curve_data.dimensions = '3D'
-        polyline = curve_data.splines.new('POLY')
-        polyline.points.add(len(verts) - 1)
-        
-        for i, vert in enumerate(verts):
-            polyline.points[i].co = (vert[0], vert[1], vert[2], 1)
-        
-        curve_obj = bpy.data.objects.new('GCodeContinuousCurve', curve_data)
-        bpy.context.collection.objects.link(curve_obj)
-        return curve_obj
-
-    def create_split_layers(self):
-        collection_name = "Layers"
-        if collection_name not in bpy.data.collections:
-            layers_collection = bpy.data.collections.new(collection_name)
-            bpy.context.scene.collection.children.link(layers_collection)
-        else:
-            layers_collection = bpy.data.collections[collection_name]
-        
-        for i, layer in enumerate(self.layers):
-            verts, edges = self.segments_to_meshdata(layer)
-            if len(verts) > 0:
-                mesh = bpy.data.meshes.new(f"Layer_{i}")
-                mesh.from_pydata(verts, edges, [])
-                mesh.update()
-                obj = bpy.data.objects.new(f"Layer_{i}", mesh)
-                layers_collection.objects.link(obj)
-
-    def segments_to_meshdata(self, segments):
-        verts = []
-        edges = []
-        for seg in segments:
-            verts.append((seg.coords['X'], seg.coords['Y'], seg.coords['Z']))
-        edges = [(i, i + 1) for i in range(len(verts) - 1)]
-        return verts, edges
-
-    def create_filament_object(self, settings):
-        if settings.filament_object == 'CYLINDER':
-            bpy.ops.mesh.primitive_cylinder_add(
-                radius=settings.filament_radius,
-                depth=2.0,
-                location=(0, 0, 0)
-            )
-            filament = bpy.context.active_object
-            filament.name = "Filamento"
-        elif settings.filament_object == 'SPHERE':
-            bpy.ops.mesh.primitive_uv_sphere_add(
-                radius=settings.filament_radius,
-                location=(0, 0, 0)
-            )
-            filament = bpy.context.active_object
-            filament.name = "Filamento"
-        elif settings.filament_object == 'CUSTOM':
-            if settings.custom_object and settings.custom_object in bpy.data.objects:
-                filament = bpy.data.objects[settings.custom_object]
-                filament.name = "Filamento"
-            else:
-                self.warn(f"Objeto personalizado '{settings.custom_object}' no encontrado. Se usará un cilindro por defecto.")
-                bpy.ops.mesh.primitive_cylinder_add(
-                    radius=settings.filament_radius,
-                    depth=2.0,
-                    location=(0, 0, 0)
-                )
-                filament = bpy.context.active_object
-                filament.name = "Filamento"
-        else:
-            bpy.ops.mesh.primitive_cylinder_add(
-                radius=settings.filament_radius,
-                depth=2.0,
-                location=(0, 0, 0)
-            )
-            filament = bpy.context.active_object
-            filament.name = "Filamento"
+    @property
+    def layers(self):
+        # Vista de compatibilidad: una SegmentList por capa
+        return [SegmentList(self.store, start, stop) for start, stop in self.layer_offsets.tolist()]
 
-        # Aplicar bevel
-        bpy.context.view_layer.objects.active = filament
-        bpy.ops.object.modifier_add(type='BEVEL')
-        bevel = filament.modifiers["Bevel"]
-        bevel.width = settings.bevel_depth
-        bevel.segments = settings.bevel_resolution
-        bevel.profile = 0.5
-        bpy.ops.object.modifier_apply(modifier="Bevel")
+    def layer_slice(self, k):
+        """Slice de la capa `k`: `model.store["X"][model.layer_slice(k)]` no copia."""
+        start, stop = self.layer_offsets[k].tolist()
+        return slice(start, stop)
 
-        return filament
+    def subdivide_segments(self, subd_threshold):
+        self.store, _ = subdivide_batch(self.store, subd_threshold, self.start_point)
+
+    def iter_lod_stores(self, levels, tolerance):
+        """Genera los almacenes de los niveles de detalle 1 .. levels - 1, cada
+        uno con el `SimplifyState` que tiene sus puntos antes y después.
+
+        El nivel 0 es `self.store`; cada nivel simplifica el anterior con el
+        cuádruple de tolerancia que el previo (`tolerance` en el nivel 1), así
+        que no se vuelve a parsear nada y cada nivel trabaja sobre menos puntos.
+        """
+        store = self.store
+        for level in range(1, levels):
+            state = SimplifyState()
+            store = simplify_batch(store, tolerance * 4 ** (level - 1), state)
+            yield store, state
+
+    def estimate_print_time(self, limits=None):
+        """Rellena la columna 'time' con el modelo cinemático (ver
+        `kinematics.segment_times`) y calcula el tiempo total y por capa.
+
+        Debe llamarse antes de simplificar: las filas que se conservan
+        mantienen su instante, así que los niveles simplificados siguen
+        teniendo el tiempo del recorrido completo.
+        """
+        self.print_time = cumulative_time(self.store, limits, start=self.start_point[:3])
+        self.layer_times = layer_times(self.store, self.layer_offsets)
+        return self.print_time
+
+    def simplify_segments(self, tolerance):
+        """Simplifica los segmentos ya clasificados (ver `simplify_batch`)."""
+        self.simplify_state = SimplifyState()
+        self.store = simplify_batch(self.store, tolerance, self.simplify_state)
+        self.build_layers()
+        return self.simplify_state
 
 class GcodeParser:
     comment = ""  # Comentarios globales para acceder en otras clases
@@ -349,12 +452,8 @@ class GcodeParser:
         self.lineNb = 0
         self.line = ""
 
-    def parseFile(self, path):
-        with open(path, 'r') as f:
-            for line in f:
-                self.lineNb += 1
-                self.line = line.rstrip()
-                self.model.parseLine()
+    def parseFile(self, path, mapped=False, workers=1):
+        self.model.parseFile(path, mapped=mapped, workers=workers)
         return self.model
 
     def warn(self, msg):
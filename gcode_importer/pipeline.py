@@ -0,0 +1,172 @@
+import hashlib
+
+import numpy as np
+
+from .segments import STYLE_TRAVEL, STYLE_EXTRUDE
+
+# Segmentos por lote en el modo de bajo consumo de memoria
+STREAM_BATCH_SIZE = 1 << 16
+
+# Columnas que forman la huella de una capa (ver `layer_fingerprints`)
+FINGERPRINT_COLUMNS = ("X", "Y", "Z", "F", "E", "type", "tool")
+
+
+class ClassifyState:
+    """Estado de `classify_batch` que pasa de un lote al siguiente."""
+    __slots__ = ("px", "py", "pz", "layer_idx", "layer_z")
+
+    def __init__(self):
+        self.px = self.py = self.pz = 0.0
+        self.layer_idx = 0
+        self.layer_z = 0
+
+
+def classify_batch(store, state, next_E=None):
+    """Rellena las columnas 'style' y 'layer' de `store` y actualiza `state`.
+
+    Un cambio de capa mira el E del segmento siguiente; para la última fila del
+    lote se usa `next_E` (primer E del lote siguiente, None si no hay más).
+
+    Vectorizado: una fila es candidata a cambio de capa si el segmento
+    siguiente extruye. Tras cada candidata la Z de capa vigente es la Z de esa
+    fila (cambie o no), así que hay cambio donde la Z de una candidata difiere
+    de la de la candidata anterior.
+    """
+    X = store["X"]
+    Y = store["Y"]
+    Z = store["Z"]
+    E = store["E"]
+    n = len(X)
+    if not n:
+        return state
+
+    moved = np.empty(n, dtype=bool)
+    moved[0] = X[0] != state.px or Y[0] != state.py or Z[0] != state.pz
+    moved[1:] = (X[1:] != X[:-1]) | (Y[1:] != Y[:-1]) | (Z[1:] != Z[:-1])
+    store["style"] = np.where(moved & (E > 0), STYLE_EXTRUDE, STYLE_TRAVEL).astype(np.int8)
+
+    nextE = E[1:] if next_E is None else np.append(E[1:], next_E)
+    candidates = np.flatnonzero(nextE > 0)
+    layerZ = Z[candidates]
+    previousZ = np.empty_like(layerZ)
+    previousZ[:1] = state.layer_z
+    previousZ[1:] = layerZ[:-1]
+    change = np.zeros(n, dtype=np.int32)
+    change[candidates[layerZ != previousZ]] = 1
+    layer = np.cumsum(change, dtype=np.int32)
+    layer += state.layer_idx
+    store["layer"] = layer
+
+    state.px, state.py, state.pz = X[-1].item(), Y[-1].item(), Z[-1].item()
+    state.layer_idx = int(layer[-1])
+    if len(candidates):
+        state.layer_z = layerZ[-1].item()
+    return state
+
+
+def layer_offsets(layer):
+    """Tabla (capas, 2) con el [start, stop) de cada capa en los arrays de segmentos.
+
+    `layer` es la columna 'layer' (no decreciente); una capa puede quedar vacía
+    (start == stop), p. ej. la 0 si el primer segmento ya cambia de capa.
+    """
+    count = int(layer[-1]) + 1 if len(layer) else 0
+    bounds = np.searchsorted(layer, np.arange(count + 1))
+    return np.column_stack((bounds[:-1], bounds[1:])).astype(np.int64)
+
+
+def layer_fingerprints(store, offsets):
+    """Huella (hex) del contenido de cada capa de `offsets` (ver `layer_offsets`).
+
+    Se calcula sobre las filas parseadas de la capa y no sobre sus bytes en el
+    archivo, así que sirve igual para G-code comprimido, .bgcode, .gctp o la
+    caché, y no cambia si solo cambian comentarios o la numeración de líneas.
+    """
+    columns = [np.ascontiguousarray(store[name]) for name in FINGERPRINT_COLUMNS]
+    fingerprints = []
+    for start, stop in offsets.tolist():
+        digest = hashlib.blake2b(digest_size=16)
+        for values in columns:
+            digest.update(values[start:stop])
+        fingerprints.append(digest.hexdigest())
+    return fingerprints
+
+
+def subdivide_batch(store, subd_threshold, prev):
+    """Subdivide los segmentos de `store` más largos que `subd_threshold`.
+
+    `prev` es el punto [X, Y, Z, F, E] anterior al lote. Devuelve el nuevo
+    almacén y el último punto, para encadenar lotes.
+
+    Vectorizado: cada segmento largo se parte en ceil(d / umbral) - 1 tramos
+    con los mismos puntos que daría np.linspace(prev, cur) (sin el inicial,
+    que es el final del segmento anterior) y reparte su E a partes iguales.
+    Las demás columnas (lineNb, tool, color, style, layer...) se copian del
+    segmento original, salvo la pausa, que queda solo en el último tramo.
+    """
+    cur = np.column_stack([store[axis] for axis in ("X", "Y", "Z", "F", "E")])
+    n = len(cur)
+    if not n:
+        return store.take(np.zeros(0, dtype=np.int64)), prev
+    start = np.empty_like(cur)
+    start[0] = prev
+    start[1:] = cur[:-1]
+    delta = cur - start
+    d = np.sqrt(delta[:, 0]**2 + delta[:, 1]**2 + delta[:, 2]**2)
+    split = d > subd_threshold
+
+    # Filas nuevas por segmento: 1, o ceil(d / umbral) - 1 (= div de linspace)
+    counts = np.ones(n, dtype=np.int64)
+    counts[split] = np.ceil(d[split] / subd_threshold) - 1
+    div = counts.astype(np.float64)
+    step = delta / div[:, None]
+    # np.linspace calcula (i / div) * delta si algún paso es 0, e i * paso si no
+    zero_step = (step == 0).any(axis=1)
+
+    ends = np.cumsum(counts)
+    i = np.arange(1, ends[-1] + 1, dtype=np.float64)
+    i -= np.repeat((ends - counts).astype(np.float64), counts)
+    mult = np.where(np.repeat(zero_step, counts), i / np.repeat(div, counts), i)
+    subdivided = store.repeat(counts)
+    for k, axis in enumerate(("X", "Y", "Z")):
+        y = mult * np.repeat(np.where(zero_step, delta[:, k], step[:, k]), counts)
+        y += np.repeat(start[:, k], counts)
+        y[ends - 1] = cur[:, k]  # como linspace, el último punto es exactamente cur
+        subdivided[axis] = y
+
+    E = cur[:, 4]
+    subdivided["E"] = np.repeat(np.where(split, np.where(E > 0, E / div, 0.0), E), counts)
+    subdivided["distance"] = np.repeat(np.where(split, np.nan, d), counts)
+    dwell = np.zeros(len(subdivided), dtype=np.float64)
+    dwell[ends - 1] = store["dwell"]
+    subdivided["dwell"] = dwell
+    return subdivided, cur[-1].tolist()
+
+
+def iter_subdivided(batches, subd_threshold):
+    """Etapa de subdivisión sobre un iterador de lotes."""
+    prev = [0.0, 0.0, 0.0, 0.0, 0.0]
+    for batch in batches:
+        out, prev = subdivide_batch(batch, subd_threshold, prev)
+        if len(out):
+            yield out
+
+
+def iter_classified(batches):
+    """Etapa de clasificación sobre un iterador de lotes.
+
+    Retiene un lote para conocer el primer E del siguiente (mirada adelante
+    del cambio de capa), así que en memoria hay como mucho dos lotes.
+    """
+    state = ClassifyState()
+    pending = None
+    for batch in batches:
+        if not len(batch):
+            continue
+        if pending is not None:
+            classify_batch(pending, state, batch["E"][0].item())
+            yield pending
+        pending = batch
+    if pending is not None:
+        classify_batch(pending, state)
+        yield pending
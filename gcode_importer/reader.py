@@ -0,0 +1,188 @@
+import bz2
+import gzip
+import lzma
+import mmap
+import os
+import queue
+import threading
+import time
+
+# Tamaño de bloque del lector mapeado: cada bloque se copia una vez (bytes) y
+# se procesa entero; las páginas ya leídas se devuelven al sistema.
+BLOCK_SIZE = 1 << 22
+
+# G-code comprimido que se lee directamente, por extensión (.gcode.gz, ...)
+COMPRESSED_OPENERS = {".gz": gzip.open, ".xz": lzma.open, ".bz2": bz2.open}
+# Bloques ya descomprimidos que el hilo lector puede llevar de adelanto
+READ_AHEAD = 2
+
+
+def iter_blocks(mm, size, block_size=BLOCK_SIZE, start=0):
+    """Genera (start, stop) de bloques de ~block_size bytes cortados en fin de línea.
+
+    `start` debe ser el inicio de una línea; `size` es el final del rango.
+    """
+    while start < size:
+        end = start + block_size
+        if end >= size:
+            stop = size
+        else:
+            nl = mm.find(b"\n", end)
+            stop = size if nl < 0 else nl + 1
+        yield start, stop
+        start = stop
+
+
+def _release(mm, start, stop):
+    """Descarta del RSS las páginas de [start, stop) ya procesadas."""
+    if not hasattr(mmap, "MADV_DONTNEED"):
+        return
+    aligned = start - start % mmap.PAGESIZE
+    mm.madvise(mmap.MADV_DONTNEED, aligned, stop - aligned)
+
+
+def iter_mapped(path, tokenizer, block_size=BLOCK_SIZE, start=0, stop=None, lineNb=0):
+    """Lee `path` con mmap y lo pasa al tokenizador en bloques de bytes.
+
+    No decodifica el archivo ni crea un str por línea (solo para las líneas
+    que no son movimientos G0-G3 simples), así que el pico de memoria no
+    depende del tamaño del archivo. Con `start`/`stop` (en inicios de línea)
+    solo se lee ese rango de bytes; `lineNb` es el número de líneas antes de
+    `start`. Genera el número de líneas leídas tras cada bloque. El tiempo de copiar cada bloque del archivo se suma en
+    `tokenizer.read_seconds` y el final del bloque queda en `tokenizer.read_bytes`.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if stop is not None:
+            size = min(size, stop)
+        if size <= start:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            for start, stop in iter_blocks(mm, size, block_size, start):
+                then = time.perf_counter()
+                block = mm[start:stop]
+                tokenizer.read_seconds += time.perf_counter() - then
+                lineNb = tokenizer.feed_bytes(block, lineNb)
+                tokenizer.read_bytes = stop
+                _release(mm, start, stop)
+                yield lineNb
+
+
+def read_mapped(path, tokenizer, block_size=BLOCK_SIZE, start=0, stop=None, lineNb=0):
+    """Como `iter_mapped`, de una vez. Devuelve el número de líneas leídas."""
+    for lineNb in iter_mapped(path, tokenizer, block_size, start, stop, lineNb):
+        pass
+    return lineNb
+
+
+def compressed_opener(path):
+    """Función de apertura de la biblioteca estándar para `path` comprimido, o None."""
+    return COMPRESSED_OPENERS.get(os.path.splitext(path)[1].lower())
+
+
+def _put(blocks, stop, item):
+    # Espera sitio en la cola sin quedarse colgado si el consumidor ya paró
+    while not stop.is_set():
+        try:
+            blocks.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            pass
+
+
+def _read_ahead(raw, f, block_size, blocks, stop):
+    try:
+        while not stop.is_set():
+            block = f.read(block_size)
+            _put(blocks, stop, (block, raw.tell()))
+            if not block:
+                return
+    except Exception as exc:  # se relanza en el hilo que consume
+        _put(blocks, stop, exc)
+
+
+def iter_compressed(path, tokenizer, block_size=BLOCK_SIZE):
+    """Como `iter_mapped` para un G-code comprimido (gzip, xz o bz2).
+
+    Un hilo descomprime bloques de `block_size` bytes mientras este
+    tokeniza el anterior; zlib, lzma y bz2 sueltan el GIL al descomprimir,
+    así que las dos cosas se solapan. Como mucho hay READ_AHEAD bloques en
+    cola: ni archivo temporal ni el archivo entero en memoria. Solo el
+    tiempo esperando al hilo se suma en `tokenizer.read_seconds`;
+    `tokenizer.read_bytes` es la posición en el archivo comprimido.
+    """
+    blocks = queue.Queue(READ_AHEAD)
+    stop = threading.Event()
+    lineNb = 0
+    rest = b""
+    with open(path, "rb") as raw, compressed_opener(path)(raw, "rb") as f:
+        reader = threading.Thread(target=_read_ahead, args=(raw, f, block_size, blocks, stop), daemon=True)
+        reader.start()
+        try:
+            while True:
+                then = time.perf_counter()
+                item = blocks.get()
+                tokenizer.read_seconds += time.perf_counter() - then
+                if isinstance(item, Exception):
+                    raise item
+                block, tokenizer.read_bytes = item
+                if not block:
+                    break
+                # Al tokenizador solo van líneas completas; el resto, con el siguiente
+                block = rest + block
+                end = block.rfind(b"\n") + 1
+                rest = block[end:]
+                if end:
+                    lineNb = tokenizer.feed_bytes(block[:end], lineNb)
+                    yield lineNb
+            if rest:
+                lineNb = tokenizer.feed_bytes(rest, lineNb)
+                yield lineNb
+        finally:
+            stop.set()
+            reader.join()
+
+
+def read_compressed(path, tokenizer, block_size=BLOCK_SIZE):
+    """Como `iter_compressed`, de una vez. Devuelve el número de líneas leídas."""
+    lineNb = 0
+    for lineNb in iter_compressed(path, tokenizer, block_size):
+        pass
+    return lineNb
+
+
+def iter_text_lines(path, tokenizer, block_size=BLOCK_SIZE):
+    """Líneas de `path` como texto, leídas en bloques de ~block_size bytes.
+
+    Sustituye a `for line in open(path)`; el tiempo de lectura se suma en
+    `tokenizer.read_seconds` y lo que se lleva leído del archivo (con el búfer
+    de texto por delante) queda en `tokenizer.read_bytes`.
+    """
+    with open(path, "r") as f:
+        while True:
+            then = time.perf_counter()
+            lines = f.readlines(block_size)
+            tokenizer.read_seconds += time.perf_counter() - then
+            tokenizer.read_bytes = f.buffer.tell()
+            if not lines:
+                return
+            yield from lines
+
+
+def split_lines(path, n):
+    """Divide `path` en como mucho `n` rangos (start, stop) de bytes que empiezan
+    y terminan en un límite de línea."""
+    size = os.path.getsize(path)
+    if not size:
+        return []
+    bounds = [0]
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for k in range(1, n):
+            nl = mm.find(b"\n", max(bounds[-1], size * k // n))
+            if nl < 0 or nl + 1 >= size:
+                break
+            bounds.append(nl + 1)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
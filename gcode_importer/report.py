@@ -0,0 +1,172 @@
+import cProfile
+import io
+import json
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+
+# Funciones que se muestran del perfil de cProfile (por tiempo acumulado)
+PROFILE_LINES = 25
+
+
+class Stage:
+    """Una etapa del informe: tiempo, recuento opcional y pico de memoria."""
+    __slots__ = ("name", "seconds", "count", "unit", "peak_bytes", "children")
+
+    def __init__(self, name, seconds=0.0, count=None, unit=""):
+        self.name = name
+        self.seconds = seconds
+        self.count = count
+        self.unit = unit
+        self.peak_bytes = None
+        self.children = []
+
+    def add(self, name, seconds, count=None, unit=""):
+        """Añade una subetapa ya medida (p. ej. lectura dentro del parseo)."""
+        child = Stage(name, seconds, count, unit)
+        self.children.append(child)
+        return child
+
+    def to_dict(self):
+        out = {"name": self.name, "seconds": self.seconds}
+        if self.count is not None:
+            out["count"] = self.count
+            out["unit"] = self.unit
+        if self.peak_bytes is not None:
+            out["peak_bytes"] = self.peak_bytes
+        if self.children:
+            out["children"] = [child.to_dict() for child in self.children]
+        return out
+
+
+class ImportReport:
+    """Informe estructurado de una importación: una `Stage` por etapa, en orden.
+
+    Con `trace_memory` se activa `tracemalloc` y cada etapa guarda cuánta
+    memoria extra llegó a usar (pico menos lo que ya había al empezar; numpy
+    también registra sus arrays). Con `profile` toda la importación corre
+    bajo cProfile y el resumen queda en `profile_text`. Ambos frenan la
+    importación, así que van aparte del cronometraje, que siempre está.
+    """
+
+    def __init__(self, source=None, trace_memory=False, profile=False):
+        self.source = source
+        self.trace_memory = trace_memory
+        self.profile = profile
+        self.stages = []
+        self.seconds = None
+        self.profile_text = None
+        self._accumulated = {}
+        self._depth = {}
+        self._profiler = None
+        self._started_tracing = False
+        self._then = None
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._then = time.perf_counter()
+        return self
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self._then
+        if self._profiler is not None:
+            self._profiler.disable()
+            text = io.StringIO()
+            pstats.Stats(self._profiler, stream=text).sort_stats("cumulative").print_stats(PROFILE_LINES)
+            self.profile_text = text.getvalue()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return self
+
+    def dump_profile(self, path):
+        """Guarda el perfil completo en formato pstats (para snakeviz, etc.)."""
+        if self._profiler is not None:
+            self._profiler.dump_stats(path)
+
+    @contextmanager
+    def stage(self, name, count=None, unit=""):
+        """Cronometra el bloque como la etapa `name`; el recuento se puede
+        fijar después en el `Stage` que devuelve."""
+        stage = Stage(name, count=count, unit=unit)
+        self.stages.append(stage)
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        then = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.seconds = time.perf_counter() - then
+            if tracing and tracemalloc.is_tracing():
+                stage.peak_bytes = max(tracemalloc.get_traced_memory()[1] - baseline, 0)
+
+    def timed(self, name, function):
+        """Envuelve `function` para sumar su tiempo en `accumulated(name)`.
+
+        Las llamadas anidadas con el mismo nombre (p. ej. do_G1, que llama a
+        apply_moves) solo cuentan una vez.
+        """
+        accumulated = self._accumulated
+        depth = self._depth
+        accumulated.setdefault(name, 0.0)
+        depth.setdefault(name, 0)
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if depth[name]:
+                return function(*args, **kwargs)
+            depth[name] = 1
+            then = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                accumulated[name] += time.perf_counter() - then
+                depth[name] = 0
+        return wrapper
+
+    def accumulated(self, name):
+        return self._accumulated.get(name, 0.0)
+
+    def lines(self):
+        """Resumen legible, una línea por etapa y subetapa."""
+        out = []
+        if self.source:
+            out.append(f"Importación de {self.source}")
+
+        def describe(stage, indent):
+            text = f"{indent}{stage.name}: {stage.seconds:.3f} s"
+            if stage.count is not None:
+                text += f", {stage.count} {stage.unit}".rstrip()
+            if stage.peak_bytes is not None:
+                text += f", pico {stage.peak_bytes / (1 << 20):.1f} MB"
+            out.append(text)
+            for child in stage.children:
+                describe(child, indent + "  ")
+
+        for stage in self.stages:
+            describe(stage, "")
+        if self.seconds is not None:
+            out.append(f"Total: {self.seconds:.3f} s")
+        return out
+
+    def to_dict(self):
+        return {
+            "source": self.source,
+            "seconds": self.seconds,
+            "trace_memory": self.trace_memory,
+            "stages": [stage.to_dict() for stage in self.stages],
+            "profile": self.profile_text,
+        }
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=1)
@@ -0,0 +1,284 @@
+import array
+import numpy as np
+
+# Códigos de la columna 'style'
+STYLE_NONE = -1
+STYLE_TRAVEL = 0
+STYLE_EXTRUDE = 1
+STYLE_NAMES = {STYLE_NONE: None, STYLE_TRAVEL: "travel", STYLE_EXTRUDE: "extrude"}
+
+# Códigos de la columna 'type'
+MOVE_TYPES = ("G0", "G1", "G2", "G3")
+MOVE_CODES = {code: i for i, code in enumerate(MOVE_TYPES)}
+
+COLOR_CHANNELS = 8  # RGBCMYKW
+
+
+class SegmentStore:
+    """Almacén columnar (struct-of-arrays) de segmentos.
+
+    Durante el parseo las filas se acumulan en buffers `array.array` (crecen sin
+    copias cuadráticas y ocupan lo mismo que el array numpy final); al leer una
+    columna se vuelcan a arrays numpy contiguos. El color se guarda como una
+    tabla de tramos: `color_starts[k]` es el primer segmento con `color_values[k]`.
+    """
+
+    # Columnas rellenadas durante el parseo, en el orden de `append`
+    PARSED_COLUMNS = {
+        "X": np.float64,
+        "Y": np.float64,
+        "Z": np.float64,
+        "F": np.float64,
+        "E": np.float64,
+        "type": np.int8,
+        "tool": np.int32,
+        "lineNb": np.int64,
+    }
+    # Columnas calculadas después del parseo: nombre: (dtype, valor inicial)
+    DERIVED_COLUMNS = {
+        "style": (np.int8, STYLE_NONE),
+        "layer": (np.int32, -1),
+        "distance": (np.float64, np.nan),
+        "dwell": (np.float64, 0.0),  # pausa (s) tras el segmento, de G4
+        "time": (np.float64, np.nan),  # instante (s) en que termina el segmento
+    }
+
+    def __init__(self):
+        self.columns = {
+            name: np.empty(0, dtype=dtype)
+            for name, dtype in self.PARSED_COLUMNS.items()
+        }
+        for name, (dtype, _) in self.DERIVED_COLUMNS.items():
+            self.columns[name] = np.empty(0, dtype=dtype)
+        self.color_starts = np.zeros(0, dtype=np.int64)
+        self.color_values = np.zeros((0, COLOR_CHANNELS), dtype=np.float64)
+        self._size = 0
+        self._reset_pending()
+
+    @classmethod
+    def from_arrays(cls, columns, color_starts, color_values):
+        """Almacén sobre arrays ya existentes (p. ej. mapeados desde la caché), sin copiarlos."""
+        store = cls()
+        store.columns.update(columns)
+        store._size = len(next(iter(columns.values()))) if columns else 0
+        store.color_starts = color_starts
+        store.color_values = color_values
+        return store
+
+    def _reset_pending(self):
+        # Filas intercaladas: (X, Y, Z, F, E) en floats y (type, tool, lineNb) en enteros
+        self._pending_floats = array.array("d")
+        self._pending_ints = array.array("q")
+        self._pending_colors = []
+        self._pending_dwells = []
+
+    def __len__(self):
+        return self._size + len(self._pending_ints) // 3
+
+    def append(self, x, y, z, f, e, move_type, tool, lineNb):
+        self._pending_floats.extend((x, y, z, f, e))
+        self._pending_ints.extend((move_type, tool, lineNb))
+
+    def extend(self, xyz, F, E, types, tool, lineNbs):
+        """Añade un bloque de filas ya calculadas (arrays numpy de igual longitud)."""
+        n = len(xyz)
+        if not n:
+            return
+        floats = np.empty((n, 5), dtype=np.float64)
+        floats[:, :3] = xyz
+        floats[:, 3] = F
+        floats[:, 4] = E
+        ints = np.empty((n, 3), dtype=np.int64)
+        ints[:, 0] = types
+        ints[:, 1] = tool
+        ints[:, 2] = lineNbs
+        self._pending_floats.frombytes(floats.tobytes())
+        self._pending_ints.frombytes(ints.tobytes())
+
+    def set_color(self, color):
+        """Abre un tramo de color que empieza en el próximo segmento."""
+        start = len(self)
+        if self._pending_colors and self._pending_colors[-1][0] == start:
+            self._pending_colors[-1] = (start, tuple(color))
+        else:
+            self._pending_colors.append((start, tuple(color)))
+
+    def add_dwell(self, seconds):
+        """Suma una pausa de `seconds` tras el último segmento añadido."""
+        n = len(self)
+        if n and seconds > 0:
+            self._pending_dwells.append((n - 1, seconds))
+
+    def flush(self):
+        """Vuelca los buffers de parseo a los arrays numpy."""
+        n = len(self._pending_ints) // 3
+        if n:
+            floats = np.frombuffer(self._pending_floats, dtype=np.float64).reshape(n, 5)
+            ints = np.frombuffer(self._pending_ints, dtype=np.int64).reshape(n, 3)
+            chunks = (*floats.T, *ints.T)
+            for (name, dtype), chunk in zip(self.PARSED_COLUMNS.items(), chunks):
+                self.columns[name] = np.concatenate((self.columns[name], chunk.astype(dtype)))
+            for name, (dtype, fill) in self.DERIVED_COLUMNS.items():
+                self.columns[name] = np.concatenate((self.columns[name], np.full(n, fill, dtype=dtype)))
+            self._size += n
+        if self._pending_colors:
+            starts = np.array([s for s, _ in self._pending_colors], dtype=np.int64)
+            values = np.array([c for _, c in self._pending_colors], dtype=np.float64)
+            # Un tramo nuevo en la misma posición que el último sustituye al anterior
+            if len(self.color_starts) and self.color_starts[-1] == starts[0]:
+                self.color_starts = self.color_starts[:-1]
+                self.color_values = self.color_values[:-1]
+            self.color_starts = np.concatenate((self.color_starts, starts))
+            self.color_values = np.concatenate((self.color_values, values.reshape(-1, COLOR_CHANNELS)))
+        if self._pending_dwells:
+            rows, seconds = zip(*self._pending_dwells)
+            dwell = self.columns["dwell"]
+            if not dwell.flags.writeable:
+                dwell = self.columns["dwell"] = dwell.copy()
+            np.add.at(dwell, np.array(rows, dtype=np.int64), seconds)
+        if n or self._pending_colors or self._pending_dwells:
+            self._reset_pending()
+
+    def __getitem__(self, name):
+        self.flush()
+        return self.columns[name]
+
+    def __setitem__(self, name, values):
+        self.flush()
+        self.columns[name] = values
+
+    def color_index(self, indices):
+        """Índice en la tabla de colores de cada segmento de `indices`."""
+        self.flush()
+        return np.searchsorted(self.color_starts, indices, side="right") - 1
+
+    def take(self, indices):
+        """Nuevo almacén con las filas `indices` (ordenadas) y sus tramos de color."""
+        self.flush()
+        indices = np.asarray(indices, dtype=np.int64)
+        out = SegmentStore()
+        out.columns = {name: col[indices] for name, col in self.columns.items()}
+        out._size = len(indices)
+        out._set_color_runs(np.searchsorted(indices, self.color_starts, side="left"), self.color_values)
+        return out
+
+    def repeat(self, counts):
+        """Nuevo almacén con la fila i repetida `counts[i]` veces (np.repeat por columna)."""
+        self.flush()
+        out = SegmentStore()
+        out.columns = {name: np.repeat(col, counts) for name, col in self.columns.items()}
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        out._size = int(offsets[-1])
+        out._set_color_runs(offsets[self.color_starts], self.color_values)
+        return out
+
+    def _set_color_runs(self, starts, values):
+        # Si varios tramos colapsan en la misma fila se queda el último
+        keep = np.append(starts[1:] != starts[:-1], True) if len(starts) else starts.astype(bool)
+        keep &= starts < max(self._size, 1)
+        self.color_starts = starts[keep]
+        self.color_values = values[keep]
+        if len(self.color_starts):
+            self.color_starts[0] = 0
+
+    def pop(self, n):
+        """Separa y devuelve las primeras `n` filas; el almacén se queda con el resto."""
+        self.flush()
+        n = min(n, self._size)
+        head = self.take(np.arange(n))
+        rest = self.take(np.arange(n, self._size))
+        self.columns = rest.columns
+        self._size = rest._size
+        self.color_starts = rest.color_starts
+        self.color_values = rest.color_values
+        return head
+
+
+class Segment:
+    """Vista de compatibilidad (solo lectura) de una fila del SegmentStore.
+
+    Permite que los scripts existentes sigan usando `model.segments[i].coords['X']`.
+    """
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    def _get(self, name):
+        return self._store[name][self._index].item()
+
+    @property
+    def coords(self):
+        return {axis: self._get(axis) for axis in ("X", "Y", "Z", "F", "E")}
+
+    @property
+    def type(self):
+        return MOVE_TYPES[self._get("type")]
+
+    @property
+    def color(self):
+        k = self._store.color_index(self._index)
+        return self._store.color_values[k].tolist() if k >= 0 else [0.0] * COLOR_CHANNELS
+
+    @property
+    def toolnumber(self):
+        return self._get("tool")
+
+    @property
+    def lineNb(self):
+        return self._get("lineNb")
+
+    @property
+    def line(self):
+        # El texto de cada línea ya no se conserva (memoria); usar lineNb
+        return None
+
+    @property
+    def style(self):
+        return STYLE_NAMES[self._get("style")]
+
+    @property
+    def layerIdx(self):
+        layer = self._get("layer")
+        return None if layer < 0 else layer
+
+    @property
+    def distance(self):
+        d = self._get("distance")
+        return None if d != d else d
+
+    def __str__(self):
+        return f" <coords={self.coords}, lineNb={self.lineNb}, style={self.style}, layerIdx={self.layerIdx}, color={self.color}>"
+
+
+class SegmentList:
+    """Secuencia de `Segment` sobre un rango [start, stop) del almacén, sin copias."""
+
+    def __init__(self, store, start=0, stop=None):
+        self._store = store
+        self.start = start
+        self.stop = len(store) if stop is None else stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                return [self[j] for j in range(start, stop, step)]
+            return SegmentList(self._store, self.start + start, self.start + max(start, stop))
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("segment index out of range")
+        return Segment(self._store, self.start + i)
+
+    def __iter__(self):
+        for i in range(self.start, self.stop):
+            yield Segment(self._store, i)
+
+    def column(self, name):
+        """Slice (vista numpy) de una columna para este rango."""
+        return self._store[name][self.start:self.stop]
@@ -0,0 +1,181 @@
+import numpy as np
+
+# Seno máximo del ángulo entre dos tramos para considerarlos colineales
+COLLINEAR_EPS = 1e-9
+
+
+class SimplifyState:
+    """Estado de `simplify_batch` entre lotes y recuento de puntos."""
+    __slots__ = ("prev", "before", "after")
+
+    def __init__(self):
+        self.prev = None  # último punto del lote anterior
+        self.before = 0
+        self.after = 0
+
+    @property
+    def ratio(self):
+        return self.before / self.after if self.after else 1.0
+
+
+def run_bounds(store):
+    """Tramos [start, stop) de filas seguidas con el mismo estilo, capa,
+    herramienta y color: la simplificación nunca une segmentos de dos tramos."""
+    n = len(store)
+    change = np.zeros(n, dtype=bool)
+    if n:
+        change[0] = True
+    for name in ("style", "layer", "tool"):
+        column = store[name]
+        change[1:] |= column[1:] != column[:-1]
+    change[store.color_starts[store.color_starts < n]] = True
+    starts = np.flatnonzero(change)
+    return starts, np.append(starts[1:], n)
+
+
+def _dot(u, v):
+    return u[0] * v[0] + u[1] * v[1] + u[2] * v[2]
+
+
+def segment_distance(points, a, b):
+    """Distancia de cada punto de `points` al segmento a-b.
+
+    Los tres son arrays (3, n), con una fila por coordenada: así cada
+    operación recorre arrays contiguos de una dimensión.
+    """
+    ab = b - a
+    ap = points - a
+    length2 = _dot(ab, ab)
+    t = _dot(ap, ab)
+    np.divide(t, length2, out=t, where=length2 > 0)
+    t[length2 == 0] = 0.0
+    np.clip(t, 0.0, 1.0, out=t)
+    ap -= t * ab
+    return np.sqrt(_dot(ap, ap))
+
+
+def collinear_mask(points, starts, stops):
+    """Puntos interiores de cada polilínea [start, stop) que están alineados
+    con sus vecinos y avanzan en el mismo sentido. `points` es (3, n)."""
+    n = points.shape[1]
+    mask = np.zeros(n, dtype=bool)
+    if n < 3:
+        return mask
+    u = points[:, 1:-1] - points[:, :-2]
+    v = points[:, 2:] - points[:, 1:-1]
+    cross = np.cross(u, v, axis=0)
+    sin2 = _dot(cross, cross)
+    norms2 = _dot(u, u) * _dot(v, v)
+    mask[1:-1] = (sin2 <= COLLINEAR_EPS**2 * norms2) & (_dot(u, v) > 0)
+    mask[starts] = False
+    mask[stops - 1] = False
+    return mask
+
+
+def anchor_mask(points, starts, stops, tolerance):
+    """Extremos de cada polilínea [start, stop) y puntos interiores que se
+    separan más de `tolerance` de la cuerda entre sus vecinos.
+
+    Esos puntos no se podrían quitar ni uniendo solo a sus vecinos, así que
+    se conservan de entrada y RDP trabaja sobre los trozos entre ellos: el
+    resultado sigue dentro de la tolerancia y, en trayectorias curvas y
+    densas, evita recorrer los mismos puntos en cada nivel de RDP.
+    """
+    anchors = np.zeros(points.shape[1], dtype=bool)
+    if points.shape[1] >= 3:
+        anchors[1:-1] = segment_distance(points[:, 1:-1], points[:, :-2], points[:, 2:]) > tolerance
+    anchors[starts] = True
+    anchors[stops - 1] = True
+    return anchors
+
+
+def rdp_mask(points, starts, stops, tolerance):
+    """Ramer–Douglas–Peucker sobre todas las polilíneas [start, stop) a la vez.
+
+    En vez de recursión, cada pasada procesa todos los intervalos pendientes
+    de todas las polilíneas: busca el punto interior más alejado de la cuerda
+    y, si supera `tolerance`, lo conserva y parte el intervalo en dos.
+    `points` es (3, n). Devuelve la máscara de puntos conservados (los
+    extremos siempre lo son).
+    """
+    keep = np.zeros(points.shape[1], dtype=bool)
+    keep[starts] = True
+    keep[stops - 1] = True
+    a = np.asarray(starts, dtype=np.int64)
+    b = np.asarray(stops, dtype=np.int64) - 1
+    while True:
+        inner = b - a - 1
+        pending = inner > 0
+        a, b, inner = a[pending], b[pending], inner[pending]
+        if not len(a):
+            return keep
+        ends = np.cumsum(inner)
+        first = ends - inner
+        idx = np.arange(ends[-1]) + np.repeat(a + 1 - first, inner)
+        d = segment_distance(
+            points[:, idx],
+            np.repeat(points[:, a], inner, axis=1),
+            np.repeat(points[:, b], inner, axis=1),
+        )
+        dmax = np.maximum.reduceat(d, first)
+        # Primer punto de cada intervalo con la distancia máxima
+        pos = np.where(d == np.repeat(dmax, inner), np.arange(len(d)), len(d))
+        far = idx[np.minimum.reduceat(pos, first)]
+        split = dmax > tolerance
+        keep[far[split]] = True
+        a = np.concatenate((a[split], far[split]))
+        b = np.concatenate((far[split], b[split]))
+
+
+def simplify_batch(store, tolerance, state):
+    """Quita de `store` los puntos que sobran para seguir la trayectoria a
+    menos de `tolerance`, dentro de cada tramo de `run_bounds`.
+
+    Cada tramo se simplifica como la polilínea que empieza en el final del
+    tramo anterior (o en `state.prev`, el último punto del lote anterior);
+    la última fila de cada tramo y del lote se conservan siempre. Una fila
+    eliminada suma su E y su pausa a la siguiente conservada, y la 'distance' de las
+    filas que absorben a otras queda como desconocida (NaN).
+    """
+    n = len(store)
+    state.before += n
+    if not n:
+        return store
+    # Puntos (3, n + 1): el anterior a la primera fila y, en k + 1, el final de la fila k
+    points = np.empty((3, n + 1), dtype=np.float64)
+    for k, axis in enumerate(("X", "Y", "Z")):
+        points[k, 1:] = store[axis]
+    points[:, 0] = points[:, 1] if state.prev is None else state.prev
+    starts, stops = run_bounds(store)
+    stops = stops + 1  # la polilínea de las filas [s, e) son los puntos [s, e + 1)
+
+    # Anclas y colineales primero (barato), y RDP entre anclas sobre lo que queda
+    anchors = np.flatnonzero(anchor_mask(points, starts, stops, tolerance))
+    starts, stops = anchors[:-1], anchors[1:] + 1
+    kept = np.flatnonzero(~collinear_mask(points, starts, stops))
+    remap = np.searchsorted(kept, starts), np.searchsorted(kept, stops - 1) + 1
+    keep = kept[rdp_mask(points[:, kept], *remap, tolerance)]
+    keep = keep[keep > 0] - 1
+    if state.prev is None and keep[0] != 0:
+        keep = np.concatenate(([0], keep))
+
+    out = store.take(keep)
+    # El E de las filas eliminadas pasa a la siguiente conservada
+    groups = np.concatenate(([0], keep[:-1] + 1))
+    out["E"] = np.add.reduceat(store["E"], groups)
+    out["dwell"] = np.add.reduceat(store["dwell"], groups)
+    merged = keep - groups > 0
+    if merged.any():
+        distance = out["distance"].copy()
+        distance[merged] = np.nan
+        out["distance"] = distance
+    state.prev = points[:, -1].copy()
+    state.after += len(out)
+    return out
+
+
+def iter_simplified(batches, tolerance, state=None):
+    """Etapa de simplificación sobre un iterador de lotes clasificados."""
+    state = state or SimplifyState()
+    for batch in batches:
+        yield simplify_batch(batch, tolerance, state)
@@ -0,0 +1,121 @@
+import numpy as np
+
+from .pipeline import layer_offsets
+
+
+class ToolpathPosition:
+    """Punto del recorrido: segmento, XYZ interpolado, capa y línea de G-code.
+
+    En una consulta con varios valores cada atributo es un array.
+    """
+    __slots__ = ("index", "xyz", "layer", "lineNb")
+
+    def __init__(self, index, xyz, layer, lineNb):
+        self.index = index
+        self.xyz = xyz
+        self.layer = layer
+        self.lineNb = lineNb
+
+    def __repr__(self):
+        return f"<ToolpathPosition index={self.index} layer={self.layer} lineNb={self.lineNb}>"
+
+
+class ToolpathIndex:
+    """Índice de una polilínea importada para ir de un instante, un frame o
+    una fracción del recorrido al segmento correspondiente en O(log n).
+
+    El punto i es el final del segmento i, que empieza en el punto i - 1.
+    `time[i]` es el instante (s, desde el primer punto) en que se llega al
+    punto i y `distance[i]` la longitud recorrida hasta él; los dos crecen,
+    así que cada consulta es un `np.searchsorted`, igual que la capa con
+    `layer_starts` (primera fila de cada capa, de `layer_offsets`). Las
+    pausas (G4) se pasan dispersas y retrasan el arranque del segmento
+    siguiente. `time` es None si no se estimó el tiempo de impresión.
+    """
+    __slots__ = ("xyz", "lineNb", "layer_starts", "distance", "time", "begin")
+
+    def __init__(self, xyz, lineNb, layer_starts, time=None, dwell_rows=(), dwells=()):
+        self.xyz = np.asarray(xyz, dtype=np.float64)
+        self.lineNb = np.asarray(lineNb)
+        self.layer_starts = np.asarray(layer_starts, dtype=np.int64)
+        self.distance = np.zeros(len(self.xyz), dtype=np.float64)
+        if len(self.xyz):
+            np.cumsum(np.linalg.norm(np.diff(self.xyz, axis=0), axis=1), out=self.distance[1:])
+        self.time = self.begin = None
+        if time is not None and len(time) and not np.isnan(time).any():
+            self.time = np.asarray(time, dtype=np.float64)
+            # Instante en que empieza a moverse cada segmento, tras la pausa del anterior
+            self.begin = np.empty_like(self.time)
+            self.begin[0] = self.time[0]
+            self.begin[1:] = self.time[:-1]
+            rows = np.asarray(dwell_rows, dtype=np.int64)
+            keep = rows + 1 < len(self.begin)
+            self.begin[rows[keep] + 1] += np.asarray(dwells, dtype=np.float64)[keep]
+
+    @classmethod
+    def from_store(cls, store):
+        """Índice de los puntos de `store`; usa su columna 'time' si está rellenada."""
+        xyz = np.column_stack((store["X"], store["Y"], store["Z"]))
+        time = store["time"]
+        dwell = store["dwell"]
+        rows = np.flatnonzero(dwell)
+        return cls(
+            xyz,
+            store["lineNb"],
+            layer_offsets(store["layer"])[:, 0],
+            time - time[0] if len(time) else time,
+            rows,
+            dwell[rows],
+        )
+
+    def __len__(self):
+        return len(self.xyz)
+
+    @property
+    def duration(self):
+        return float(self.time[-1]) if self.time is not None else None
+
+    def _position(self, index, frac):
+        # Punto `frac` (0..1) del segmento `index`, que va del punto index - 1 al index
+        start = self.xyz[np.maximum(index - 1, 0)]
+        xyz = start + (self.xyz[index] - start) * np.asarray(frac)[..., None]
+        layer = np.searchsorted(self.layer_starts, index, side="right") - 1
+        return ToolpathPosition(index, xyz, layer, self.lineNb[index])
+
+    def at_time(self, t):
+        """Posición en el instante `t` (s desde el primer punto), en O(log n).
+
+        Dentro de cada segmento se interpola linealmente en el tiempo; antes
+        del inicio se queda en el primer punto y después en el último. Sin
+        puntos devuelve None.
+        """
+        if not len(self):
+            return None
+        if self.time is None:
+            raise ValueError("toolpath has no print time")
+        t = np.clip(np.asarray(t, dtype=np.float64), 0.0, self.time[-1])
+        index = np.minimum(np.searchsorted(self.time, t, side="left"), len(self.time) - 1)
+        span = self.time[index] - self.begin[index]
+        frac = np.divide(t - self.begin[index], span, out=np.ones_like(t), where=span > 0)
+        return self._position(index, np.clip(frac, 0.0, 1.0))
+
+    def at_factor(self, factor):
+        """Posición a la fracción `factor` (0..1) de la longitud del recorrido,
+        el mismo parámetro que Follow Path y Trim Curve. Sin puntos devuelve None."""
+        if not len(self):
+            return None
+        d = np.clip(np.asarray(factor, dtype=np.float64), 0.0, 1.0) * self.distance[-1]
+        index = np.minimum(np.searchsorted(self.distance, d, side="left"), len(self.distance) - 1)
+        span = self.distance[index] - self.distance[np.maximum(index - 1, 0)]
+        frac = np.divide(d - self.distance[index] + span, span, out=np.ones_like(d), where=span > 0)
+        return self._position(index, frac)
+
+    def at_frame(self, frame, frame_start=1, fps=24.0, time_scale=1.0):
+        """Posición en `frame` cuando la animación empieza en `frame_start` y
+        cada segundo de animación (`fps` frames) son `time_scale` segundos de
+        impresión, como en las claves de la animación al ritmo real."""
+        return self.at_time((np.asarray(frame, dtype=np.float64) - frame_start) / fps * time_scale)
+
+    def frame_of(self, index, frame_start=1, fps=24.0, time_scale=1.0):
+        """Frame en el que se llega al final del segmento `index`."""
+        return frame_start + self.time[index] * fps / time_scale
@@ -0,0 +1,230 @@
+import re
+from functools import partial
+
+import numpy as np
+
+# Movimientos G0/G1 (y arcos G2/G3) "limpios": solo palabras de eje numéricas
+# separadas por espacios y un comentario opcional. Es el >95% de un archivo
+# típico; el resto de líneas pasa por el camino genérico.
+MOVE_RE = re.compile(
+    r"(G[01](?:[ \t]+[XYZFE][-+]?(?:\d+\.?\d*|\.\d+))*"
+    r"|G[23](?:[ \t]+[XYZFEIJKR][-+]?(?:\d+\.?\d*|\.\d+))*)[ \t]*(?:;(.*))?$",
+    re.ASCII,
+)
+
+MOTION_CODES = ("G0", "G1", "G2", "G3")
+AXES = ("X", "Y", "Z", "F", "E")
+# Palabras de un movimiento: los ejes y, en los arcos, el centro (I, J, K) o el radio (R)
+WORDS = AXES + ("I", "J", "K", "R")
+
+# Para separar las palabras de un lote: solo letras de eje (y saltos de línea)
+# o solo números, sin pasar por Python palabra a palabra.
+_KEEP_LETTERS = str.maketrans("", "", "0123456789+-. \t")
+_KEEP_NUMBERS = str.maketrans({word: " " for word in WORDS})
+_AXIS_INDEX = np.full(256, -1, dtype=np.intp)
+for _i, _word in enumerate(WORDS):
+    _AXIS_INDEX[ord(_word)] = _i
+
+# Equivalentes en bytes para `feed_bytes` (lector mmap). SPAN_RE consume de
+# una vez todas las líneas seguidas que son movimientos limpios, vacías o solo
+# comentario; solo las demás líneas pasan por Python una a una.
+# Cuantificadores posesivos (Python 3.11+) para no retroceder dentro de una línea.
+_NUMBER_B = rb"[-+]?+(?:\d++(?:\.\d*+)?+|\.\d++)"
+SPAN_RE = re.compile(
+    rb"(?:(?:G[01](?:[ \t]++[XYZFE]" + _NUMBER_B + rb")*+"
+    rb"|G[23](?:[ \t]++[XYZFEIJKR]" + _NUMBER_B + rb")*+)[ \t\r]*+(?:;[^\n]*+)?+\n"
+    rb"|[ \t\r]*+(?:;[^\n]*+)?+\n)*+"
+)
+_COMMENT_B = re.compile(rb";[^\n]*")
+_NOT_WORDS_B = b"0123456789+-. \t\r"
+_KEEP_NUMBERS_B = bytes.maketrans(b"XYZFEIJKRG", b"          ")
+# En los bytes la 'G' del código se conserva: su número (0-3) va a la última columna
+_WORD_INDEX_B = _AXIS_INDEX.copy()
+_WORD_INDEX_B[ord("G")] = len(WORDS)
+
+
+def parse_words(args):
+    """Convierte 'X10 Y2.5 E' en {'X': 10.0, 'Y': 2.5, 'E': 1.0}."""
+    dic = {}
+    if args:
+        for bit in args.split():
+            letter = bit[0]
+            try:
+                coord = float(bit[1:])
+            except ValueError:
+                coord = 1.0
+            dic[letter] = coord
+    return dic
+
+
+def words_to_array(words):
+    """Convierte una lista de cadenas ' X10 Y2.5' (palabras de MOVE_RE) en un
+    array (n, 9) de X, Y, Z, F, E, I, J, K, R con NaN en las palabras ausentes.
+
+    Si un eje se repite en la misma línea gana la última palabra, como en
+    `parse_words`.
+    """
+    vals = np.full((len(words), len(WORDS)), np.nan, dtype=np.float64)
+    text = "\n".join(words)
+    letters = np.frombuffer(text.translate(_KEEP_LETTERS).encode("ascii"), dtype=np.uint8)
+    newline = letters == ord("\n")
+    rows = np.cumsum(newline)[~newline]
+    cols = _AXIS_INDEX[letters[~newline]]
+    vals[rows, cols] = np.array(text.translate(_KEEP_NUMBERS).split(), dtype=np.float64)
+    return vals
+
+
+def _span_to_array(span, nrows):
+    """Como `words_to_array`, pero sobre `nrows` líneas en bytes consumidas por
+    SPAN_RE. Devuelve (nrows, 10): las palabras de WORDS y el código G (0-3);
+    las líneas vacías o de comentario quedan como filas de NaN."""
+    vals = np.full((nrows, len(WORDS) + 1), np.nan, dtype=np.float64)
+    if b";" in span:
+        span = _COMMENT_B.sub(b"", span)
+    letters = np.frombuffer(span.translate(None, _NOT_WORDS_B), dtype=np.uint8)
+    newline = letters == ord("\n")
+    rows = np.cumsum(newline)[~newline]
+    cols = _WORD_INDEX_B[letters[~newline]]
+    vals[rows, cols] = np.array(span.translate(_KEEP_NUMBERS_B).split(), dtype=np.float64)
+    return vals
+
+
+def _last_comment(block, lo, hi):
+    """Comentario de la última línea de block[lo:hi] que tenga ';', o None.
+
+    `lo` debe ser el inicio de una línea.
+    """
+    p = block.rfind(b";", lo, hi)
+    if p < 0:
+        return None
+    line_start = block.rfind(b"\n", lo, p) + 1 or lo
+    first = block.index(b";", line_start, p + 1)
+    end = block.find(b"\n", first, hi)
+    if end < 0:
+        end = hi
+    return block[first + 1:end].decode("utf-8", "replace").rstrip()
+
+
+class GcodeTokenizer:
+    """Tokeniza líneas de G-code y las despacha a los métodos do_* del modelo.
+
+    La tabla de despacho se construye una sola vez por modelo. Las líneas G0-G3
+    bien formadas se reconocen con una única expresión regular que extrae las
+    palabras de eje directamente y se acumulan en un lote; el lote se aplica de
+    forma vectorizada (`GcodeModel.apply_moves`) antes de cualquier otro comando
+    que dependa del estado modal. El resto de líneas sigue el camino genérico,
+    que reproduce exactamente el comportamiento de `parseLine` original.
+    """
+
+    BATCH_SIZE = 65536
+
+    def __init__(self, model, fast=True):
+        self.model = model
+        self.parser = model.parser
+        self.fast = fast
+        self.dispatch = {}
+        for name in dir(model):
+            if name.startswith("do_"):
+                code = name[3:]
+                method = getattr(model, name)
+                if code in MOTION_CODES:
+                    method = partial(method, type=code)
+                self.dispatch[code] = method
+        self._codes = []
+        self._words = []
+        self._lines = []
+        self.read_seconds = 0.0  # tiempo de lectura del archivo (lo suman los lectores)
+        self.read_bytes = 0  # posición alcanzada en el archivo (la fijan los lectores)
+
+    def feed(self, line):
+        if self.fast:
+            m = MOVE_RE.match(line)
+            if m is not None:
+                move, comment = m.groups()
+                if comment is not None:
+                    self.parser.comment = comment
+                self._codes.append(move[1])
+                self._words.append(move[2:])
+                self._lines.append(self.parser.lineNb)
+                if len(self._lines) >= self.BATCH_SIZE:
+                    self.flush()
+                return
+        self.feed_generic(line)
+
+    def flush(self):
+        """Aplica los movimientos pendientes del lote al modelo."""
+        if not self._lines:
+            return
+        self.model.apply_moves(
+            words_to_array(self._words),
+            np.frombuffer("".join(self._codes).encode("ascii"), dtype=np.uint8).astype(np.int8) - ord("0"),
+            np.array(self._lines, dtype=np.int64),
+        )
+        self._codes = []
+        self._words = []
+        self._lines = []
+
+    def feed_bytes(self, block, lineNb):
+        """Procesa un bloque de líneas completas en bytes sin crear un str por línea.
+
+        `lineNb` es el número de líneas anteriores al bloque; devuelve el
+        número de la última línea del bloque. Los tramos que consume SPAN_RE
+        se convierten a arrays directamente desde los bytes; solo el resto de
+        líneas se decodifica y pasa por `feed_generic`. Las líneas se separan
+        por LF (CRLF también sirve).
+        """
+        self.flush()
+        pos = 0
+        size = len(block)
+        while pos < size:
+            end = SPAN_RE.match(block, pos).end()
+            if end > pos:
+                lineNb = self._feed_span(block[pos:end], lineNb)
+                comment = _last_comment(block, pos, end)
+                if comment is not None:
+                    self.parser.comment = comment
+                if end >= size:
+                    break
+            line_end = block.find(b"\n", end)
+            if line_end < 0:
+                line_end = size
+            lineNb += 1
+            self.parser.lineNb = lineNb
+            self.parser.line = block[end:line_end].decode("utf-8", "replace").rstrip()
+            self.feed_generic(self.parser.line)
+            pos = line_end + 1
+        self.parser.lineNb = lineNb
+        return lineNb
+
+    def _feed_span(self, span, lineNb):
+        nrows = span.count(b"\n")
+        vals = _span_to_array(span, nrows)
+        is_move = ~np.isnan(vals[:, -1])
+        if is_move.any():
+            self.model.apply_moves(
+                vals[is_move, :-1],
+                vals[is_move, -1].astype(np.int8),
+                lineNb + 1 + np.flatnonzero(is_move),
+            )
+        return lineNb + nrows
+
+    def feed_generic(self, line):
+        command, sep, comment = line.partition(';')
+        if sep:
+            self.parser.comment = comment
+
+        comm = command.split(None, 1)
+        if not comm:
+            return
+        code = comm[0]
+        handler = self.dispatch.get(code)
+        if handler is not None:
+            self.flush()
+            handler(parse_words(comm[1] if len(comm) > 1 else None))
+        elif code.startswith("T"):
+            self.flush()
+            try:
+                self.model.toolnumber = int(code[1:])
+            except ValueError:
+                self.model.warn(f"Invalid tool number in code '{code}'.")
+        # Código desconocido: se ignora
@@ -0,0 +1,146 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+from .cache import PARSER_VERSION
+from .segments import SegmentStore
+
+# Archivo de trayectoria ya parseada (.gctp): MAGIC, longitud de la cabecera
+# (uint32 little endian), cabecera JSON y, alineadas a ALIGN bytes, las
+# columnas del SegmentStore y su tabla de colores en binario, tal cual.
+# Se carga con un mmap sin copiar ni parsear nada. Una columna con el mismo
+# valor en todas las filas (herramienta, pausas...) solo guarda ese valor.
+MAGIC = b"GCTP"
+FORMAT_VERSION = 1
+ALIGN = 64
+EXTENSION = ".gctp"
+
+
+def _aligned(n):
+    return -(-n // ALIGN) * ALIGN
+
+
+def save_toolpath(path, store, meta=None):
+    """Guarda `store` (parseado y clasificado) en `path` con metadatos JSON opcionales."""
+    store.flush()
+    arrays = dict(store.columns)
+    arrays["color_starts"] = store.color_starts
+    arrays["color_values"] = store.color_values
+    entries = []
+    offset = 0
+    for name, values in list(arrays.items()):
+        values = np.ascontiguousarray(values)
+        entry = {"name": name, "dtype": values.dtype.str, "shape": list(values.shape)}
+        if values.ndim == 1 and len(values) and np.array_equal(values, np.full_like(values, values[0]), equal_nan=values.dtype.kind == "f"):
+            entry["fill"] = values[0].item()
+            del arrays[name]
+        else:
+            entry["offset"] = offset
+            arrays[name] = values
+            offset += _aligned(values.nbytes)
+        entries.append(entry)
+    header = json.dumps({
+        "format": FORMAT_VERSION,
+        "parser_version": PARSER_VERSION,
+        "meta": meta or {},
+        "arrays": entries,
+    }).encode()
+    start = _aligned(len(MAGIC) + 4 + len(header))
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(b"\0" * (start - f.tell()))
+        for values in arrays.values():
+            f.write(values.tobytes())
+            f.write(b"\0" * (_aligned(values.nbytes) - values.nbytes))
+    os.replace(tmp, path)
+    return path
+
+
+def read_header(path):
+    """Cabecera JSON de un .gctp y el desplazamiento de sus datos."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a toolpath file")
+        (length,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(length))
+    if header["format"] != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported toolpath format {header['format']}")
+    return header, _aligned(len(MAGIC) + 4 + length)
+
+
+def load_toolpath(path):
+    """Devuelve (SegmentStore, meta) de un .gctp; las columnas son vistas de
+    solo lectura de un mmap del archivo (o, las constantes, de un solo valor).
+
+    Un archivo escrito por otra versión del parser se rechaza (ValueError),
+    como las entradas de la caché: hay que volver a convertirlo.
+    """
+    header, start = read_header(path)
+    if header["parser_version"] != PARSER_VERSION:
+        raise ValueError(f"{path} was written by parser version {header['parser_version']}; convert it again")
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    arrays = {}
+    for entry in header["arrays"]:
+        dtype = np.dtype(entry["dtype"])
+        if "fill" in entry:
+            arrays[entry["name"]] = np.broadcast_to(np.array(entry["fill"], dtype=dtype), entry["shape"])
+            continue
+        count = int(np.prod(entry["shape"], dtype=np.int64))
+        begin = start + entry["offset"]
+        arrays[entry["name"]] = data[begin:begin + count * dtype.itemsize].view(dtype).reshape(entry["shape"])
+    color_starts = arrays.pop("color_starts")
+    color_values = arrays.pop("color_values")
+    return SegmentStore.from_arrays(arrays, color_starts, color_values), header["meta"]
+
+
+def polyline_edges(layer):
+    """Aristas (i, i + 1) entre puntos consecutivos de la misma capa."""
+    first = np.flatnonzero(layer[1:] == layer[:-1])
+    return np.column_stack((first, first + 1))
+
+
+def write_ply(path, store):
+    """PLY binario con un vértice por segmento (x, y, z, layer) y las aristas de
+    `polyline_edges`."""
+    n = len(store)
+    vertices = np.empty(n, dtype=[("x", "<f4"), ("y", "<f4"), ("z", "<f4"), ("layer", "<i4")])
+    vertices["x"] = store["X"]
+    vertices["y"] = store["Y"]
+    vertices["z"] = store["Z"]
+    vertices["layer"] = store["layer"]
+    edges = polyline_edges(store["layer"]).astype("<i4")
+    header = (
+        "ply\n"
+        "format binary_little_endian 1.0\n"
+        "comment gcode_importer toolpath\n"
+        f"element vertex {n}\n"
+        "property float x\nproperty float y\nproperty float z\nproperty int layer\n"
+        f"element edge {len(edges)}\n"
+        "property int vertex1\nproperty int vertex2\n"
+        "end_header\n"
+    )
+    with open(path, "wb") as f:
+        f.write(header.encode("ascii"))
+        f.write(vertices.tobytes())
+        f.write(edges.tobytes())
+    return path
+
+
+def write_obj(path, store):
+    """OBJ de texto con los vértices y una polilínea (`l`) por tramo de capa."""
+    xyz = np.column_stack((store["X"], store["Y"], store["Z"]))
+    layer = store["layer"]
+    cuts = np.flatnonzero(layer[1:] != layer[:-1]) + 1
+    with open(path, "w") as f:
+        f.write("# gcode_importer toolpath\n")
+        np.savetxt(f, xyz, fmt="v %.4f %.4f %.4f")
+        for start, stop in zip(np.concatenate(([0], cuts)), np.concatenate((cuts, [len(xyz)]))):
+            if stop - start > 1:
+                f.write("l " + " ".join(map(str, range(start + 1, stop + 1))) + "\n")
+    return path
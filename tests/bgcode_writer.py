@@ -0,0 +1,77 @@
+"""Escritor mínimo de .bgcode para los tests (sin heatshrink ni miniaturas)."""
+import random
+import struct
+import zlib
+
+from gcode_importer import bgcode
+
+_CODES = {c: i for i, c in enumerate(bgcode._MEATPACK_CHARS)}
+_CODES_NO_SPACES = {c: i for i, c in enumerate(bgcode._MEATPACK_CHARS_NO_SPACES)}
+
+
+def meatpack(text, no_spaces=True):
+    """Empaqueta `text` (bytes) con MeatPack, con las señales de activación delante.
+
+    Sin espacios, como el laminador, solo se quitan los de la parte de
+    comando de las líneas G; los comentarios y el resto de líneas los
+    conservan (van como caracteres enteros).
+    """
+    out = bytearray(bgcode.MEATPACK_SIGNAL + bytes([bgcode.MEATPACK_ENABLE]))
+    if no_spaces:
+        out += bgcode.MEATPACK_SIGNAL + bytes([bgcode.MEATPACK_NO_SPACES])
+    codes = _CODES_NO_SPACES if no_spaces else _CODES
+    for line in text.splitlines(keepends=True):
+        if no_spaces and line.startswith(b"G"):
+            command, sep, comment = line.partition(b";")
+            line = command.replace(b" ", b"") + sep + comment
+        i = 0
+        while i < len(line):
+            c1 = line[i]
+            if c1 == ord("\n"):
+                # Tras un '\n' en los bits bajos los altos son relleno
+                out.append(_CODES[c1] | _CODES[c1] << 4)
+                i += 1
+                continue
+            c2 = line[i + 1] if i + 1 < len(line) else ord("\n")
+            i += 2
+            packed1, packed2 = c1 in codes, c2 in codes
+            if packed1 and packed2:
+                out.append(codes[c1] | codes[c2] << 4)
+            elif packed1:
+                out += bytes([codes[c1] | 0xF0, c2])
+            elif packed2:
+                out += bytes([0x0F | codes[c2] << 4, c1])
+            else:
+                out += bytes([0xFF, c1, c2])
+    return bytes(out)
+
+
+def _block(type, data, params, compression, crc):
+    stored = zlib.compress(data) if compression == bgcode.COMPRESSION_DEFLATE else data
+    header = struct.pack("<HHI", type, compression, len(data))
+    if compression != bgcode.COMPRESSION_NONE:
+        header += struct.pack("<I", len(stored))
+    body = header + params + stored
+    return body + (struct.pack("<I", zlib.crc32(body)) if crc else b"")
+
+
+def write_bgcode(path, text, encoding=bgcode.ENCODING_MEATPACK, no_spaces=True,
+                 compression=bgcode.COMPRESSION_DEFLATE, crc=True, block_size=4096, seed=0):
+    """Escribe `text` (bytes) como .bgcode en bloques de G-code de tamaño
+    aleatorio (hasta `block_size`), cortados en cualquier byte."""
+    rng = random.Random(seed)
+    out = bytearray(bgcode.MAGIC + struct.pack("<IH", bgcode.VERSION,
+                                               bgcode.CHECKSUM_CRC32 if crc else bgcode.CHECKSUM_NONE))
+    no_encoding = struct.pack("<H", bgcode.ENCODING_NONE)
+    out += _block(bgcode.BLOCK_FILE_METADATA, b"Producer=tests\n", no_encoding, bgcode.COMPRESSION_NONE, crc)
+    out += _block(bgcode.BLOCK_PRINTER_METADATA, b"printer_model=MK4\n", no_encoding, compression, crc)
+    data = text if encoding == bgcode.ENCODING_NONE else meatpack(text, no_spaces)
+    params = struct.pack("<H", encoding)
+    start = 0
+    while start < len(data):
+        stop = min(start + rng.randint(1, block_size), len(data))
+        out += _block(bgcode.BLOCK_GCODE, data[start:stop], params, compression, crc)
+        start = stop
+    with open(path, "wb") as f:
+        f.write(out)
+    return path
@@ -0,0 +1,54 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT, "tests", "data")
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.generate import cached  # noqa: E402
+
+# Columnas que tienen que coincidir entre los distintos caminos de parseo
+COMPARED_COLUMNS = ("X", "Y", "Z", "F", "E", "type", "tool", "lineNb", "style", "layer", "dwell")
+
+
+def data_path(name):
+    return os.path.join(DATA_DIR, name)
+
+
+def colors(store):
+    """Color (RGBCMYKW) de cada fila de `store`."""
+    index = store.color_index(np.arange(len(store)))  # vuelca antes de leer la tabla
+    return store.color_values[index]
+
+
+def assert_same_store(store, expected, columns=COMPARED_COLUMNS):
+    assert len(store) == len(expected)
+    for name in columns:
+        np.testing.assert_array_equal(store[name], expected[name], err_msg=name)
+    np.testing.assert_array_equal(colors(store), colors(expected), err_msg="color")
+
+
+def assert_same_model(model, expected):
+    """Mismas filas y mismo estado modal al acabar, comentario vigente incluido."""
+    assert_same_store(model.store, expected.store)
+    assert model.modal_state() == expected.modal_state()
+    assert model.parser.comment == expected.parser.comment
+
+
+@pytest.fixture(scope="session")
+def generated(tmp_path_factory):
+    """G-code sintético de `benchmarks.generate` (kind, lines), generado una vez."""
+    directory = str(tmp_path_factory.mktemp("generated"))
+    return lambda kind, lines: cached(kind, lines, directory)
+
+
+@pytest.fixture(params=["mixed", "relative", "mixing", "infill"])
+def gcode(request, generated):
+    """Un archivo de cada tipo: el fixture a mano y tres generados."""
+    if request.param == "mixed":
+        return data_path("mixed.gcode")
+    return generated(request.param, 5000)
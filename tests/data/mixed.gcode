@@ -0,0 +1,65 @@
+; Fixture de los tests: un poco de todo lo que el parser tiene que soportar
+G21
+G90
+M82
+G28
+T0
+G92 E0
+M163 S0 P0.5 ;(1,0,0)
+G1 Z0.2 F3000
+G1 X10 Y10 E0.5 F1800
+G1 X20 Y10 E1.0
+G1 X20 Y20 E1.5 ; comentario tras un movimiento
+G1 X10 Y20 E2.0
+
+;;; comentario suelto con ; dentro
+G0 X15 Y15
+G1 X18 Y15 E2.2
+G1 Z0.4 F600
+G1 X10 Y10 E2.6 F1800
+G2 X20 Y20 I5 J5 E3.0
+G3 X10 Y10 R8 E3.4
+G1 X12 Y10
+G4 P250
+G1 X14 Y10 E3.6
+M163 S1 P0.3 ;(0,1,0)
+T1
+G1 X14 Y12 E3.8
+G1 Z0.6 F600
+G91
+G1 X2 Y0 E0.2 F1500
+G1 X0 Y2 E0.2
+G1 X-2 E0.2
+G92 E0
+G1 Y-2 E0.2 F900
+G90
+G92 X0 Y0
+G1 X5 Y5 E1.0
+G1 X6 X7 E1.1
+G1 X7.5 W3
+G1 X-.5 Y+3. E.1
+	G1 X1 Y1 E1.2
+G17
+G18
+G2 X3 Z2 I1 K1
+G19
+G3 Y2 Z3 J-1 K0.5
+G17
+M107
+Tx
+T0
+G1 Z0.8 F600
+G1 X10 Y10 E1.4 F1800
+G1 X30 Y10 E2.4
+G1 X30 Y30 E3.4
+G4 S1
+G1 X10 Y30 E4.4
+G0 X50 Y50 F9000
+G1 Z1.0 F600
+G1 X10 Y10 E4.8 F1800
+G1 X40 Y40 E5.8
+G1 X10 Y40 E6.8
+G1 X40 Y10 E7.8
+M117 Layer5Done
+G1 Z1.2
+G1 X0 Y0
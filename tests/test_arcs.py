@@ -0,0 +1,82 @@
+"""Teselado de G2/G3: flecha acotada por la tolerancia, formas I/J/K y R,
+vueltas completas, hélices y planos G17-G19."""
+import numpy as np
+import pytest
+
+from gcode_importer.arcs import tessellate_arcs
+from gcode_importer.parser import GcodeParser
+
+NAN = np.nan
+
+
+def arc(start, end, ijk=(NAN, NAN, NAN), radius=NAN, clockwise=False, plane="XY", tolerance=0.01):
+    return tessellate_arcs(
+        np.array([start], dtype=np.float64),
+        np.array([end], dtype=np.float64),
+        np.array([ijk], dtype=np.float64),
+        np.array([radius], dtype=np.float64),
+        np.array([clockwise]),
+        plane,
+        tolerance,
+    )
+
+
+def chord_sagitta(points, center):
+    """Distancia máxima entre el arco y el punto medio de cada cuerda."""
+    mid = 0.5 * (points[1:] + points[:-1])
+    radius = np.linalg.norm(points[0] - center)
+    return np.max(radius - np.linalg.norm(mid - center, axis=1))
+
+
+def test_quarter_circle_within_tolerance():
+    points, counts = arc((10, 0, 0), (0, 10, 0), ijk=(-10, 0, NAN))
+    assert counts.tolist() == [len(points)]
+    assert points[-1].tolist() == [0, 10, 0]
+    path = np.vstack(([10, 0, 0], points))
+    np.testing.assert_allclose(np.linalg.norm(path[:, :2], axis=1), 10.0)
+    assert 0 < chord_sagitta(path, np.zeros(3)) <= 0.01
+    # G3 gira en sentido antihorario: el ángulo crece
+    assert np.all(np.diff(np.arctan2(path[:, 1], path[:, 0])) > 0)
+
+
+def test_radius_form_matches_center_form():
+    center, _ = arc((10, 0, 0), (0, 10, 0), ijk=(-10, 0, NAN), clockwise=True)
+    radius, _ = arc((10, 0, 0), (0, 10, 0), radius=-10.0, clockwise=True)
+    np.testing.assert_allclose(radius, center, atol=1e-9)
+    # Un R positivo pide el arco corto, con el centro al otro lado de la cuerda
+    short, _ = arc((10, 0, 0), (0, 10, 0), radius=10.0, clockwise=True)
+    assert len(short) < len(center)
+
+
+def test_full_circle_and_helix():
+    points, counts = arc((5, 0, 1), (5, 0, 3), ijk=(-5, 0, NAN))
+    path = np.vstack(([5, 0, 1], points))
+    np.testing.assert_allclose(np.linalg.norm(path[:, :2], axis=1), 5.0)
+    # La vuelta completa barre 2π y Z sube de forma lineal con el ángulo
+    angle = np.unwrap(np.arctan2(path[:, 1], path[:, 0]))
+    assert angle[-1] - angle[0] == pytest.approx(2 * np.pi)
+    np.testing.assert_allclose(path[:, 2], 1 + 2 * (angle - angle[0]) / (2 * np.pi))
+
+
+@pytest.mark.parametrize("plane, axes", [("ZX", (2, 0)), ("YZ", (1, 2))])
+def test_other_planes(plane, axes):
+    p, q = axes
+    start = np.zeros(3)
+    end = np.zeros(3)
+    start[p], end[q] = 4, 4
+    ijk = np.full(3, NAN)
+    ijk[p] = -4
+    points, _ = arc(start, end, ijk=ijk, plane=plane)
+    np.testing.assert_allclose(np.hypot(points[:, p], points[:, q]), 4.0)
+    assert np.all(points[:, 3 - p - q] == 0)
+
+
+def test_parsed_arc_rows(tmp_path):
+    path = tmp_path / "arc.gcode"
+    path.write_text("G1 X10 Y0 F1200\nG3 X0 Y10 I-10 J0 E1\nG1 X0 Y20 E2\n")
+    store = GcodeParser().parseFile(str(path)).store
+    rows = store["lineNb"] == 2
+    assert rows.sum() > 1
+    # Todas las cuerdas extruyen y la última acaba en el punto final del arco
+    assert np.all(store["E"][rows] > 0)
+    assert [store[axis][rows][-1] for axis in "XY"] == [0, 10]
@@ -0,0 +1,68 @@
+"""Ida y vuelta texto → .bgcode → filas: leer el binario da lo mismo que el texto."""
+import pytest
+
+from bgcode_writer import write_bgcode
+from conftest import assert_same_store, data_path
+from gcode_importer import bgcode
+from gcode_importer.parser import GcodeParser
+
+
+def canonical_text(path):
+    """Texto de `path` sin líneas en blanco (el .bgcode no las conserva)."""
+    with open(path, "rb") as f:
+        return b"".join(line for line in f if line.strip())
+
+
+def parse(path):
+    model = GcodeParser().parseFile(path)
+    model.classifySegments()
+    return model
+
+
+@pytest.mark.parametrize("encoding, no_spaces, compression", [
+    (bgcode.ENCODING_NONE, False, bgcode.COMPRESSION_NONE),
+    (bgcode.ENCODING_NONE, False, bgcode.COMPRESSION_DEFLATE),
+    (bgcode.ENCODING_MEATPACK, False, bgcode.COMPRESSION_DEFLATE),
+    (bgcode.ENCODING_MEATPACK, True, bgcode.COMPRESSION_DEFLATE),
+    (bgcode.ENCODING_MEATPACK_COMMENTS, True, bgcode.COMPRESSION_NONE),
+])
+@pytest.mark.parametrize("name", ["mixed", "infill"])
+def test_round_trip(tmp_path, generated, name, encoding, no_spaces, compression):
+    source = data_path("mixed.gcode") if name == "mixed" else generated(name, 5000)
+    text = canonical_text(source)
+    plain = tmp_path / "plain.gcode"
+    plain.write_bytes(text)
+    binary = write_bgcode(str(tmp_path / "plain.bgcode"), text, encoding, no_spaces, compression)
+
+    model = parse(binary)
+    assert_same_store(model.store, parse(str(plain)).store)
+    assert model.metadata["printer"] == {"printer_model": "MK4"}
+    if encoding == bgcode.ENCODING_NONE or not no_spaces:
+        assert b"".join(bgcode.iter_gcode(binary)) == text
+
+
+def test_crc_mismatch(tmp_path):
+    binary = write_bgcode(str(tmp_path / "bad.bgcode"), canonical_text(data_path("mixed.gcode")))
+    with open(binary, "r+b") as f:
+        f.seek(-8, 2)
+        last = f.read(1)
+        f.seek(-8, 2)
+        f.write(bytes([last[0] ^ 0xFF]))
+    with pytest.raises(ValueError, match="checksum"):
+        parse(binary)
+
+
+def test_heatshrink_python():
+    # Literales y una copia que se solapa ("abcabcabca"), con ventana de 11 bits
+    bits = "".join("1" + format(c, "08b") for c in b"abc") + "0" + format(2, "011b") + format(6, "04b")
+    bits += "0" * (-len(bits) % 8)
+    data = int(bits, 2).to_bytes(len(bits) // 8, "big")
+    assert bytes(bgcode.heatshrink_decompress(data, 11, 4)) == b"abcabcabca"
+
+
+def test_meatpack_spaces_only_in_g_commands(tmp_path):
+    # Sin espacios solo se separan las palabras de las líneas G, antes de su ';'
+    text = (b"; 3DBenchy\n;3DBenchy\nM117 Layer2Done\nT1\n"
+            b"G1 X10.5 Y2 E.5 F1800;move2Up Z9X\nG4 S1;\nG18\nG2 X1 Z2 I1 K1\n")
+    binary = write_bgcode(str(tmp_path / "comments.bgcode"), text)
+    assert b"".join(bgcode.iter_gcode(binary)) == text
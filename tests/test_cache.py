@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from conftest import assert_same_store, data_path
+from gcode_importer.cache import ParseCache
+from gcode_importer.parser import GcodeParser
+
+
+def parsed(path):
+    model = GcodeParser().parseFile(path)
+    model.classifySegments()
+    return model.store
+
+
+def test_round_trip(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache"))
+    path = data_path("mixed.gcode")
+    key = cache.key(path)
+    assert cache.load(key) is None
+    cache.save(key, parsed(path))
+    assert_same_store(cache.load(key), parsed(path))
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache"))
+    store = parsed(data_path("mixed.gcode"))
+    for age, key in enumerate(("a", "b", "c")):
+        cache.save(key, store)
+        os.utime(cache._entry(key), (age, age))
+    # Un acierto la pone la primera: la que menos se ha usado es ahora "b"
+    assert cache.load("a") is not None
+    cache.max_bytes = 2 * max(size for _, size, _ in cache.entries())
+    cache.evict()
+    assert cache.load("b") is None
+    assert cache.load("a") is not None and cache.load("c") is not None
+
+
+def test_read_only_cache_still_loads(tmp_path, monkeypatch):
+    cache = ParseCache(str(tmp_path / "cache"))
+    path = data_path("mixed.gcode")
+    key = cache.key(path)
+    cache.save(key, parsed(path))
+
+    def refuse(*args, **kwargs):
+        raise PermissionError("read-only")
+
+    monkeypatch.setattr(os, "utime", refuse)
+    assert_same_store(cache.load(key), parsed(path))
+
+
+def test_unwritable_cache_raises_cleanly(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = ParseCache(str(blocker / "cache"))
+    with pytest.raises(OSError):
+        cache.save("key", parsed(data_path("mixed.gcode")))
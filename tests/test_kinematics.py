@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from gcode_importer.kinematics import MachineLimits, segment_times
+from gcode_importer.parser import GcodeParser
+
+
+def parse_text(tmp_path, text, **kwargs):
+    path = tmp_path / "t.gcode"
+    path.write_text(text)
+    model = GcodeParser().parseFile(str(path), **kwargs)
+    model.classifySegments()
+    return model
+
+
+def test_single_segment_trapezoid():
+    # Parte y acaba en reposo: t = L / v + v / a si llega a crucero
+    limits = MachineLimits(max_velocity=500.0, acceleration=1000.0, jerk=10.0)
+    t = segment_times(np.array([[100.0, 0.0, 0.0]]), [3000.0], np.zeros(1), limits=limits)
+    assert t[0] == pytest.approx(100.0 / 50.0 + 50.0 / 1000.0)
+    # Demasiado corto para llegar a crucero: perfil triangular, t = 2 sqrt(L / a)
+    t = segment_times(np.array([[1.0, 0.0, 0.0]]), [3000.0], np.zeros(1), limits=limits)
+    assert t[0] == pytest.approx(2.0 * np.sqrt(1.0 / 1000.0))
+
+
+@pytest.mark.parametrize("mapped", [False, True])
+def test_relative_feedrate_is_absolute(tmp_path, mapped):
+    # En G91 F sigue siendo el avance en mm/min, no un incremento
+    relative = parse_text(tmp_path, "G91\nG1 X100 F3000\nG1 X100\nG1 Y100 F1200\nG1 X-100\n", mapped=mapped)
+    absolute = parse_text(tmp_path, "G1 X100 F3000\nG1 X200\nG1 X200 Y100 F1200\nG1 X100\n", mapped=mapped)
+    assert relative.store["F"].tolist() == [3000.0, 3000.0, 1200.0, 1200.0]
+    np.testing.assert_array_equal(relative.store["X"], absolute.store["X"])
+    assert relative.estimate_print_time() == absolute.estimate_print_time()
+    # Un solo segmento en G91 da el caso analítico de arriba
+    single = parse_text(tmp_path, "G91\nG1 F600\nG1 X100 F3000\n", mapped=mapped)
+    limits = MachineLimits(max_velocity=500.0, acceleration=1000.0)
+    assert single.estimate_print_time(limits) == pytest.approx(100.0 / 50.0 + 50.0 / 1000.0)
+
+
+def test_window_starts_from_previous_point(tmp_path):
+    model = parse_text(tmp_path, "G1 Z0.2 F1200\nG1 X50 E1\nG1 Z0.4\nG1 X0 E2\nG1 Z0.6\nG1 X50 E3\n")
+    model.keep_layers(3, 3)
+    model.estimate_print_time()
+    # El primer segmento sube 0.2 desde el final de la capa anterior, no desde el origen
+    assert model.store["Z"][0] == 0.6
+    xyz = np.column_stack([model.store[axis] for axis in "XYZ"])
+    expected = segment_times(xyz, model.store["F"], model.store["dwell"], start=(0.0, 0.0, 0.4))
+    np.testing.assert_allclose(model.store["time"], np.cumsum(expected))
+
+
+def test_dwell_adds_to_print_time(tmp_path):
+    moves = "G1 Z0.2 F1200\nG1 X50 E1 F1800\n{}G1 Z0.4\nG1 X0 E2\n"
+    plain = parse_text(tmp_path, moves.format(""))
+    paused = parse_text(tmp_path, moves.format("G4 P500\nG4 S1\n"))
+    # Sin jerk la esquina ya para la máquina, así que la pausa solo suma su duración
+    limits = MachineLimits(jerk=0.0)
+    assert paused.estimate_print_time(limits) == pytest.approx(plain.estimate_print_time(limits) + 1.5)
+    assert paused.layer_times.sum() == pytest.approx(paused.print_time)
@@ -0,0 +1,164 @@
+"""Todos los caminos de parseo dan las mismas filas que el camino genérico
+línea a línea (el `parseLine` original): texto, mmap, procesos, comprimido,
+por lotes, por capas y siguiendo un archivo que crece."""
+import gzip
+import shutil
+
+import numpy as np
+import pytest
+
+from conftest import COMPARED_COLUMNS, assert_same_model, assert_same_store, colors, data_path
+from gcode_importer import parallel, parser
+from gcode_importer.follow import FileFollower
+from gcode_importer.parser import GcodeParser
+from gcode_importer.reader import read_mapped
+
+
+def reference(path, subd_threshold=None):
+    """Parseo de referencia: línea a línea, sin el camino rápido."""
+    model = GcodeParser().model
+    model.tokenizer.fast = False
+    model.parseFile(path)
+    model.store.flush()
+    if subd_threshold is not None:
+        model.subdivide_segments(subd_threshold)
+    model.classifySegments()
+    return model
+
+
+def parse(path, subd_threshold=None, **kwargs):
+    model = GcodeParser().parseFile(path, **kwargs)
+    model.store.flush()
+    if subd_threshold is not None:
+        model.subdivide_segments(subd_threshold)
+    model.classifySegments()
+    return model
+
+
+def test_mixed_fixture_rows():
+    model = reference(data_path("mixed.gcode"))
+    store = model.store
+    assert len(model.layer_offsets) == 6
+    # M163 S1 P0.3 cambia el color a partir de los movimientos siguientes
+    first = np.flatnonzero(store["lineNb"] > 25)[0]
+    assert colors(store)[first - 1, 3:].tolist() == [0.5, 0, 0, 0, 0]
+    assert colors(store)[first, 3:].tolist() == [0.5, 0.3, 0, 0, 0]
+    # G4 P250 y G4 S1 quedan como pausa del segmento anterior
+    assert store["dwell"].sum() == pytest.approx(1.25)
+    # T1 solo afecta a los movimientos siguientes
+    assert store["tool"][store["lineNb"] == 27].tolist() == [1]
+
+
+@pytest.mark.parametrize("subd_threshold", [None, 0.7])
+def test_text_paths(gcode, subd_threshold):
+    expected = reference(gcode, subd_threshold)
+    assert_same_model(parse(gcode, subd_threshold), expected)
+    assert_same_model(parse(gcode, subd_threshold, mapped=True), expected)
+
+
+def test_mapped_small_blocks(gcode):
+    # Bloques de mmap más cortos que muchas líneas: cada corte cae en otro sitio
+    model = GcodeParser().model
+    read_mapped(gcode, model.tokenizer, block_size=64)
+    model.tokenizer.flush()
+    model.classifySegments()
+    assert_same_model(model, reference(gcode))
+
+
+def test_crlf(gcode, tmp_path):
+    crlf = tmp_path / "crlf.gcode"
+    with open(gcode, "rb") as f:
+        crlf.write_bytes(f.read().replace(b"\n", b"\r\n"))
+    expected = reference(gcode)
+    assert_same_model(parse(str(crlf), mapped=True), expected)
+    assert_same_model(parse(str(crlf)), expected)
+
+
+def test_parallel(gcode, monkeypatch):
+    monkeypatch.setattr(parallel, "MIN_PARALLEL_SIZE", 0)
+    assert_same_model(parse(gcode, mapped=True, workers=2), reference(gcode))
+
+
+def test_parallel_generic_comment(tmp_path, monkeypatch):
+    # El primer trozo acaba con una línea genérica comentada y otra sin comentario:
+    # el comentario vigente al seguir es el de la línea genérica, no el de los G1
+    monkeypatch.setattr(parallel, "MIN_PARALLEL_SIZE", 0)
+    monkeypatch.setattr(parallel, "CHUNKS_PER_WORKER", 1)
+    path = tmp_path / "comments.gcode"
+    path.write_text("G1 X1 F600 ; span\nG1 X2 ; span\nM117 hello ; generic\nM117 again\n"
+                    + "".join("G1 X{} Y{}\n".format(i, i) for i in range(3, 9)))
+    model = parse(str(path), mapped=True, workers=2)
+    assert model.parser.comment == " generic"
+    assert_same_model(model, reference(str(path)))
+
+
+def test_compressed(gcode, tmp_path):
+    packed = str(tmp_path / "packed.gcode.gz")
+    with open(gcode, "rb") as src, gzip.open(packed, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    assert_same_model(parse(packed), reference(gcode))
+
+
+@pytest.mark.parametrize("subd_threshold", [None, 0.7])
+@pytest.mark.parametrize("batch_size", [1, 97])
+def test_streamed(gcode, subd_threshold, batch_size):
+    expected = reference(gcode, subd_threshold)
+    model = GcodeParser().model
+    batches = list(model.iter_pipeline(gcode, subd_threshold, batch_size=batch_size))
+    if subd_threshold is None:
+        assert all(0 < len(batch) <= batch_size for batch in batches)
+    for name in COMPARED_COLUMNS:
+        np.testing.assert_array_equal(np.concatenate([batch[name] for batch in batches]), expected.store[name],
+                                      err_msg=name)
+    np.testing.assert_array_equal(np.concatenate([colors(batch) for batch in batches]), colors(expected.store))
+    assert model.modal_state() == expected.modal_state()
+    assert model.parser.comment == expected.parser.comment
+
+
+def test_layer_window(gcode, monkeypatch):
+    # Puntos de control pequeños para que las ventanas empiecen a mitad de archivo
+    monkeypatch.setattr(parser, "CHECKPOINT_BYTES", 2048)
+    expected = reference(gcode)
+    index = GcodeParser().model.index_layers(gcode)
+    assert len(index.offsets) > 2 or len(expected.layer_offsets) < 10
+    np.testing.assert_array_equal(index.layer_rows, expected.layer_offsets)
+    n = index.layer_count
+    for first, last in {(0, 0), (0, n - 1), (n - 1, n - 1), (n // 3, n // 2), (1, 2)}:
+        if not 0 <= first <= last < n:
+            continue
+        model = GcodeParser().model.parse_layers(gcode, index, first, last)
+        start, stop = expected.layer_offsets[[first, last], [0, 1]].tolist()
+        assert_same_store(model.store, expected.store.take(np.arange(start, stop)))
+        if start:
+            previous = [expected.store[axis][start - 1] for axis in ("X", "Y", "Z")]
+            assert model.start_point[:3] == previous
+        if last == n - 1:
+            # La ventana que llega al final deja el mismo estado que el archivo entero
+            assert model.modal_state() == expected.modal_state()
+            assert model.parser.comment == expected.parser.comment
+
+
+@pytest.mark.parametrize("subd_threshold", [None, 0.7])
+def test_follow(gcode, tmp_path, subd_threshold):
+    with open(gcode, "rb") as f:
+        content = f.read()
+    live = tmp_path / "live.gcode"
+    live.write_bytes(b"")
+    follower = FileFollower(str(live), subd_threshold)
+    batches = []
+    rng = np.random.default_rng(0)
+    # Se añade en trozos que cortan líneas por la mitad
+    cuts = np.sort(rng.integers(0, len(content), 20))
+    for start, stop in zip(np.concatenate(([0], cuts)), np.concatenate((cuts, [len(content)]))):
+        with open(live, "ab") as f:
+            f.write(content[start:stop])
+        batch, restarted = follower.poll()
+        assert not restarted
+        batches.append(batch)
+    batches.append(follower.flush())
+    expected = reference(gcode, subd_threshold)
+    for name in COMPARED_COLUMNS:
+        np.testing.assert_array_equal(np.concatenate([batch[name] for batch in batches]), expected.store[name],
+                                      err_msg=name)
+    assert follower.model.modal_state() == expected.modal_state()
+    assert follower.model.parser.comment == expected.parser.comment
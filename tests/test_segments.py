@@ -0,0 +1,55 @@
+"""`SegmentStore`: buffers de parseo, tramos de color, `take` y la vista de
+compatibilidad `model.segments`."""
+import numpy as np
+
+from conftest import colors, data_path
+from gcode_importer.parser import GcodeParser
+from gcode_importer.segments import SegmentStore
+
+
+def filled(n, color_every):
+    store = SegmentStore()
+    for i in range(n):
+        if i % color_every == 0:
+            store.set_color([0, 0, 0, i, 0, 0, 0, 0])
+        store.append(i, 2 * i, 0.2, 1800.0, 0.1, 1, 0, i + 1)
+    return store
+
+
+def test_append_and_flush():
+    store = filled(10, 4)
+    assert len(store) == 10
+    np.testing.assert_array_equal(store["X"], np.arange(10))
+    # Más filas tras volcar: se añaden a las columnas ya creadas
+    store.set_color([0, 0, 0, 99, 0, 0, 0, 0])
+    store.append(10, 20, 0.2, 1800.0, 0.1, 1, 0, 11)
+    assert len(store) == 11
+    assert colors(store)[:, 3].tolist() == [0] * 4 + [4] * 4 + [8] * 2 + [99]
+    # Dos cambios de color sin movimientos entre medias: vale el último
+    store.set_color([0, 0, 0, 1, 0, 0, 0, 0])
+    store.set_color([0, 0, 0, 2, 0, 0, 0, 0])
+    store.append(11, 22, 0.2, 1800.0, 0.1, 1, 0, 12)
+    assert colors(store)[-1, 3] == 2
+
+
+def test_take_keeps_color_runs():
+    store = filled(10, 4)
+    rows = np.array([1, 2, 6, 9])
+    part = store.take(rows)
+    np.testing.assert_array_equal(part["lineNb"], store["lineNb"][rows])
+    np.testing.assert_array_equal(colors(part), colors(store)[rows])
+
+
+def test_segment_view():
+    model = GcodeParser().parseFile(data_path("mixed.gcode"))
+    model.classifySegments()
+    store = model.store
+    segments = model.segments
+    assert len(segments) == len(store)
+    for i in (0, len(store) // 2, -1):
+        segment = segments[i]
+        assert segment.coords == {axis: store[axis][i] for axis in ("X", "Y", "Z", "F", "E")}
+        assert segment.lineNb == store["lineNb"][i]
+        assert segment.toolnumber == store["tool"][i]
+        assert segment.layerIdx == store["layer"][i]
+        assert segment.color == colors(store)[i].tolist()
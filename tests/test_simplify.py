@@ -0,0 +1,58 @@
+"""Simplificación: cada punto quitado queda a menos de la tolerancia de la
+trayectoria simplificada, sin unir tramos distintos y sin perder E."""
+import numpy as np
+import pytest
+
+from gcode_importer.parser import GcodeParser
+from gcode_importer.simplify import SimplifyState, run_bounds, simplify_batch
+
+
+def noisy_print(path):
+    """Dos capas de un círculo denso con ruido y un desplazamiento entre
+    ellas; cada fila del almacén sale de una línea distinta."""
+    rng = np.random.default_rng(1)
+    lines = ["G1 Z0.2 F1200"]
+    for z in (0.2, 0.4):
+        lines.append(f"G1 Z{z} F1200")
+        lines.append("G0 X30 Y0 F6000")
+        angle = np.linspace(0, 2 * np.pi, 400)
+        radius = 30 + rng.normal(0, 0.01, len(angle))
+        for x, y in zip(radius * np.cos(angle), radius * np.sin(angle)):
+            lines.append(f"G1 X{x:.4f} Y{y:.4f} E0.05 F1800")
+        lines.extend(f"G1 X{x} Y-5 E0.1" for x in range(30, -31, -1))
+    path.write_text("\n".join(lines) + "\n")
+    model = GcodeParser().parseFile(str(path))
+    model.classifySegments()
+    return model.store
+
+
+@pytest.mark.parametrize("tolerance", [0.005, 0.05, 0.5])
+def test_removed_points_within_tolerance(tmp_path, tolerance):
+    store = noisy_print(tmp_path / "noisy.gcode")
+    out = simplify_batch(store, tolerance, SimplifyState())
+    assert len(out) < len(store)
+    # lineNb es único por fila: da las filas conservadas del original
+    keep = np.searchsorted(store["lineNb"], out["lineNb"])
+    xyz = np.column_stack([store[axis] for axis in "XYZ"])
+    removed = np.setdiff1d(np.arange(len(store)), keep)
+    after = keep[np.searchsorted(keep, removed)]
+    before = keep[np.searchsorted(keep, removed) - 1]
+    a, b, p = xyz[before], xyz[after], xyz[removed]
+    ab = b - a
+    t = np.clip(np.einsum("ij,ij->i", p - a, ab) / np.einsum("ij,ij->i", ab, ab), 0, 1)
+    distance = np.linalg.norm(p - (a + t[:, None] * ab), axis=1)
+    assert distance.max() <= tolerance + 1e-9
+    # El final de cada tramo (estilo, capa, herramienta, color) se conserva
+    _, stops = run_bounds(store)
+    assert np.isin(stops - 1, keep).all()
+    assert out["E"].sum() == pytest.approx(store["E"].sum())
+
+
+def test_collinear_run_keeps_its_ends(tmp_path):
+    path = tmp_path / "line.gcode"
+    path.write_text("".join(f"G1 X{x} Y0 E0.1 F1800\n" for x in range(1, 101)))
+    model = GcodeParser().parseFile(str(path))
+    model.classifySegments()
+    state = model.simplify_segments(0.001)
+    assert model.store["X"].tolist() == [1, 100]
+    assert (state.before, state.after) == (100, 2)
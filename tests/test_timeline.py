@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from gcode_importer.timeline import ToolpathIndex
+
+
+def test_positions():
+    # Dos segmentos de 10 mm: 1 s el primero, 3 s el segundo tras una pausa de 1 s
+    index = ToolpathIndex([[0, 0, 0], [10, 0, 0], [10, 10, 0]], [1, 2, 3], [0], [0.0, 1.0, 5.0], [1], [1.0])
+    assert index.at_factor(0.75).xyz.tolist() == [10.0, 5.0, 0.0]
+    assert index.at_time(0.5).xyz.tolist() == [5.0, 0.0, 0.0]
+    # Durante la pausa se queda al final del primer segmento
+    assert index.at_time(1.5).xyz.tolist() == [10.0, 0.0, 0.0]
+    position = index.at_time(3.5)
+    assert position.index == 2 and position.lineNb == 3
+    assert position.xyz.tolist() == pytest.approx([10.0, 5.0, 0.0])
+
+
+@pytest.mark.parametrize("time", [None, np.empty(0)])
+def test_empty_index(time):
+    index = ToolpathIndex(np.empty((0, 3)), np.empty(0, dtype=np.int64), [], time)
+    assert len(index) == 0
+    assert index.at_factor(0.5) is None
+    assert index.at_time(1.0) is None
+    assert index.at_frame(10) is None